@@ -0,0 +1,398 @@
+# ==========================================================
+# Importations nécessaires
+# ==========================================================
+
+# Bibliothèque standard : options, sérialisation JSON, mesure du temps, parallélisme
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+
+# Paramètres de l'application (surchargés pour pointer vers la base de benchmark)
+from config import Config
+
+# Couches testées : pool de connexions, modèle utilisateur, hachage, contrôleur
+import database.pool as pool_db
+from database.pool import init_pool, close_pool, get_conn_cursor, PoolTimeout
+import models.utilisateur_model as utilisateur_model
+from models.utilisateur_model import UtilisateurModel, hash_password
+from models.hash_executor import HashExecutor, HachageIndisponible, fermer_hash_executor
+import models.limiteur_connexion as limiteur_connexion
+from models.limiteur_connexion import LimiteurConnexion, ConnexionLimitee
+from controllers.auth_controller import inscrire, connecter
+
+# Schéma de référence (migrations versionnées)
+from database.migrateur import Migrateur
+
+# Instance PostgreSQL temporaire (ou base de test vide vérifiée)
+from benchmarks.postgres_jetable import PostgresJetable, verifier_base_de_test
+
+
+# Mot de passe commun à tous les comptes générés
+MOT_DE_PASSE = "motdepasse-bench"
+
+
+# ==========================================================
+# Fonctions utilitaires : statistiques
+# ==========================================================
+def _centile(valeurs_triees, q):
+    if not valeurs_triees:
+        return 0.0
+    i = min(len(valeurs_triees) - 1, int(q * len(valeurs_triees)))
+    return valeurs_triees[i]
+
+
+def resumer(latences, duree):
+    """Résumé d'une série de latences (secondes) mesurées pendant 'duree' secondes."""
+    triees = sorted(latences)
+    return {
+        "n": len(triees),
+        "ops_par_s": round(len(triees) / duree, 2) if duree > 0 else 0.0,
+        "p50_ms": round(_centile(triees, 0.50) * 1000, 3),
+        "p95_ms": round(_centile(triees, 0.95) * 1000, 3),
+        "p99_ms": round(_centile(triees, 0.99) * 1000, 3),
+        "max_ms": round((triees[-1] if triees else 0.0) * 1000, 3),
+    }
+
+
+def _chronometrer(fn, *args):
+    debut = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - debut
+
+
+# ==========================================================
+# Génération des données
+# ==========================================================
+def generer_utilisateurs(debut, fin, mot_hash):
+    """Lignes CSV (format COPY) d'utilisateurs fictifs numérotés de 'debut' à 'fin' exclus."""
+    for i in range(debut, fin):
+        yield f"Nom{i},Prenom{i},bench{i}@ebpay.test,{mot_hash},6{i:08d},1990-01-01,Yaounde,VALIDE,CLIENT,1\n"
+
+
+def email_genere(i):
+    return f"bench{i}@ebpay.test"
+
+
+def compter_utilisateurs():
+    with get_conn_cursor() as (conn, cur):
+        cur.execute("SELECT count(*) FROM public.utilisateur")
+        return cur.fetchone()[0]
+
+
+def remplir_table(taille, mot_hash, lot=50_000):
+    """Complète la table utilisateur jusqu'à 'taille' comptes générés (COPY par lots)."""
+    actuel = compter_utilisateurs()
+    for debut in range(actuel, taille, lot):
+        tampon = io.StringIO("".join(generer_utilisateurs(debut, min(taille, debut + lot), mot_hash)))
+        with get_conn_cursor() as (conn, cur):
+            cur.copy_expert(
+                "COPY public.utilisateur (nom, prenom, email, mot_de_passe, numero_telephone, "
+                "date_naissance, adresse, kyc_status, role, niveau_verification) FROM STDIN WITH (FORMAT csv)",
+                tampon
+            )
+            conn.commit()
+    with get_conn_cursor() as (conn, cur):
+        conn.autocommit = True
+        cur.execute("ANALYZE public.utilisateur")
+        conn.autocommit = False
+
+
+# ==========================================================
+# Scénario 1 : débit de hash_password / verify_password
+# ==========================================================
+def scenario_hachage(iterations_liste, workers_liste, n):
+    resultats = []
+    origine = utilisateur_model.ITERATIONS
+    try:
+        for iterations in iterations_liste:
+            utilisateur_model.ITERATIONS = iterations
+            stocke = hash_password(MOT_DE_PASSE)
+
+            # Thread unique : coût d'un hachage isolé
+            latences = []
+            debut = time.perf_counter()
+            for _ in range(n):
+                latences.append(_chronometrer(utilisateur_model.verify_password, stocke, MOT_DE_PASSE))
+            resultats.append({"iterations": iterations, "workers": 0,
+                              **resumer(latences, time.perf_counter() - debut)})
+
+            # Pool de hachage : débit global selon le nombre de workers
+            for workers in workers_liste:
+                executor = HashExecutor(workers=workers, taille_file=n)
+                debut = time.perf_counter()
+                futures = [executor.soumettre(_chronometrer, hash_password, MOT_DE_PASSE) for _ in range(n)]
+                wait(futures)
+                duree = time.perf_counter() - debut
+                executor.fermer()
+                resultats.append({"iterations": iterations, "workers": workers,
+                                  **resumer([f.result() for f in futures], duree)})
+    finally:
+        utilisateur_model.ITERATIONS = origine
+    return resultats
+
+
+# ==========================================================
+# Scénario 2 : latence de trouver_par_email selon la taille de la table
+# ==========================================================
+def scenario_recherche(tailles, mot_hash, n):
+    resultats = []
+    for taille in tailles:
+        remplir_table(taille, mot_hash)
+        emails = [email_genere(random.randrange(taille)) for _ in range(n)]
+
+        for nom, fn in (("trouver_par_email", UtilisateurModel.trouver_par_email),
+                        ("trouver_pour_connexion", UtilisateurModel.trouver_pour_connexion)):
+            debut = time.perf_counter()
+            latences = [_chronometrer(fn, email) for email in emails]
+            resultats.append({"taille": taille, "requete": nom,
+                              **resumer(latences, time.perf_counter() - debut)})
+
+        # Email absent : cas de toute nouvelle inscription
+        debut = time.perf_counter()
+        latences = [_chronometrer(UtilisateurModel.trouver_pour_connexion, f"absent{i}@ebpay.test") for i in range(n)]
+        resultats.append({"taille": taille, "requete": "trouver_pour_connexion (absent)",
+                          **resumer(latences, time.perf_counter() - debut)})
+    return resultats
+
+
+# ==========================================================
+# Scénario 3 : contention sur get_conn_cursor (plus de threads que PG_POOL_MAX)
+# ==========================================================
+def scenario_pool(multiplicateurs, ops_par_thread, detention_ms):
+    resultats = []
+    for mult in multiplicateurs:
+        threads = max(1, int(Config.PG_POOL_MAX * mult))
+        latences, erreurs = [], []
+        verrou = threading.Lock()
+        avant = pool_db._conn_pool.stats()
+
+        def travail():
+            locales, echecs = [], 0
+            for _ in range(ops_par_thread):
+                debut = time.perf_counter()
+                try:
+                    with get_conn_cursor() as (conn, cur):
+                        cur.execute("SELECT pg_sleep(%s)", (detention_ms / 1000.0,))
+                        conn.rollback()
+                    locales.append(time.perf_counter() - debut)
+                except PoolTimeout:
+                    echecs += 1
+            with verrou:
+                latences.extend(locales)
+                erreurs.append(echecs)
+
+        debut = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as ex:
+            for _ in range(threads):
+                ex.submit(travail)
+        duree = time.perf_counter() - debut
+        apres = pool_db._conn_pool.stats()
+
+        resultats.append({
+            "threads": threads, "pool_max": Config.PG_POOL_MAX, "detention_ms": detention_ms,
+            "timeouts": sum(erreurs),
+            "mises_en_file": apres["epuisements"] - avant["epuisements"],
+            **resumer(latences, duree),
+        })
+    return resultats
+
+
+# ==========================================================
+# Scénario 4 : parcours complet inscription / connexion
+# ----------------------------------------------------------
+# Le limiteur de connexion global est remplacé par un limiteur
+# sans seaux ni blocage, dont le plafond de vérifications suit
+# la concurrence : les mesures portent sur le hachage et la base.
+# Les tentatives refusées malgré tout (limiteur, file de hachage
+# saturée) sont comptées à part dans "refus".
+# ==========================================================
+def _installer_limiteur_bench(concurrence):
+    illimite = 10**9
+    Config.LOGIN_EMAIL_RAFALE = Config.LOGIN_CLIENT_RAFALE = illimite
+    Config.LOGIN_EMAIL_PAR_MINUTE = Config.LOGIN_CLIENT_PAR_MINUTE = illimite
+    Config.LOGIN_ECHECS_LIBRES = illimite
+    limiteur_connexion._limiteur = LimiteurConnexion(
+        verifications_max=max(concurrence, Config.LOGIN_VERIFICATIONS_MAX))
+
+
+def scenario_e2e(concurrences, n, part_inscriptions, taille):
+    resultats = []
+    compteur = iter(range(10**9))
+    verrou = threading.Lock()
+
+    for concurrence in concurrences:
+        _installer_limiteur_bench(concurrence)
+        mesures = {"inscription": [], "connexion": [], "echec": [], "refus": []}
+
+        def une_operation():
+            if random.random() < part_inscriptions:
+                with verrou:
+                    i = next(compteur)
+                donnees = {"nom": "E2E", "prenom": "Bench", "email": f"e2e{os.getpid()}_{concurrence}_{i}@ebpay.test",
+                           "mot_de_passe": MOT_DE_PASSE, "numero_telephone": f"7{os.getpid() % 100:02d}{i:07d}"[:20],
+                           "role": "CLIENT"}
+                type_op, fn, args = "inscription", inscrire, (donnees,)
+            else:
+                type_op, fn, args = "connexion", connecter, (email_genere(random.randrange(taille)), MOT_DE_PASSE)
+            debut = time.perf_counter()
+            try:
+                fn(*args)
+                duree = time.perf_counter() - debut
+            except (ConnexionLimitee, HachageIndisponible):
+                type_op, duree = "refus", time.perf_counter() - debut
+            except Exception:
+                type_op, duree = "echec", time.perf_counter() - debut
+            with verrou:
+                mesures[type_op].append(duree)
+
+        debut = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrence) as ex:
+            for _ in range(n):
+                ex.submit(une_operation)
+        duree = time.perf_counter() - debut
+
+        toutes = mesures["inscription"] + mesures["connexion"]
+        resultats.append({
+            "concurrence": concurrence,
+            "part_inscriptions": part_inscriptions,
+            "echecs": len(mesures["echec"]),
+            "refus": len(mesures["refus"]),
+            "total": resumer(toutes, duree),
+            "inscription": resumer(mesures["inscription"], duree),
+            "connexion": resumer(mesures["connexion"], duree),
+        })
+    return resultats
+
+
+# ==========================================================
+# Exécution
+# ==========================================================
+def _liste(texte, conv=int):
+    return [conv(x) for x in texte.split(",") if x]
+
+
+def _revision_git():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+def _preparer_base(jetable):
+    """Pointe Config vers la base de benchmark et applique les migrations si nécessaire."""
+    if jetable is not None:
+        p = jetable.parametres
+        Config.PG_HOST, Config.PG_PORT, Config.PG_DBNAME = p["host"], p["port"], p["database"]
+        Config.PG_USER, Config.PG_PASSWORD, Config.PG_SSLMODE = p["user"], p["password"], "disable"
+
+    migrateur = Migrateur()
+    try:
+        migrateur.appliquer()
+    finally:
+        migrateur.fermer()
+    init_pool()
+
+
+def executer(args, jetable=None):
+    _preparer_base(jetable)
+
+    if args.iterations:
+        utilisateur_model.ITERATIONS = args.iterations
+    mot_hash = hash_password(MOT_DE_PASSE)
+    scenarios = set(args.scenarios.split(","))
+    resultats = {}
+
+    if "hachage" in scenarios:
+        resultats["hachage"] = scenario_hachage(_liste(args.hachage_iterations), _liste(args.hachage_workers), args.n)
+    if "recherche" in scenarios:
+        resultats["recherche"] = scenario_recherche(_liste(args.tailles), mot_hash, args.n)
+    if "pool" in scenarios:
+        resultats["pool"] = scenario_pool(_liste(args.pool_multiplicateurs, float), args.pool_ops, args.pool_detention_ms)
+    if "e2e" in scenarios:
+        taille = max(_liste(args.tailles))
+        remplir_table(taille, mot_hash)
+        resultats["e2e"] = scenario_e2e(_liste(args.concurrences), args.n, args.part_inscriptions, taille)
+
+    return {
+        "meta": {
+            "date": datetime.now(timezone.utc).isoformat(),
+            "revision": _revision_git(),
+            "python": platform.python_version(),
+            "cpu": os.cpu_count(),
+            "base_jetable": jetable is not None,
+            "config": {
+                "PG_POOL_MIN": Config.PG_POOL_MIN, "PG_POOL_MAX": Config.PG_POOL_MAX,
+                "HASH_EXECUTOR": Config.HASH_EXECUTOR, "HASH_WORKERS": Config.HASH_WORKERS,
+                "ITERATIONS": utilisateur_model.ITERATIONS,
+            },
+        },
+        "resultats": resultats,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks authentification / hachage / pool PostgreSQL.")
+    parser.add_argument("--scenarios", default="hachage,recherche,pool,e2e")
+    parser.add_argument("--sortie", help="fichier JSON de résultats (défaut : sortie standard)")
+    parser.add_argument("--base-test", metavar="NOM",
+                        help="base de test VIDE du serveur du .env (migrée puis remplie ; "
+                             "jamais PG_DBNAME) au lieu d'une instance PostgreSQL jetable")
+    parser.add_argument("--n", type=int, default=200, help="opérations par mesure")
+    parser.add_argument("--iterations", type=int, help="ITERATIONS PBKDF2 pour les scénarios recherche/e2e")
+    parser.add_argument("--hachage-iterations", default="50000,100000,200000,400000")
+    parser.add_argument("--hachage-workers", default=f"1,2,{os.cpu_count() or 2}")
+    parser.add_argument("--tailles", default="1000,10000,100000")
+    parser.add_argument("--pool-multiplicateurs", default="1,2,4,8")
+    parser.add_argument("--pool-ops", type=int, default=50)
+    parser.add_argument("--pool-detention-ms", type=float, default=2.0)
+    parser.add_argument("--concurrences", default="1,4,16,64")
+    parser.add_argument("--part-inscriptions", type=float, default=0.1)
+    args = parser.parse_args()
+
+    try:
+        if args.base_test:
+            # Migrations (dont suppressions d'index) et comptes fictifs : jamais sur une base réelle
+            try:
+                verifier_base_de_test(args.base_test)
+            except RuntimeError as e:
+                print(f" {e}", file=sys.stderr)
+                return 1
+            Config.PG_DBNAME = args.base_test
+            rapport = executer(args)
+        else:
+            with PostgresJetable() as jetable:
+                try:
+                    rapport = executer(args, jetable)
+                finally:
+                    close_pool()
+    finally:
+        fermer_hash_executor()
+        close_pool()
+
+    texte = json.dumps(rapport, indent=2, ensure_ascii=False)
+    if args.sortie:
+        with open(args.sortie, "w", encoding="utf-8") as f:
+            f.write(texte)
+        print(f" Résultats écrits dans {args.sortie}", file=sys.stderr)
+    else:
+        print(texte)
+    return 0
+
+
+# ==========================================================
+# Point d’entrée du script
+# ----------------------------------------------------------
+# À lancer depuis le dossier english/ :
+#   python -m benchmarks.bench_auth --sortie avant.json
+# ==========================================================
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,165 @@
+# ==========================================================
+# Importations nécessaires
+# ==========================================================
+
+# 'os' / 'shutil' / 'socket' / 'subprocess' / 'tempfile' : création, lancement et suppression
+# d'une instance PostgreSQL temporaire
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+
+# 'psycopg2' : création de la base de test sur l'instance temporaire
+import psycopg2
+
+# Paramètres du .env (vérification d'une base de test existante)
+from config import Config
+
+
+# ==========================================================
+# Fonction : _trouver_binaire
+# ----------------------------------------------------------
+# Cherche initdb / pg_ctl dans le PATH, puis dans le dossier
+# indiqué par 'pg_config --bindir'.
+# ==========================================================
+def _trouver_binaire(nom):
+    chemin = shutil.which(nom)
+    if chemin:
+        return chemin
+
+    pg_config = shutil.which("pg_config")
+    if pg_config:
+        bindir = subprocess.run([pg_config, "--bindir"], capture_output=True, text=True).stdout.strip()
+        candidat = os.path.join(bindir, nom)
+        if os.path.exists(candidat):
+            return candidat
+
+    raise RuntimeError(f"Binaire PostgreSQL introuvable : {nom} (installez PostgreSQL ou ajoutez-le au PATH)")
+
+
+def _port_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+# ==========================================================
+# Classe : PostgresJetable
+# ----------------------------------------------------------
+# Instance PostgreSQL locale et temporaire pour les benchmarks :
+# données dans un dossier temporaire, port aléatoire, fsync
+# désactivé, tout est supprimé à la sortie du bloc 'with'.
+#
+# Avec 'primaire', l'instance est un réplica en streaming de
+# cette autre instance jetable (pg_basebackup -R).
+#
+# Exemple :
+#   with PostgresJetable() as pg:
+#       print(pg.parametres)   # host, port, database, user, password
+#
+#   with PostgresJetable() as pg, PostgresJetable(primaire=pg) as replica:
+#       ...                    # PG_REPLICA_HOSTS=127.0.0.1:<replica.port>
+# ==========================================================
+class PostgresJetable:
+
+    def __init__(self, base="ebpay_bench", utilisateur="postgres", primaire=None):
+        self.primaire = primaire
+        self.base = primaire.base if primaire is not None else base
+        self.utilisateur = primaire.utilisateur if primaire is not None else utilisateur
+        self.port = _port_libre()
+        self.dossier = None
+
+    @property
+    def parametres(self):
+        return {
+            "host": "127.0.0.1",
+            "port": self.port,
+            "database": self.base,
+            "user": self.utilisateur,
+            "password": "",
+        }
+
+    def __enter__(self):
+        self.dossier = tempfile.mkdtemp(prefix="ebpay_pg_")
+        donnees = os.path.join(self.dossier, "data")
+
+        if self.primaire is not None:
+            # Copie de l'instance primaire ; -R écrit la configuration de réplication
+            subprocess.run(
+                [_trouver_binaire("pg_basebackup"), "-D", donnees, "-h", "127.0.0.1",
+                 "-p", str(self.primaire.port), "-U", self.utilisateur, "-R", "-X", "stream", "--no-sync"],
+                check=True, capture_output=True
+            )
+        else:
+            subprocess.run(
+                [_trouver_binaire("initdb"), "-D", donnees, "-U", self.utilisateur, "-A", "trust", "--no-sync"],
+                check=True, capture_output=True
+            )
+        options = f"-p {self.port} -k {self.dossier} -c listen_addresses=127.0.0.1 -c fsync=off -c max_connections=200"
+        subprocess.run(
+            [_trouver_binaire("pg_ctl"), "-D", donnees, "-o", options,
+             "-l", os.path.join(self.dossier, "postgres.log"), "-w", "start"],
+            check=True, capture_output=True
+        )
+
+        # Un réplica reçoit la base du primaire (lecture seule)
+        if self.primaire is not None:
+            return self
+
+        conn = psycopg2.connect(host="127.0.0.1", port=self.port, user=self.utilisateur, dbname="postgres")
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute(f"CREATE DATABASE {self.base}")
+        conn.close()
+        return self
+
+    def __exit__(self, *exc):
+        if self.dossier is None:
+            return
+        try:
+            subprocess.run(
+                [_trouver_binaire("pg_ctl"), "-D", os.path.join(self.dossier, "data"), "-m", "immediate", "stop"],
+                capture_output=True
+            )
+        finally:
+            shutil.rmtree(self.dossier, ignore_errors=True)
+            self.dossier = None
+
+
+# ==========================================================
+# Fonction : verifier_base_de_test
+# ----------------------------------------------------------
+# Garde-fou des scripts qui remplissent une base existante au
+# lieu d'une instance jetable : la base doit être une base de
+# test vide (créée pour l'occasion avec createdb), jamais la
+# base de l'application.
+# ==========================================================
+def verifier_base_de_test(nom):
+    """
+    Vérifie qu'une base du serveur du .env peut être migrée et remplie.
+
+    Args:
+        nom (str): base de test (différente de PG_DBNAME)
+
+    Raises:
+        RuntimeError: base de l'application, ou table utilisateur non vide
+    """
+    if nom == Config.PG_DBNAME:
+        raise RuntimeError(f"Refusé : '{nom}' est la base de l'application (PG_DBNAME).")
+
+    conn = psycopg2.connect(
+        host=Config.PG_HOST, port=Config.PG_PORT, database=nom,
+        user=Config.PG_USER, password=Config.PG_PASSWORD, sslmode=Config.PG_SSLMODE
+    )
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT to_regclass('public.utilisateur') IS NOT NULL")
+            if cur.fetchone()[0]:
+                cur.execute("SELECT EXISTS (SELECT 1 FROM public.utilisateur)")
+                if cur.fetchone()[0]:
+                    raise RuntimeError(
+                        f"Refusé : la base '{nom}' contient déjà des utilisateurs "
+                        "(une base de test vide est requise).")
+    finally:
+        conn.close()
@@ -0,0 +1,337 @@
+# ==========================================================
+# Importations nécessaires
+# ==========================================================
+
+# Bibliothèque standard : options, sortie JSON, montants, scénarios asyncio
+import argparse
+import asyncio
+import json
+import re
+import sys
+import uuid
+from decimal import Decimal
+
+# Pilote PostgreSQL (connexion dédiée aux EXPLAIN)
+import psycopg2
+
+# Paramètres de l'application (surchargés pour pointer vers la base de vérification)
+from config import Config
+
+# Pool (capture des requêtes exécutées), métriques (curseurs instrumentés) et migrations
+from database.pool import init_pool, close_pool, get_conn_cursor, observer_requetes, retirer_observateur
+from database import async_pool
+from database.metrics import activer_metriques, normaliser_sql
+from database.migrateur import Migrateur
+
+# Modèles dont les requêtes sont vérifiées (chemins exécutés à chaque requête utilisateur)
+import models.utilisateur_model as utilisateur_model
+from models.utilisateur_model import UtilisateurModel, hash_password
+from models.utilisateur_model_async import UtilisateurModelAsync
+from models.session_model import get_session_manager
+from models.historique_model import HistoriqueModel
+from models.transfert_model import TransferService
+from models.qrcode_model import get_qr_manager
+from models.notification_model import get_notification_dispatcher, fermer_notification_dispatcher, brancher_transferts
+from models.hash_executor import fermer_hash_executor
+
+# Instance PostgreSQL temporaire
+from benchmarks.postgres_jetable import PostgresJetable
+
+
+MOT_DE_PASSE = "motdepasse-plans"
+
+# Tables sur lesquelles un parcours séquentiel est une régression
+TABLES_CHAUDES = {"utilisateur", "portefeuille", "transaction", "notification"}
+
+# Requêtes expliquées (les autres : SET, SHOW, PREPARE… ne sont pas planifiées)
+PREFIXES_EXPLICABLES = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "EXECUTE")
+
+# Paramètres positionnels des requêtes asyncpg ($1, $2…)
+_RE_PARAM_POSITIONNEL = re.compile(r"\$(\d+)")
+
+
+# ==========================================================
+# Données de test
+# ----------------------------------------------------------
+# Volumes suffisants pour que le planificateur préfère les
+# index quand ils existent (statistiques à jour via ANALYZE).
+# ==========================================================
+def remplir_base(utilisateurs, transactions, mot_hash):
+    with get_conn_cursor() as (conn, cur):
+        cur.execute("SELECT count(*) FROM public.utilisateur")
+        if cur.fetchone()[0] >= utilisateurs:
+            return
+
+        cur.execute(
+            """
+            INSERT INTO public.utilisateur (nom, prenom, email, mot_de_passe, numero_telephone,
+                                            adresse, kyc_status, role, niveau_verification)
+            SELECT 'Nom' || i, 'Prenom' || i, 'plan' || i || '@ebpay.test', %(hash)s,
+                   '7' || lpad(i::text, 8, '0'), 'Yaounde', 'VALIDE',
+                   CASE WHEN i %% 50 = 0 THEN 'MARCHAND' ELSE 'CLIENT' END, 1
+            FROM generate_series(1, %(n)s) AS i
+            """,
+            {"hash": mot_hash, "n": utilisateurs}
+        )
+        cur.execute(
+            """
+            INSERT INTO public.portefeuille (utilisateur_id, solde, devise, fournisseur, statut)
+            SELECT id, (1000 + random() * 100000)::numeric(12,2), 'XAF', 'INTERNE', 'ACTIF'
+            FROM public.utilisateur
+            """
+        )
+        cur.execute(
+            """
+            WITH u AS (SELECT array_agg(id) AS ids FROM public.utilisateur)
+            INSERT INTO public.transaction (montant, devise, type, date, statut, methode_paiement,
+                                            expediteur_id, destinataire_id, fournisseur, moyen_paiement)
+            SELECT (1 + random() * 5000)::numeric(12,2), 'XAF', 'ENVOI',
+                   now() - random() * interval '90 days', 'SUCCES', 'NUMERO_TELEPHONE',
+                   u.ids[1 + floor(random() * cardinality(u.ids))::int],
+                   u.ids[1 + floor(random() * cardinality(u.ids))::int],
+                   'INTERNE', 'PORTEFEUILLE_INTERNE'
+            FROM u, generate_series(1, %(n)s)
+            """,
+            {"n": transactions}
+        )
+        cur.execute(
+            """
+            INSERT INTO public.notification (utilisateur_id, titre, contenu, date_envoi, type, vu)
+            SELECT id, 'Titre', 'Contenu', now() - random() * interval '30 days', 'SYSTEME', random() < 0.8
+            FROM public.utilisateur, generate_series(1, 5)
+            """
+        )
+        conn.commit()
+
+        conn.autocommit = True
+        cur.execute("ANALYZE")
+        conn.autocommit = False
+
+
+# ==========================================================
+# Scénarios : chemins "chauds" exécutés avec le vrai code des
+# modèles. Chaque requête envoyée est capturée (texte exact,
+# paramètres inclus) : pool synchrone (execute, executemany,
+# curseurs nommés, écritures groupées des unités de travail) et
+# pool asyncpg.
+#
+# Les chargements du démarrage (index_existence, alertes de
+# solde) parcourent volontairement toute une table : ils ne font
+# pas partie des chemins vérifiés.
+# ==========================================================
+async def _scenarios_async(email):
+    try:
+        user = await UtilisateurModelAsync.verifier_connexion(email, MOT_DE_PASSE)
+        await UtilisateurModelAsync.trouver_par_email(email)
+        suffixe = uuid.uuid4().hex[:10]
+        await UtilisateurModelAsync.creer_utilisateur("Plan", "Async", f"plan.{suffixe}@ebpay.test", MOT_DE_PASSE,
+                                                      f"9{int(suffixe, 16) % 10**11:011d}", None, "Douala", "CLIENT")
+        # Hash inchangé : mise à jour sans effet, mais requête réelle
+        await UtilisateurModelAsync.mettre_a_jour_hash(user.id, user.mot_de_passe, user.mot_de_passe)
+    finally:
+        await async_pool.close_async_pool()
+
+
+def executer_scenarios():
+    captures = []
+    observer_requetes(captures.append)
+
+    # Requêtes asyncpg : (texte avec $1…, paramètres), mises en forme par expliquer()
+    def observer_async(requete, args):
+        captures.append((requete, args))
+    async_pool.observer_requetes(observer_async)
+
+    # Notifications des transferts écrites dans l'unité de travail du transfert
+    brancher_transferts()
+    try:
+        with get_conn_cursor() as (conn, cur):
+            cur.execute("SELECT id::text, email, numero_telephone FROM public.utilisateur ORDER BY email LIMIT 2")
+            (uid, email, numero), (autre_id, _, _) = cur.fetchall()
+        captures.clear()
+
+        # Connexion, doublons, inscription
+        user = UtilisateurModel.verifier_connexion(email, MOT_DE_PASSE)
+        UtilisateurModel.trouver_par_email(email)
+        UtilisateurModel.email_existe("inconnu@ebpay.test")
+        UtilisateurModel.telephone_existe(numero)
+        suffixe = uuid.uuid4().hex[:10]   # relançable sur une base existante
+        UtilisateurModel.creer_utilisateur("Plan", "Test", f"plan.{suffixe}@ebpay.test", MOT_DE_PASSE,
+                                           f"8{int(suffixe, 16) % 10**11:011d}", None, "Douala", "CLIENT")
+
+        # Session : profil relu en base après invalidation du cache
+        sessions = get_session_manager()
+        jeton = sessions.creer_session(user)
+        sessions.invalider_utilisateur(uid)
+        sessions.valider(jeton)
+
+        # Historique (deux pages)
+        _, suivant = HistoriqueModel.page(uid, 20)
+        if suivant:
+            HistoriqueModel.page(uid, 20, suivant)
+
+        # Transferts et paiement QR
+        TransferService.transferer(uid, autre_id, Decimal("10"))
+        qr = get_qr_manager()
+        qr.payer(qr.generer_dynamique(autre_id, Decimal("5")), uid)
+
+        # Notifications (le lot est écrit à la fermeture du répartiteur)
+        notifications = get_notification_dispatcher()
+        notifications.nombre_non_lues(uid)
+        notifications.envoyer(uid, "Plan", "Vérification des plans", "SYSTEME")
+        notifications.marquer_vues(uid)
+        fermer_notification_dispatcher()
+
+        # Export d'historique (curseur nommé)
+        for _ in HistoriqueModel.exporter(uid):
+            pass
+
+        # Chemins asyncio (pool asyncpg)
+        asyncio.run(_scenarios_async(email))
+    finally:
+        retirer_observateur(captures.append)
+        async_pool.retirer_observateur(observer_async)
+    return captures
+
+
+# ==========================================================
+# Analyse des plans
+# ==========================================================
+def _parcours_sequentiels(noeud):
+    """Tables parcourues séquentiellement dans un plan (format JSON d'EXPLAIN)."""
+    tables = []
+    if noeud.get("Node Type") == "Seq Scan" and noeud.get("Relation Name") in TABLES_CHAUDES:
+        tables.append(noeud["Relation Name"])
+    for enfant in noeud.get("Plans", []):
+        tables += _parcours_sequentiels(enfant)
+    return tables
+
+
+def _formater_async(cur, requete, args):
+    """Texte d'une requête asyncpg ($1, $2…) avec ses paramètres en littéraux SQL."""
+    sql = _RE_PARAM_POSITIONNEL.sub(r"%(\1)s", requete.replace("%", "%%"))
+    # Les UUID ne sont pas adaptés par défaut par psycopg2
+    valeurs = {str(i): str(v) if isinstance(v, uuid.UUID) else v for i, v in enumerate(args, 1)}
+    return cur.mogrify(sql, valeurs)
+
+
+def expliquer(captures, parametres):
+    """
+    EXPLAIN de chaque requête distincte capturée (sur une connexion
+    dédiée : les PREPARE capturés y sont rejoués pour les EXECUTE).
+
+    Returns:
+        list[dict]: une entrée par requête (requete, parcours_sequentiels, erreur)
+    """
+    conn = psycopg2.connect(**parametres)
+    conn.autocommit = True   # EXPLAIN sans ANALYZE : rien n'est exécuté
+    vues, resultats = set(), []
+    try:
+        with conn.cursor() as cur:
+            for requete in captures:
+                if isinstance(requete, tuple):
+                    requete = _formater_async(cur, *requete)
+                texte = requete.decode() if isinstance(requete, bytes) else requete
+                cle = normaliser_sql(texte)
+                if cle in vues:
+                    continue
+                vues.add(cle)
+
+                debut = texte.lstrip().upper()
+                if debut.startswith("PREPARE"):
+                    cur.execute(texte)
+                    continue
+                if not debut.startswith(PREFIXES_EXPLICABLES):
+                    continue
+
+                entree = {"requete": cle, "parcours_sequentiels": [], "erreur": None}
+                try:
+                    cur.execute(f"EXPLAIN (FORMAT JSON) {texte}")
+                    plan = cur.fetchone()[0][0]["Plan"]
+                    entree["parcours_sequentiels"] = sorted(set(_parcours_sequentiels(plan)))
+                except psycopg2.Error as e:
+                    entree["erreur"] = str(e).strip()
+                resultats.append(entree)
+    finally:
+        conn.close()
+    return resultats
+
+
+# ==========================================================
+# Exécution
+# ==========================================================
+def _preparer_base(jetable):
+    """Pointe Config vers l'instance jetable et applique les migrations."""
+    p = jetable.parametres
+    Config.PG_HOST, Config.PG_PORT, Config.PG_DBNAME = p["host"], p["port"], p["database"]
+    Config.PG_USER, Config.PG_PASSWORD, Config.PG_SSLMODE = p["user"], p["password"], "disable"
+
+    migrateur = Migrateur()
+    try:
+        migrateur.appliquer()
+    finally:
+        migrateur.fermer()
+    init_pool()
+
+
+def verifier(args, jetable):
+    _preparer_base(jetable)
+    # Curseurs instrumentés : nécessaires à la capture des requêtes
+    activer_metriques()
+    # Hachage rapide : seuls les plans des requêtes sont mesurés ici
+    utilisateur_model.ITERATIONS = 1000
+    remplir_base(args.utilisateurs, args.transactions, hash_password(MOT_DE_PASSE))
+
+    parametres = {
+        "host": Config.PG_HOST, "port": Config.PG_PORT, "dbname": Config.PG_DBNAME,
+        "user": Config.PG_USER, "password": Config.PG_PASSWORD, "sslmode": Config.PG_SSLMODE,
+    }
+    return expliquer(executer_scenarios(), parametres)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Vérifie qu'aucune requête des chemins chauds ne parcourt séquentiellement une table.")
+    parser.add_argument("--utilisateurs", type=int, default=20000)
+    parser.add_argument("--transactions", type=int, default=200000)
+    parser.add_argument("--sortie", help="fichier JSON du rapport")
+    args = parser.parse_args()
+
+    try:
+        # Toujours une instance jetable : le script migre et remplit la base
+        with PostgresJetable(base="ebpay_plans") as jetable:
+            try:
+                resultats = verifier(args, jetable)
+            finally:
+                close_pool()
+    finally:
+        fermer_notification_dispatcher()
+        fermer_hash_executor()
+        close_pool()
+
+    regressions = [r for r in resultats if r["parcours_sequentiels"] or r["erreur"]]
+    for r in resultats:
+        if r["erreur"]:
+            statut = "ERREUR"
+        elif r["parcours_sequentiels"]:
+            statut = f"SEQ SCAN ({', '.join(r['parcours_sequentiels'])})"
+        else:
+            statut = "ok"
+        print(f" {statut:<30} {r['requete'][:110]}")
+
+    if args.sortie:
+        with open(args.sortie, "w", encoding="utf-8") as f:
+            json.dump(resultats, f, indent=2, ensure_ascii=False)
+
+    print(f" {len(resultats)} requêtes vérifiées, {len(regressions)} en échec.", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+# ==========================================================
+# Point d’entrée du script
+# ----------------------------------------------------------
+# À lancer depuis le dossier english/ (code de sortie 1 si une
+# requête chaude planifie un parcours séquentiel) :
+#   python -m benchmarks.verifier_plans
+# ==========================================================
+if __name__ == "__main__":
+    raise SystemExit(main())
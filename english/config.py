@@ -60,3 +60,217 @@ class Config:
     # Taille maximale du pool de connexions
     # (nombre maximum de connexions simultanées autorisées)
     PG_POOL_MAX = int(os.getenv("PG_POOL_MAX", 5))
+
+    # ------------------------------------------------------
+    # Pool de hachage des mots de passe (PBKDF2)
+    # ------------------------------------------------------
+
+    # Type de pool utilisé : "thread" (hashlib relâche le GIL) ou "process"
+    HASH_EXECUTOR = os.getenv("HASH_EXECUTOR", "thread")
+
+    # Nombre de workers de hachage (par défaut : nombre de cœurs)
+    HASH_WORKERS = int(os.getenv("HASH_WORKERS", os.cpu_count() or 2))
+
+    # Nombre maximal de hachages en attente au-delà des workers occupés
+    HASH_QUEUE_MAX = int(os.getenv("HASH_QUEUE_MAX", 64))
+
+    # Temps maximal (secondes) d'attente d'une place dans la file
+    HASH_QUEUE_TIMEOUT = float(os.getenv("HASH_QUEUE_TIMEOUT", 2))
+
+    # Temps maximal (secondes) d'attente du résultat d'un hachage
+    HASH_TIMEOUT = float(os.getenv("HASH_TIMEOUT", 5))
+
+    # ------------------------------------------------------
+    # Pool asynchrone (asyncio / asyncpg)
+    # ------------------------------------------------------
+
+    # Taille minimale du pool asynchrone
+    PG_ASYNC_POOL_MIN = int(os.getenv("PG_ASYNC_POOL_MIN", PG_POOL_MIN))
+
+    # Taille maximale du pool asynchrone (une connexion sert de nombreuses coroutines)
+    PG_ASYNC_POOL_MAX = int(os.getenv("PG_ASYNC_POOL_MAX", PG_POOL_MAX))
+
+    # ------------------------------------------------------
+    # Comportement du pool de connexions
+    # ------------------------------------------------------
+
+    # Temps maximal (secondes) d'attente d'une connexion libre avant erreur
+    PG_POOL_TIMEOUT = float(os.getenv("PG_POOL_TIMEOUT", 10))
+
+    # Durée de vie maximale (secondes) d'une connexion avant recyclage
+    PG_POOL_MAX_LIFETIME = float(os.getenv("PG_POOL_MAX_LIFETIME", 3600))
+
+    # Durée (secondes) au-delà de laquelle une connexion inutilisée est fermée
+    # (sans descendre sous PG_POOL_MIN)
+    PG_POOL_MAX_IDLE = float(os.getenv("PG_POOL_MAX_IDLE", 600))
+
+    # Durée d'inactivité (secondes) après laquelle une connexion est vérifiée
+    # (SELECT 1) avant d'être redonnée
+    PG_POOL_CHECK_IDLE = float(os.getenv("PG_POOL_CHECK_IDLE", 30))
+
+    # ------------------------------------------------------
+    # Métriques du chemin base de données
+    # ------------------------------------------------------
+
+    # Active la collecte des métriques (attente/détention des connexions, latence des requêtes)
+    PG_METRICS = os.getenv("PG_METRICS", "0").lower() in ("1", "true", "yes", "oui")
+
+    # Seuil (millisecondes) au-delà duquel une requête est consignée comme lente
+    PG_SLOW_QUERY_MS = float(os.getenv("PG_SLOW_QUERY_MS", 200))
+
+    # ------------------------------------------------------
+    # Sessions
+    # ------------------------------------------------------
+
+    # Secret de signature des jetons de session (à définir en production)
+    SESSION_SECRET = os.getenv("SESSION_SECRET")
+
+    # Durée de vie (secondes) d'un jeton de session
+    SESSION_TTL = int(os.getenv("SESSION_TTL", 3600))
+
+    # Nombre maximal de jetons / profils conservés en cache mémoire
+    SESSION_CACHE_MAX = int(os.getenv("SESSION_CACHE_MAX", 10000))
+
+    # Durée (secondes) pendant laquelle un profil en cache est considéré à jour
+    SESSION_CACHE_TTL = int(os.getenv("SESSION_CACHE_TTL", 60))
+
+    # ------------------------------------------------------
+    # Limitation des tentatives de connexion
+    # ------------------------------------------------------
+
+    # Tentatives autorisées d'affilée pour un même email, puis rythme de recharge (par minute)
+    LOGIN_EMAIL_RAFALE = int(os.getenv("LOGIN_EMAIL_RAFALE", 5))
+    LOGIN_EMAIL_PAR_MINUTE = float(os.getenv("LOGIN_EMAIL_PAR_MINUTE", 5))
+
+    # Tentatives autorisées d'affilée pour un même client (adresse IP), puis rythme par minute
+    LOGIN_CLIENT_RAFALE = int(os.getenv("LOGIN_CLIENT_RAFALE", 20))
+    LOGIN_CLIENT_PAR_MINUTE = float(os.getenv("LOGIN_CLIENT_PAR_MINUTE", 60))
+
+    # Échecs tolérés avant blocage, puis blocage doublé à chaque échec (secondes, plafonné)
+    LOGIN_ECHECS_LIBRES = int(os.getenv("LOGIN_ECHECS_LIBRES", 3))
+    LOGIN_BLOCAGE_BASE = float(os.getenv("LOGIN_BLOCAGE_BASE", 1))
+    LOGIN_BLOCAGE_MAX = float(os.getenv("LOGIN_BLOCAGE_MAX", 300))
+
+    # Durée (secondes) sans échec après laquelle le compteur d'échecs est oublié
+    LOGIN_ECHECS_OUBLI = float(os.getenv("LOGIN_ECHECS_OUBLI", 900))
+
+    # Nombre maximal d'emails / de clients suivis en mémoire (les moins récents sont évincés)
+    LOGIN_SUIVI_MAX = int(os.getenv("LOGIN_SUIVI_MAX", 100000))
+
+    # Nombre maximal de vérifications de mot de passe simultanées (par défaut : 2 × HASH_WORKERS)
+    LOGIN_VERIFICATIONS_MAX = int(os.getenv("LOGIN_VERIFICATIONS_MAX", 2 * HASH_WORKERS))
+
+    # ------------------------------------------------------
+    # Index mémoire des emails / numéros déjà utilisés
+    # ------------------------------------------------------
+
+    # Construit l'index au démarrage (évite une requête SQL par vérification de doublon)
+    INDEX_EXISTENCE = os.getenv("INDEX_EXISTENCE", "1").lower() in ("1", "true", "yes", "oui")
+
+    # Nombre d'utilisateurs prévu (dimensionne le filtre de Bloom)
+    INDEX_EXISTENCE_CAPACITE = int(os.getenv("INDEX_EXISTENCE_CAPACITE", 1_000_000))
+
+    # Taux de faux positifs accepté (un faux positif coûte une requête SQL)
+    INDEX_EXISTENCE_TAUX_FP = float(os.getenv("INDEX_EXISTENCE_TAUX_FP", 0.01))
+
+    # ------------------------------------------------------
+    # Serveur HTTP/JSON (server.py)
+    # ------------------------------------------------------
+
+    # Adresse et port d'écoute
+    SERVER_HOST = os.getenv("SERVER_HOST", "127.0.0.1")
+    SERVER_PORT = int(os.getenv("SERVER_PORT", 8080))
+
+    # Nombre de requêtes traitées en parallèle
+    SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", 16))
+
+    # Délai maximal (secondes) de lecture/écriture d'une requête
+    SERVER_REQUEST_TIMEOUT = float(os.getenv("SERVER_REQUEST_TIMEOUT", 10))
+
+    # Nombre maximal de connexions en attente d'un worker (au-delà : 503 immédiat)
+    SERVER_QUEUE_MAX = int(os.getenv("SERVER_QUEUE_MAX", 64))
+
+    # Attente maximale (secondes) d'une connexion dans la file avant d'être refusée (503)
+    SERVER_QUEUE_TIMEOUT = float(os.getenv("SERVER_QUEUE_TIMEOUT", 5))
+
+    # ------------------------------------------------------
+    # Transferts entre portefeuilles
+    # ------------------------------------------------------
+
+    # Devise utilisée quand un transfert n'en précise pas
+    TRANSFERT_DEVISE = os.getenv("TRANSFERT_DEVISE", "XAF")
+
+    # Nombre maximal de transferts appliqués par commit (file des transferts groupés)
+    TRANSFERT_LOT_MAX = int(os.getenv("TRANSFERT_LOT_MAX", 500))
+
+    # Attente maximale (millisecondes) pour compléter un lot avant de l'appliquer
+    TRANSFERT_LOT_DELAI_MS = float(os.getenv("TRANSFERT_LOT_DELAI_MS", 5))
+
+    # ------------------------------------------------------
+    # Codes QR de paiement
+    # ------------------------------------------------------
+
+    # Secret de signature des codes QR (obligatoire pour des codes statiques durables)
+    QR_SECRET = os.getenv("QR_SECRET")
+
+    # Validité par défaut (secondes) d'un code dynamique
+    QR_DUREE = int(os.getenv("QR_DUREE", 300))
+
+    # Validité maximale (secondes) d'un code dynamique : borne la taille de l'index anti-rejeu
+    QR_DUREE_MAX = int(os.getenv("QR_DUREE_MAX", 3600))
+
+    # Nombre maximal de codes dynamiques utilisés mémorisés (anti-rejeu)
+    QR_INDEX_MAX = int(os.getenv("QR_INDEX_MAX", 200000))
+
+    # Nombre de codes statiques de marchands gardés en cache
+    QR_CACHE_STATIQUE = int(os.getenv("QR_CACHE_STATIQUE", 10000))
+
+    # ------------------------------------------------------
+    # Notifications
+    # ------------------------------------------------------
+
+    # Nombre maximal de notifications écrites par requête INSERT
+    NOTIF_LOT_MAX = int(os.getenv("NOTIF_LOT_MAX", 500))
+
+    # Attente maximale (millisecondes) avant l'écriture d'un lot incomplet
+    NOTIF_LOT_DELAI_MS = float(os.getenv("NOTIF_LOT_DELAI_MS", 50))
+
+    # Taille maximale de la file (au-delà, les notifications sont ignorées plutôt que de ralentir l'appelant)
+    NOTIF_FILE_MAX = int(os.getenv("NOTIF_FILE_MAX", 100000))
+
+    # Nombre de compteurs de non lues gardés en mémoire et durée (secondes) avant resynchronisation
+    NOTIF_COMPTEURS_MAX = int(os.getenv("NOTIF_COMPTEURS_MAX", 100000))
+    NOTIF_COMPTEURS_TTL = int(os.getenv("NOTIF_COMPTEURS_TTL", 300))
+
+    # ------------------------------------------------------
+    # Alertes de solde faible
+    # ------------------------------------------------------
+
+    # Seuils par devise ("XAF:5000,EUR:10") ; les autres devises utilisent ALERTE_SEUIL_DEFAUT
+    ALERTE_SEUILS = os.getenv("ALERTE_SEUILS", "XAF:5000")
+    ALERTE_SEUIL_DEFAUT = os.getenv("ALERTE_SEUIL_DEFAUT", "5000")
+
+    # Écoute LISTEN/NOTIFY (nécessite database/sql/alerte_solde.sql) à la place du suivi des transferts
+    ALERTE_LISTEN = os.getenv("ALERTE_LISTEN", "0").lower() in ("1", "true", "yes", "oui")
+
+    # ------------------------------------------------------
+    # Réplicas PostgreSQL en lecture
+    # ------------------------------------------------------
+
+    # Réplicas en lecture ("hote:port,hote2:port2"), vide = toutes les requêtes sur PG_HOST
+    PG_REPLICA_HOSTS = os.getenv("PG_REPLICA_HOSTS", "")
+
+    # Taille maximale du pool de chaque réplica
+    PG_REPLICA_POOL_MAX = int(os.getenv("PG_REPLICA_POOL_MAX", PG_POOL_MAX))
+
+    # Retard de réplication maximal (secondes) au-delà duquel un réplica n'est plus utilisé
+    PG_REPLICA_MAX_LAG = float(os.getenv("PG_REPLICA_MAX_LAG", 5))
+
+    # Intervalle (secondes) entre deux vérifications des réplicas (disponibilité et retard)
+    PG_REPLICA_CHECK = float(os.getenv("PG_REPLICA_CHECK", 2))
+
+    # Attente maximale (secondes) d'une connexion de réplica avant de lire sur le primaire
+    PG_REPLICA_POOL_TIMEOUT = float(os.getenv("PG_REPLICA_POOL_TIMEOUT", 0.05))
+
+    # Durée (secondes) pendant laquelle les lectures d'une donnée écrite restent sur le primaire
+    PG_RYW_DELAI = float(os.getenv("PG_RYW_DELAI", PG_REPLICA_MAX_LAG))
@@ -1,23 +1,196 @@
 # On importe la classe 'UtilisateurModel' qui permet d’interagir avec la base de données (ajout, recherche, vérification…)
-from models.utilisateur_model import UtilisateurModel
+from models.utilisateur_model import UtilisateurModel, UtilisateurExisteDeja, valider_email, champ_trop_long
 
-# On importe le module 're' pour utiliser les expressions régulières (utile pour valider l’adresse email)
-import re
+# On importe le gestionnaire de sessions qui émet un jeton signé après une connexion réussie
+from models.session_model import get_session_manager
+
+# On importe le limiteur qui refuse les tentatives abusives avant tout calcul de hash
+from models.limiteur_connexion import get_limiteur_connexion, ConnexionLimitee
 
 # On importe 'getpass' (non utilisé ici, mais utile si tu veux masquer le mot de passe pendant la saisie)
 from getpass import getpass
 
+# On importe 'datetime' pour vérifier le format de la date de naissance
+from datetime import datetime
+
+
+# ------------------------------
+# Fonctions de validation (sans entrée/sortie)
+# Partagées par le menu console et le serveur HTTP.
+# Chaque fonction "verifier_*" retourne None si tout va bien,
+# sinon le message d'erreur à afficher.
+# ------------------------------
+def normaliser_email(email):
+    """Supprime les espaces et met l'email en minuscules."""
+    return (email or "").strip().lower()
+
+
+def normaliser_role(role):
+    """Rôle en majuscules, CLIENT par défaut."""
+    return (role or "").strip().upper() or "CLIENT"
+
+
+def verifier_email(email):
+    if not valider_email(email):
+        return "Email invalide."
+    return None
+
+
+def verifier_mots_de_passe(mot_de_passe, confirmation):
+    if not mot_de_passe:
+        return "Mot de passe obligatoire."
+    if mot_de_passe != confirmation:
+        return "Les mots de passe ne correspondent pas."
+    return None
+
+
+def verifier_date_naissance(date_naissance):
+    if not date_naissance:
+        return None
+    try:
+        datetime.strptime(date_naissance, "%Y-%m-%d")
+    except ValueError:
+        return "Date de naissance invalide (YYYY-MM-DD)."
+    return None
+
+
+def message_doublon(champ):
+    """Message affiché lorsqu'un email ou un numéro de téléphone est déjà utilisé."""
+    if champ == "numero_telephone":
+        return "Ce numéro de téléphone existe déjà."
+    return "Cet email existe déjà."
+
+
+# Champs d'inscription attendus sous forme de texte
+CHAMPS_INSCRIPTION = ("nom", "prenom", "email", "mot_de_passe", "confirmation",
+                      "numero_telephone", "date_naissance", "adresse", "role")
+
+# Rôles qu'un utilisateur peut choisir lui-même (inscription publique)
+ROLES_INSCRIPTION_PUBLIQUE = {"CLIENT", "MARCHAND"}
+
+
+def verifier_types(donnees):
+    """Les champs fournis doivent être du texte (un JSON peut contenir des nombres, des listes…)."""
+    for champ in CHAMPS_INSCRIPTION:
+        valeur = donnees.get(champ)
+        if valeur is not None and not isinstance(valeur, str):
+            return f"Champ invalide : {champ}."
+    return None
+
+
+def valider_inscription(donnees, roles=None):
+    """
+    Valide et normalise les informations d'inscription.
+
+    Args:
+        donnees (dict): nom, prenom, email, mot_de_passe, confirmation,
+                        numero_telephone, date_naissance, adresse, role
+        roles (set | None): rôles acceptés (None : tous les rôles connus)
+
+    Returns:
+        tuple: (données normalisées, message d'erreur | None)
+    """
+    erreur = verifier_types(donnees)
+    if erreur:
+        return None, erreur
+
+    propres = {
+        "nom": (donnees.get("nom") or "").strip(),
+        "prenom": (donnees.get("prenom") or "").strip(),
+        "email": normaliser_email(donnees.get("email")),
+        "mot_de_passe": donnees.get("mot_de_passe") or "",
+        "numero_telephone": (donnees.get("numero_telephone") or "").strip(),
+        "date_naissance": (donnees.get("date_naissance") or "").strip() or None,
+        "adresse": (donnees.get("adresse") or "").strip(),
+        "role": normaliser_role(donnees.get("role")),
+    }
+    confirmation = donnees.get("confirmation", propres["mot_de_passe"])
+
+    erreur = (verifier_email(propres["email"])
+              or verifier_mots_de_passe(propres["mot_de_passe"], confirmation)
+              or verifier_date_naissance(propres["date_naissance"]))
+    if not erreur:
+        trop_long = champ_trop_long(propres)
+        if trop_long is not None:
+            erreur = f"Champ trop long : {trop_long}."
+    if not erreur and roles is not None and propres["role"] not in roles:
+        erreur = "Rôle non autorisé."
+    return propres, erreur
+
 
 # ------------------------------
-# Fonction utilitaire : validation d’email
+# Exception : ErreurValidation
+# Levée par 'inscrire' quand les données sont invalides.
 # ------------------------------
-def valider_email(email):
+class ErreurValidation(ValueError):
+    pass
+
+
+# ------------------------------
+# Fonctions de service : inscrire / connecter
+# Utilisées telles quelles par le serveur HTTP, et en fin de
+# parcours par le menu console.
+# ------------------------------
+def inscrire(donnees, roles=None):
+    """
+    Valide les données puis crée le compte.
+
+    Args:
+        roles (set | None): rôles acceptés (ex : ROLES_INSCRIPTION_PUBLIQUE)
+
+    Returns:
+        l'identifiant du nouvel utilisateur
+
+    Raises:
+        ErreurValidation: données invalides
+        UtilisateurExisteDeja: email ou numéro déjà utilisé
     """
-    Vérifie si l'email entré par l'utilisateur respecte un format valide.
-    Exemple : 'nom@domaine.com'
-    Retourne True si l'email est valide, sinon False.
+    propres, erreur = valider_inscription(donnees, roles)
+    if erreur:
+        raise ErreurValidation(erreur)
+
+    # Vérification rapide via l'index mémoire (la base reste l'arbitre final)
+    if UtilisateurModel.email_existe(propres["email"]):
+        raise UtilisateurExisteDeja("email")
+
+    return UtilisateurModel.creer_utilisateur(
+        propres["nom"], propres["prenom"], propres["email"], propres["mot_de_passe"],
+        propres["numero_telephone"], propres["date_naissance"], propres["adresse"], propres["role"]
+    )
+
+
+def connecter(email, mot_de_passe, client=None):
     """
-    return bool(re.match(r"[^@]+@[^@]+\.[^@]+", email))
+    Vérifie les identifiants et ouvre une session.
+
+    Args:
+        client: identifiant du client (ex : adresse IP) pour la limitation, facultatif
+
+    Returns:
+        tuple | None: (Utilisateur, jeton de session) si succès, sinon None
+
+    Raises:
+        ConnexionLimitee: trop de tentatives pour cet email ou ce client
+        HachageIndisponible: trop de vérifications en cours
+    """
+    email = normaliser_email(email)
+
+    # Les tentatives refusées s'arrêtent ici, sans requête SQL ni PBKDF2
+    limiteur = get_limiteur_connexion()
+    limiteur.autoriser(email, client)
+    user = None
+    reussi = None
+    try:
+        user = UtilisateurModel.verifier_connexion(email, mot_de_passe or "")
+        reussi = user is not None
+    finally:
+        limiteur.terminer(email, client, reussi)
+
+    if not user:
+        return None
+
+    # Les appels suivants s'authentifient avec ce jeton (sans PBKDF2 ni requête SQL)
+    return user, get_session_manager().creer_session(user)
 
 
 # ------------------------------
@@ -34,24 +207,25 @@ class AuthController:
         """
         Gère le processus d’inscription d’un nouvel utilisateur.
         - Vérifie la validité des informations
-        - Empêche les doublons d'email
-        - Enregistre un nouvel utilisateur dans la base
+        - Empêche les doublons d'email et de numéro de téléphone
+        - Enregistre un nouvel utilisateur dans la base (insertion atomique)
         """
         print("\n=== INSCRIPTION ===")
 
         # Demande les informations de base à l’utilisateur
         nom = input("Nom : ")
         prenom = input("Prénom : ")
-        email = input("Email : ").strip().lower()  # strip() supprime les espaces, lower() met en minuscule
+        email = normaliser_email(input("Email : "))  # supprime les espaces et met en minuscule
 
         # Vérifie la validité de l’adresse email
-        if not valider_email(email):
-            print(" Email invalide.")
+        erreur = verifier_email(email)
+        if erreur:
+            print(f" {erreur}")
             return
 
-        # Vérifie si l’email existe déjà dans la base de données
-        if UtilisateurModel.trouver_par_email(email):
-            print(" Cet email existe déjà.")
+        # Vérifie si l’email existe déjà (l'index mémoire évite la base pour un email inconnu)
+        if UtilisateurModel.email_existe(email):
+            print(f" {message_doublon('email')}")
             return
 
         # Demande et confirme le mot de passe
@@ -59,20 +233,38 @@ class AuthController:
         confirmation = input("Confirmer : ")
 
         # Vérifie si les deux mots de passe correspondent
-        if mot_de_passe != confirmation:
-            print(" Les mots de passe ne correspondent pas.")
+        erreur = verifier_mots_de_passe(mot_de_passe, confirmation)
+        if erreur:
+            print(f" {erreur}")
             return
 
         # Autres informations nécessaires à la création du compte
-        numero = input("Numéro de téléphone : ")
+        numero = input("Numéro de téléphone : ").strip()
+
+        # Vérifie si le numéro de téléphone est déjà utilisé
+        if UtilisateurModel.telephone_existe(numero):
+            print(f" {message_doublon('numero_telephone')}")
+            return
+
         date_naissance = input("Date de naissance (YYYY-MM-DD) : ")
         adresse = input("Adresse : ")
-        role = input("Rôle (CLIENT/MARCHAND/ADMIN) [CLIENT] : ").upper() or "CLIENT"
+        role = input("Rôle (CLIENT/MARCHAND/ADMIN) [CLIENT] : ")
 
-        # Appelle la méthode du modèle pour enregistrer l'utilisateur dans la base de données
-        UtilisateurModel.creer_utilisateur(
-            nom, prenom, email, mot_de_passe, numero, date_naissance, adresse, role
-        )
+        # Validation complète puis enregistrement (mêmes règles que le serveur HTTP)
+        # (un doublon créé entre-temps est détecté par la base elle-même)
+        try:
+            inscrire({
+                "nom": nom, "prenom": prenom, "email": email,
+                "mot_de_passe": mot_de_passe, "confirmation": confirmation,
+                "numero_telephone": numero, "date_naissance": date_naissance,
+                "adresse": adresse, "role": role,
+            })
+        except ErreurValidation as e:
+            print(f" {e}")
+            return
+        except UtilisateurExisteDeja as e:
+            print(f" {message_doublon(e.champ)}")
+            return
 
         # Confirmation de création de compte
         print(" Compte créé avec succès.")
@@ -87,20 +279,30 @@ class AuthController:
         Gère le processus de connexion d’un utilisateur existant.
         - Vérifie l'email et le mot de passe dans la base
         - Affiche un message de bienvenue si la connexion réussit
+        - Émet un jeton de session pour les opérations suivantes
+
+        Returns:
+            str | None: le jeton de session si la connexion réussit, sinon None
         """
         print("\n=== CONNEXION ===")
 
         # Demande des identifiants à l'utilisateur
-        email = input("Email : ").strip().lower()
+        email = input("Email : ")
         mot_de_passe = input("Mot de passe : ")
 
-        # Vérifie si les identifiants sont corrects via la méthode du modèle
-        user = UtilisateurModel.verifier_connexion(email, mot_de_passe)
+        # Vérifie les identifiants et ouvre une session
+        try:
+            resultat = connecter(email, mot_de_passe)
+        except ConnexionLimitee as e:
+            print(f" {e} (dans {int(e.reessayer_dans) + 1} s)")
+            return None
 
         # Si un utilisateur est retourné, la connexion réussit
-        if user:
-            print(f" Bienvenue {user['prenom']} {user['nom']} ({user['role']})")
+        if resultat:
+            user, jeton = resultat
+            print(f" Bienvenue {user.prenom} {user.nom} ({user.role})")
+            return jeton
 
         # Sinon, message d'erreur
-        else:
-            print(" Identifiants invalides.")
+        print(" Identifiants invalides.")
+        return None
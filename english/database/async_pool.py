@@ -0,0 +1,124 @@
+# ==========================================================
+# Importations nécessaires
+# ==========================================================
+
+# 'asyncpg' : pilote PostgreSQL natif asyncio (pool de connexions non bloquant)
+import asyncpg
+
+# 'asynccontextmanager' : permet de créer des blocs "async with" pour gérer les connexions
+from contextlib import asynccontextmanager
+
+# 'Config' : mêmes paramètres de connexion que le pool synchrone (fichier .env)
+from config import Config
+
+
+# ==========================================================
+# Variable globale pour stocker le pool asynchrone
+# ==========================================================
+_async_pool = None
+# Il sera créé une seule fois (dans la boucle d'événements courante) puis réutilisé
+
+
+# ==========================================================
+# Observateurs des requêtes
+# ----------------------------------------------------------
+# Équivalent de database.pool.observer_requetes pour asyncpg :
+# chaque requête réussie est transmise avec ses paramètres
+# (requete: str avec $1, $2…, args: tuple). Seules les connexions
+# ouvertes après l'enregistrement d'un observateur sont suivies
+# (sans observateur, aucun coût par requête).
+# ==========================================================
+_observateurs_requetes = []
+
+
+def observer_requetes(fonction):
+    """Appelle 'fonction(requete, args)' après chaque requête du pool asynchrone."""
+    _observateurs_requetes.append(fonction)
+
+
+def retirer_observateur(fonction):
+    if fonction in _observateurs_requetes:
+        _observateurs_requetes.remove(fonction)
+
+
+def _journaliser(enregistrement):
+    if enregistrement.exception is None:
+        for observateur in list(_observateurs_requetes):
+            observateur(enregistrement.query, enregistrement.args)
+
+
+async def _initialiser_connexion(conn):
+    if _observateurs_requetes:
+        conn.add_query_logger(_journaliser)
+
+
+# ==========================================================
+# Fonction : init_async_pool()
+# ----------------------------------------------------------
+# Initialise le pool asyncio à partir des paramètres de Config.
+# Une seule connexion du pool peut servir des milliers de
+# coroutines qui attendent le réseau, contrairement au pool
+# synchrone limité à PG_POOL_MAX threads bloqués.
+# ==========================================================
+async def init_async_pool():
+    global _async_pool
+
+    if _async_pool is None:
+        try:
+            _async_pool = await asyncpg.create_pool(
+                min_size=Config.PG_ASYNC_POOL_MIN,   # Nombre minimum de connexions ouvertes
+                max_size=Config.PG_ASYNC_POOL_MAX,   # Nombre maximum de connexions simultanées
+                host=Config.PG_HOST,
+                port=Config.PG_PORT,
+                database=Config.PG_DBNAME,
+                user=Config.PG_USER,
+                password=Config.PG_PASSWORD,
+                ssl=Config.PG_SSLMODE,               # asyncpg accepte les mêmes modes (disable, prefer, require…)
+                init=_initialiser_connexion          # Observateurs des requêtes (voir ci-dessus)
+            )
+            print("✅ Pool PostgreSQL asynchrone établi.")
+
+        except (OSError, asyncpg.PostgresError) as e:
+            raise RuntimeError(f"Échec de la connexion à PostgreSQL : {e}")
+
+    return _async_pool
+
+
+# ==========================================================
+# Fonction : close_async_pool()
+# ----------------------------------------------------------
+# Ferme proprement toutes les connexions du pool asynchrone.
+# ==========================================================
+async def close_async_pool():
+    global _async_pool
+
+    if _async_pool is not None:
+        await _async_pool.close()
+        _async_pool = None
+
+
+# ==========================================================
+# Fonction : get_async_conn()
+# ----------------------------------------------------------
+# Équivalent asynchrone de get_conn_cursor() : fournit une
+# connexion via un bloc 'async with' et la rend au pool ensuite.
+#
+# Si transaction=True, le bloc est exécuté dans une transaction :
+# commit automatique à la sortie, rollback en cas d'exception.
+#
+# Exemple d’utilisation :
+#   async with get_async_conn() as conn:
+#       row = await conn.fetchrow("SELECT * FROM utilisateur WHERE email = $1", email)
+#
+# ==========================================================
+@asynccontextmanager
+async def get_async_conn(transaction=False):
+    if _async_pool is None:
+        await init_async_pool()
+
+    async with _async_pool.acquire() as conn:
+        if transaction:
+            async with conn.transaction():
+                yield conn
+        else:
+            yield conn
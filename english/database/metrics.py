@@ -0,0 +1,243 @@
+# ==========================================================
+# Importations nécessaires
+# ==========================================================
+
+# 're' : normalisation du texte SQL (suppression des valeurs littérales)
+import re
+
+# 'threading' / 'time' : compteurs protégés par verrou et mesure des durées
+import threading
+import time
+
+# 'bisect' : recherche rapide de l'intervalle (bucket) d'un histogramme
+from bisect import bisect_left
+
+# 'deque' : journal des requêtes lentes de taille bornée
+from collections import deque
+
+# 'Config' : activation des métriques et seuil des requêtes lentes
+from config import Config
+
+
+# ==========================================================
+# Intervalles (en secondes) utilisés par tous les histogrammes
+# ==========================================================
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Nombre maximal de requêtes distinctes suivies individuellement
+MAX_REQUETES_SUIVIES = 200
+
+# Statistiques du pool exposées comme compteurs cumulés (les autres sont des jauges)
+COMPTEURS_POOL = {"acquisitions", "epuisements", "timeouts"}
+
+
+# ==========================================================
+# Fonction : normaliser_sql
+# ----------------------------------------------------------
+# Ramène une requête à sa forme générique pour regrouper les
+# mesures : espaces compactés, valeurs littérales et paramètres
+# remplacés par '?'.
+#
+# Exemple :
+#   "SELECT *  FROM utilisateur WHERE email = 'a@b.c'"
+#   → "SELECT * FROM utilisateur WHERE email = ?"
+# ==========================================================
+_RE_CHAINE = re.compile(r"'(?:[^']|'')*'")
+_RE_PARAMETRE = re.compile(r"%\(\w+\)s|%s|\$\d+")
+_RE_NOMBRE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_RE_LISTE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_RE_ESPACES = re.compile(r"\s+")
+
+
+def normaliser_sql(sql):
+    if isinstance(sql, bytes):
+        sql = sql.decode(errors="replace")
+    sql = _RE_CHAINE.sub("?", str(sql))
+    sql = _RE_PARAMETRE.sub("?", sql)
+    sql = _RE_NOMBRE.sub("?", sql)
+    sql = _RE_LISTE.sub("(?, ...)", sql)
+    return _RE_ESPACES.sub(" ", sql).strip()
+
+
+# ==========================================================
+# Classe : Histogramme
+# ----------------------------------------------------------
+# Histogramme de latences à intervalles fixes (compatible avec
+# le format Prometheus) : compte, somme et répartition par bucket.
+# ==========================================================
+class Histogramme:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.buckets = [0] * (len(BUCKETS) + 1)  # le dernier bucket correspond à +Inf
+        self.compte = 0
+        self.somme = 0.0
+
+    def observer(self, duree):
+        i = bisect_left(BUCKETS, duree)
+        with self._lock:
+            self.buckets[i] += 1
+            self.compte += 1
+            self.somme += duree
+
+    def quantile(self, q):
+        """Estimation d'un quantile (borne supérieure du bucket concerné)."""
+        with self._lock:
+            if self.compte == 0:
+                return 0.0
+            cible = q * self.compte
+            cumul = 0
+            for i, n in enumerate(self.buckets):
+                cumul += n
+                if cumul >= cible:
+                    return BUCKETS[i] if i < len(BUCKETS) else float("inf")
+        return float("inf")
+
+    def snapshot(self):
+        with self._lock:
+            compte, somme = self.compte, self.somme
+        return {
+            "compte": compte,
+            "somme": somme,
+            "moyenne": somme / compte if compte else 0.0,
+            "p50": self.quantile(0.50),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+    def prometheus(self, nom, labels=""):
+        with self._lock:
+            buckets, compte, somme = list(self.buckets), self.compte, self.somme
+        lignes = []
+        cumul = 0
+        sep = "," if labels else ""
+        for borne, n in zip(list(BUCKETS) + ["+Inf"], buckets):
+            cumul += n
+            lignes.append(f'{nom}_bucket{{{labels}{sep}le="{borne}"}} {cumul}')
+        suffixe = f"{{{labels}}}" if labels else ""
+        lignes.append(f"{nom}_sum{suffixe} {somme}")
+        lignes.append(f"{nom}_count{suffixe} {compte}")
+        return lignes
+
+
+# ==========================================================
+# Classe : Metriques
+# ----------------------------------------------------------
+# Regroupe toutes les mesures du chemin base de données :
+# - attente d'une connexion, durée de détention, latence par requête
+# - durée des hachages PBKDF2 (pour distinguer DB et CPU)
+# - compteurs d'acquisitions et d'épuisements du pool
+# - journal des requêtes lentes (SQL normalisé)
+# ==========================================================
+class Metriques:
+
+    def __init__(self, seuil_lent_ms=None, taille_journal=100):
+        self.seuil_lent = (seuil_lent_ms if seuil_lent_ms is not None else Config.PG_SLOW_QUERY_MS) / 1000.0
+        self.attente = Histogramme()
+        self.detention = Histogramme()
+        self.requetes = Histogramme()
+        self.hachage = Histogramme()
+        self._par_requete = {}
+        self._lock = threading.Lock()
+        self.acquisitions = 0
+        self.requetes_lentes = deque(maxlen=taille_journal)
+        self.source_pool = None  # fonction retournant les statistiques instantanées du pool
+
+    # ------------------------------------------------------
+    # Enregistrement des mesures
+    # ------------------------------------------------------
+    def acquisition(self, duree):
+        self.attente.observer(duree)
+        with self._lock:
+            self.acquisitions += 1
+
+    def requete(self, sql, duree):
+        self.requetes.observer(duree)
+        forme = normaliser_sql(sql)
+
+        with self._lock:
+            histo = self._par_requete.get(forme)
+            if histo is None and len(self._par_requete) < MAX_REQUETES_SUIVIES:
+                histo = self._par_requete[forme] = Histogramme()
+        if histo is not None:
+            histo.observer(duree)
+
+        if duree >= self.seuil_lent:
+            self.requetes_lentes.append({
+                "sql": forme,
+                "duree_ms": round(duree * 1000, 3),
+                "horodatage": time.time(),
+            })
+
+    # ------------------------------------------------------
+    # Méthode : snapshot
+    # ------------------------------------------------------
+    def snapshot(self):
+        """Retourne l'ensemble des mesures sous forme de dictionnaire."""
+        with self._lock:
+            par_requete = dict(self._par_requete)
+            acquisitions = self.acquisitions
+        return {
+            "pool": self.source_pool() if self.source_pool else {},
+            "acquisitions": acquisitions,
+            "attente_connexion": self.attente.snapshot(),
+            "detention_connexion": self.detention.snapshot(),
+            "requetes": self.requetes.snapshot(),
+            "hachage": self.hachage.snapshot(),
+            "par_requete": {sql: h.snapshot() for sql, h in par_requete.items()},
+            "requetes_lentes": list(self.requetes_lentes),
+        }
+
+    # ------------------------------------------------------
+    # Méthode : prometheus
+    # ------------------------------------------------------
+    def prometheus(self):
+        """Retourne les mesures au format texte Prometheus."""
+        lignes = []
+        pool = self.source_pool() if self.source_pool else {}
+        with self._lock:
+            pool["acquisitions"] = self.acquisitions
+            par_requete = dict(self._par_requete)
+
+        # Les compteurs cumulés (suffixe _total) et les jauges instantanées
+        for cle, valeur in pool.items():
+            if cle in COMPTEURS_POOL:
+                lignes.append(f"# TYPE ebpay_db_pool_{cle}_total counter")
+                lignes.append(f"ebpay_db_pool_{cle}_total {valeur}")
+            else:
+                lignes.append(f"# TYPE ebpay_db_pool_{cle} gauge")
+                lignes.append(f"ebpay_db_pool_{cle} {valeur}")
+
+        for nom, histo in (("ebpay_db_attente_connexion_seconds", self.attente),
+                           ("ebpay_db_detention_connexion_seconds", self.detention),
+                           ("ebpay_db_requete_seconds", self.requetes),
+                           ("ebpay_hachage_seconds", self.hachage)):
+            lignes.append(f"# TYPE {nom} histogram")
+            lignes.extend(histo.prometheus(nom))
+
+        lignes.append("# TYPE ebpay_db_requete_par_sql_seconds histogram")
+        for sql, histo in par_requete.items():
+            label = sql.replace("\\", "\\\\").replace('"', '\\"')
+            lignes.extend(histo.prometheus("ebpay_db_requete_par_sql_seconds", f'sql="{label}"'))
+
+        return "\n".join(lignes) + "\n"
+
+
+# ==========================================================
+# Instance globale (None tant que les métriques sont désactivées)
+# ==========================================================
+_metriques = Metriques() if Config.PG_METRICS else None
+
+
+def activer_metriques(seuil_lent_ms=None):
+    """Active la collecte des métriques (si ce n'est pas déjà fait) et la retourne."""
+    global _metriques
+
+    if _metriques is None:
+        _metriques = Metriques(seuil_lent_ms)
+    return _metriques
+
+
+def get_metriques():
+    """Retourne l'instance de métriques active, ou None si elles sont désactivées."""
+    return _metriques
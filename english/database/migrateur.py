@@ -0,0 +1,210 @@
+# ==========================================================
+# Importations nécessaires
+# ==========================================================
+import hashlib, os, re, time  # Somme de contrôle, fichiers de migration et durée d'application
+from typing import NamedTuple  # Description d'une migration
+import psycopg2  # Connexion dédiée (verrou consultatif et DDL hors transaction)
+from config import Config  # Paramètres de connexion
+
+# Dossier des migrations : NNNN_description.sql, appliquées par numéro croissant
+DOSSIER_MIGRATIONS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+# Clé du verrou consultatif : un seul migrateur à la fois sur une base
+VERROU_MIGRATIONS = 7_322_018_020
+
+# Directive (ligne de commentaire) d'une migration exécutée hors transaction
+DIRECTIVE_HORS_TRANSACTION = "-- migrer: hors-transaction"
+
+_RE_FICHIER = re.compile(r"^(\d{4})_(\w+)\.sql$")
+
+SQL_TABLE_VERSIONS = """
+    CREATE TABLE IF NOT EXISTS public.schema_migrations (
+        version character varying(4) PRIMARY KEY,
+        nom character varying(100) NOT NULL,
+        somme character(64) NOT NULL,
+        applique_le timestamp without time zone DEFAULT CURRENT_TIMESTAMP NOT NULL,
+        duree_ms integer
+    )
+"""
+
+
+class MigrationModifiee(RuntimeError):
+    """Une migration déjà appliquée a changé depuis : le schéma n'est plus reproductible."""
+
+
+# ==========================================================
+# Enregistrement : Migration
+# ==========================================================
+class Migration(NamedTuple):
+    version: str
+    nom: str
+    sql: str
+    somme: str
+    hors_transaction: bool
+
+    def instructions(self):
+        """
+        Instructions d'une migration hors transaction, une par une
+        (CREATE INDEX CONCURRENTLY refuse les requêtes multiples).
+        Ces migrations ne contiennent que des instructions simples.
+        """
+        sans_commentaires = "\n".join(
+            ligne for ligne in self.sql.splitlines() if not ligne.lstrip().startswith("--")
+        )
+        return [i.strip() for i in sans_commentaires.split(";") if i.strip()]
+
+
+def lister_migrations(dossier=DOSSIER_MIGRATIONS):
+    """Migrations du dossier, par version croissante."""
+    migrations = []
+    for fichier in sorted(os.listdir(dossier)):
+        correspondance = _RE_FICHIER.match(fichier)
+        if correspondance is None:
+            continue
+        with open(os.path.join(dossier, fichier), encoding="utf-8") as f:
+            sql = f.read()
+        migrations.append(Migration(
+            version=correspondance.group(1),
+            nom=correspondance.group(2),
+            sql=sql,
+            somme=hashlib.sha256(sql.encode()).hexdigest(),
+            hors_transaction=any(l.strip() == DIRECTIVE_HORS_TRANSACTION for l in sql.splitlines()),
+        ))
+
+    versions = [m.version for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError("Deux migrations portent le même numéro de version.")
+    return migrations
+
+
+# ==========================================================
+# Classe : Migrateur
+# ----------------------------------------------------------
+# Applique les migrations manquantes et les enregistre dans
+# public.schema_migrations (version, somme de contrôle, date).
+#
+# - verrou consultatif (pg_advisory_lock) : deux déploiements
+#   simultanés appliquent les migrations l'un après l'autre
+# - migration ordinaire : fichier entier + enregistrement de la
+#   version dans une seule transaction
+# - migration "hors-transaction" (CREATE INDEX CONCURRENTLY) :
+#   instructions une par une en autocommit, version enregistrée
+#   à la fin ; en cas d'échec, elle est rejouée en entier (d'où
+#   les IF [NOT] EXISTS) et un index resté invalide est signalé
+# - une migration déjà appliquée dont le fichier a changé bloque
+#   tout (MigrationModifiee) : on ajoute une nouvelle migration
+#   au lieu de modifier l'ancienne
+# ==========================================================
+class Migrateur:
+
+    def __init__(self, conn=None, dossier=DOSSIER_MIGRATIONS):
+        self.dossier = dossier
+        self.conn = conn or psycopg2.connect(
+            host=Config.PG_HOST, port=Config.PG_PORT, database=Config.PG_DBNAME,
+            user=Config.PG_USER, password=Config.PG_PASSWORD, sslmode=Config.PG_SSLMODE
+        )
+        self.conn.autocommit = True
+
+    def fermer(self):
+        self.conn.close()
+
+    # ------------------------------------------------------
+    # État
+    # ------------------------------------------------------
+    def appliquees(self):
+        """dict version -> somme de contrôle des migrations déjà appliquées."""
+        with self.conn.cursor() as cur:
+            cur.execute(SQL_TABLE_VERSIONS)
+            cur.execute("SELECT version, somme FROM public.schema_migrations")
+            return dict(cur.fetchall())
+
+    def etat(self):
+        """
+        Returns:
+            list[tuple]: (version, nom, statut) avec statut "appliquée", "en attente" ou "modifiée"
+        """
+        appliquees = self.appliquees()
+        etat = []
+        for m in lister_migrations(self.dossier):
+            somme = appliquees.get(m.version)
+            statut = "en attente" if somme is None else ("appliquée" if somme == m.somme else "modifiée")
+            etat.append((m.version, m.nom, statut))
+        return etat
+
+    # ------------------------------------------------------
+    # Application
+    # ------------------------------------------------------
+    def appliquer(self, jusqu_a=None):
+        """
+        Applique les migrations en attente (jusqu'à la version 'jusqu_a' incluse).
+
+        Returns:
+            list[str]: versions appliquées
+
+        Raises:
+            MigrationModifiee: fichier d'une migration appliquée modifié
+            psycopg2.Error: échec d'une migration (les suivantes ne sont pas tentées)
+        """
+        migrations = lister_migrations(self.dossier)
+        faites = []
+
+        with self.conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_lock(%s)", (VERROU_MIGRATIONS,))
+            try:
+                # Relu après le verrou : un autre migrateur a pu passer entre-temps
+                appliquees = self.appliquees()
+                for m in migrations:
+                    somme = appliquees.get(m.version)
+                    if somme is not None:
+                        if somme != m.somme:
+                            raise MigrationModifiee(
+                                f"La migration {m.version}_{m.nom} a été modifiée après son application.")
+                        continue
+                    if jusqu_a is not None and m.version > jusqu_a:
+                        break
+
+                    print(f" Migration {m.version}_{m.nom}…")
+                    debut = time.perf_counter()
+                    if m.hors_transaction:
+                        self._appliquer_hors_transaction(cur, m)
+                        self._enregistrer(cur, m, debut)
+                    else:
+                        self._appliquer_transaction(m, debut)
+                    faites.append(m.version)
+            finally:
+                cur.execute("SELECT pg_advisory_unlock(%s)", (VERROU_MIGRATIONS,))
+        return faites
+
+    def _appliquer_transaction(self, m, debut):
+        self.conn.autocommit = False
+        try:
+            with self.conn.cursor() as cur:
+                cur.execute(m.sql)
+                self._enregistrer(cur, m, debut)
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            self.conn.autocommit = True
+
+    def _appliquer_hors_transaction(self, cur, m):
+        for instruction in m.instructions():
+            cur.execute(instruction)
+
+        # Un CREATE INDEX CONCURRENTLY interrompu laisse un index invalide
+        # que IF NOT EXISTS ne recrée pas
+        cur.execute("""
+            SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = 'public' AND NOT i.indisvalid
+        """)
+        invalides = [ligne[0] for ligne in cur.fetchall()]
+        if invalides:
+            raise RuntimeError(f"Index invalides (à supprimer puis relancer) : {', '.join(invalides)}")
+
+    def _enregistrer(self, cur, m, debut):
+        cur.execute(
+            "INSERT INTO public.schema_migrations (version, nom, somme, duree_ms) VALUES (%s, %s, %s, %s)",
+            (m.version, m.nom, m.somme, int((time.perf_counter() - debut) * 1000))
+        )
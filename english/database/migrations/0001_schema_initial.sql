@@ -0,0 +1,144 @@
+-- ==========================================================
+-- 0001 : schéma initial (PostgreSQL)
+-- ----------------------------------------------------------
+-- Reprend le dump de référence (english/ebpay.sql, PostgreSQL
+-- 16) : mêmes tables, contraintes, vues et index, avec les
+-- mêmes noms. Tout est en "IF NOT EXISTS" : sur une base
+-- restaurée depuis le dump, la migration ne fait qu'enregistrer
+-- sa version.
+-- ==========================================================
+
+CREATE EXTENSION IF NOT EXISTS pgcrypto WITH SCHEMA public;
+
+CREATE TABLE IF NOT EXISTS public.utilisateur (
+    id uuid DEFAULT gen_random_uuid() NOT NULL,
+    nom character varying(100),
+    prenom character varying(100),
+    email character varying(100),
+    mot_de_passe character varying(255) NOT NULL,
+    numero_telephone character varying(20),
+    date_naissance date,
+    adresse character varying(100),
+    date_inscription timestamp without time zone DEFAULT CURRENT_TIMESTAMP,
+    kyc_status character varying(20),
+    role character varying(20),
+    niveau_verification integer DEFAULT 0,
+    CONSTRAINT utilisateur_pkey PRIMARY KEY (id),
+    CONSTRAINT utilisateur_email_key UNIQUE (email),
+    CONSTRAINT utilisateur_numero_telephone_key UNIQUE (numero_telephone),
+    CONSTRAINT utilisateur_kyc_status_check CHECK (kyc_status IN ('EN_ATTENTE', 'VALIDE', 'REJETE')),
+    CONSTRAINT utilisateur_role_check CHECK (role IN ('CLIENT', 'MARCHAND', 'ADMIN'))
+);
+
+CREATE TABLE IF NOT EXISTS public.transaction (
+    id uuid DEFAULT gen_random_uuid() NOT NULL,
+    montant numeric(12,2) NOT NULL,
+    devise character varying(10),
+    type character varying(20),
+    date timestamp without time zone DEFAULT CURRENT_TIMESTAMP,
+    statut character varying(20),
+    message character varying(750),
+    methode_paiement character varying(30),
+    expediteur_id uuid,
+    destinataire_id uuid,
+    fournisseur character varying(20) DEFAULT 'INTERNE',
+    reference_externe character varying(100),
+    frais double precision DEFAULT 0,
+    commission double precision DEFAULT 0,
+    moyen_paiement character varying(30) DEFAULT 'MOBILE_MONEY',
+    numero_expediteur character varying(20),
+    numero_destinataire character varying(20),
+    code_confirmation character varying(10),
+    api_transaction_id character varying(100),
+    api_status_code character varying(50),
+    api_response jsonb,
+    date_confirmation timestamp without time zone,
+    CONSTRAINT transaction_pkey PRIMARY KEY (id),
+    CONSTRAINT transaction_expediteur_id_fkey FOREIGN KEY (expediteur_id) REFERENCES public.utilisateur(id),
+    CONSTRAINT transaction_destinataire_id_fkey FOREIGN KEY (destinataire_id) REFERENCES public.utilisateur(id),
+    CONSTRAINT transaction_fournisseur_check CHECK (fournisseur IN ('MTN_MOMO', 'ORANGE_MONEY', 'INTERNE')),
+    CONSTRAINT transaction_methode_paiement_check CHECK (methode_paiement IN ('QR_CODE', 'NUMERO_TELEPHONE')),
+    CONSTRAINT transaction_moyen_paiement_check CHECK (moyen_paiement IN ('MOBILE_MONEY', 'CARTE', 'PORTEFEUILLE_INTERNE')),
+    CONSTRAINT transaction_statut_check CHECK (statut IN ('EN_COURS', 'SUCCES', 'ECHEC')),
+    CONSTRAINT transaction_type_check CHECK (type IN ('ENVOI', 'RECEPTION', 'RETRAIT'))
+);
+
+CREATE TABLE IF NOT EXISTS public.portefeuille (
+    id uuid DEFAULT gen_random_uuid() NOT NULL,
+    utilisateur_id uuid,
+    solde numeric(12,2) DEFAULT 0,
+    devise character varying(10),
+    date_derniere_mise_a_jour timestamp without time zone DEFAULT CURRENT_TIMESTAMP,
+    fournisseur character varying(20) DEFAULT 'INTERNE',
+    numero_compte character varying(20),
+    statut character varying(20) DEFAULT 'ACTIF',
+    nom_proprietaire character varying(100),
+    telephone character varying(20),
+    code_pays character varying(5) DEFAULT '+237',
+    api_reference character varying(100),
+    derniere_sync timestamp without time zone DEFAULT CURRENT_TIMESTAMP,
+    date_creation timestamp without time zone DEFAULT CURRENT_TIMESTAMP,
+    derniere_transaction_id uuid,
+    CONSTRAINT portefeuille_pkey PRIMARY KEY (id),
+    CONSTRAINT portefeuille_utilisateur_id_fkey FOREIGN KEY (utilisateur_id) REFERENCES public.utilisateur(id) ON DELETE CASCADE,
+    CONSTRAINT portefeuille_derniere_transaction_id_fkey FOREIGN KEY (derniere_transaction_id) REFERENCES public.transaction(id),
+    CONSTRAINT portefeuille_fournisseur_check CHECK (fournisseur IN ('MTN_MOMO', 'ORANGE_MONEY', 'INTERNE')),
+    CONSTRAINT portefeuille_statut_check CHECK (statut IN ('ACTIF', 'SUSPENDU', 'FERME'))
+);
+
+CREATE TABLE IF NOT EXISTS public.notification (
+    id uuid DEFAULT gen_random_uuid() NOT NULL,
+    utilisateur_id uuid,
+    titre character varying(150),
+    contenu character varying(750),
+    date_envoi timestamp without time zone DEFAULT CURRENT_TIMESTAMP,
+    type character varying(30),
+    vu boolean DEFAULT false,
+    CONSTRAINT notification_pkey PRIMARY KEY (id),
+    CONSTRAINT notification_utilisateur_id_fkey FOREIGN KEY (utilisateur_id) REFERENCES public.utilisateur(id) ON DELETE CASCADE,
+    CONSTRAINT notification_type_check CHECK (type IN ('TRANSACTION', 'SYSTEME', 'ADMIN'))
+);
+
+CREATE TABLE IF NOT EXISTS public.kyc_document (
+    id uuid DEFAULT gen_random_uuid() NOT NULL,
+    utilisateur_id uuid,
+    type_document character varying(20),
+    numero_document character varying(50),
+    date_soumission timestamp without time zone DEFAULT CURRENT_TIMESTAMP,
+    etat character varying(20),
+    justification_refus text,
+    url_fichier text,
+    CONSTRAINT kyc_document_pkey PRIMARY KEY (id),
+    CONSTRAINT kyc_document_numero_document_key UNIQUE (numero_document),
+    CONSTRAINT kyc_document_utilisateur_id_fkey FOREIGN KEY (utilisateur_id) REFERENCES public.utilisateur(id) ON DELETE CASCADE,
+    CONSTRAINT kyc_document_etat_check CHECK (etat IN ('EN_ATTENTE', 'VALIDE', 'REJETE')),
+    CONSTRAINT kyc_document_type_document_check CHECK (type_document IN ('CNI', 'PASSEPORT', 'PERMIS'))
+);
+
+CREATE TABLE IF NOT EXISTS public.qrcode (
+    id uuid DEFAULT gen_random_uuid() NOT NULL,
+    valeur character varying(750),
+    valide_jusqu_a timestamp without time zone DEFAULT CURRENT_TIMESTAMP,
+    date_creation timestamp without time zone DEFAULT CURRENT_TIMESTAMP,
+    est_statique boolean DEFAULT false,
+    CONSTRAINT qrcode_pkey PRIMARY KEY (id)
+);
+
+CREATE OR REPLACE VIEW public.vue_portefeuilles_alerte AS
+    SELECT id, utilisateur_id, solde, devise, date_derniere_mise_a_jour
+    FROM public.portefeuille
+    WHERE solde < 5000::numeric;
+
+CREATE OR REPLACE VIEW public.vue_transactions_utilisateur AS
+    SELECT t.id, t.montant, t.devise, t.type, t.date, t.statut, t.message,
+           t.methode_paiement, t.expediteur_id, t.destinataire_id,
+           u1.nom AS nom_expediteur, u2.nom AS nom_destinataire
+    FROM public.transaction t
+    LEFT JOIN public.utilisateur u1 ON t.expediteur_id = u1.id
+    LEFT JOIN public.utilisateur u2 ON t.destinataire_id = u2.id;
+
+CREATE INDEX IF NOT EXISTS idx_portefeuille_fournisseur ON public.portefeuille USING btree (fournisseur);
+CREATE INDEX IF NOT EXISTS idx_portefeuille_user ON public.portefeuille USING btree (utilisateur_id);
+CREATE INDEX IF NOT EXISTS idx_transaction_date ON public.transaction USING btree (date);
+CREATE INDEX IF NOT EXISTS idx_transaction_fournisseur ON public.transaction USING btree (fournisseur);
+CREATE INDEX IF NOT EXISTS idx_transaction_statut ON public.transaction USING btree (statut);
@@ -0,0 +1,18 @@
+-- ==========================================================
+-- 0002 : index de l'historique des transactions
+-- ----------------------------------------------------------
+-- Pagination par clé (date, id) de HistoriqueModel : chaque
+-- branche (envois / réceptions) lit directement les N lignes
+-- les plus récentes d'un utilisateur, sans tri ni parcours de
+-- tout son historique.
+--
+-- CONCURRENTLY : création sans bloquer les écritures, donc
+-- hors transaction (directive ci-dessous, lue par migrer.py)
+-- ==========================================================
+-- migrer: hors-transaction
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_transaction_expediteur_date
+    ON public.transaction USING btree (expediteur_id, date, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_transaction_destinataire_date
+    ON public.transaction USING btree (destinataire_id, date, id);
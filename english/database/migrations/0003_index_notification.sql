@@ -0,0 +1,14 @@
+-- ==========================================================
+-- 0003 : index des notifications
+-- ----------------------------------------------------------
+-- (utilisateur_id, vu) : chargement du compteur de non lues
+-- (parcours d'index seul) et mise à jour "tout marquer comme
+-- lu" ; sert aussi à la suppression en cascade d'un utilisateur.
+--
+-- CONCURRENTLY : création sans bloquer les écritures, donc
+-- hors transaction (directive ci-dessous, lue par migrer.py)
+-- ==========================================================
+-- migrer: hors-transaction
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_notification_utilisateur_vu
+    ON public.notification USING btree (utilisateur_id, vu);
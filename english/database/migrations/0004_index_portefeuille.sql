@@ -0,0 +1,27 @@
+-- ==========================================================
+-- 0004 : index des portefeuilles et nettoyage
+-- ----------------------------------------------------------
+-- - (utilisateur_id, devise) : verrouillage des portefeuilles
+--   d'un transfert (utilisateur_id = ANY(...) AND devise =
+--   ANY(...)) ; remplace idx_portefeuille_user, dont il couvre
+--   les recherches (même première colonne)
+-- - fournisseur / statut : index à très faible cardinalité
+--   (trois valeurs chacun) qu'aucune requête n'utilise ; ils ne
+--   faisaient que ralentir chaque écriture de transaction et de
+--   solde
+--
+-- La recherche par email s'appuie sur la contrainte unique
+-- utilisateur_email_key : aucun index supplémentaire.
+-- ==========================================================
+-- migrer: hors-transaction
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_portefeuille_utilisateur_devise
+    ON public.portefeuille USING btree (utilisateur_id, devise);
+
+DROP INDEX CONCURRENTLY IF EXISTS public.idx_portefeuille_user;
+
+DROP INDEX CONCURRENTLY IF EXISTS public.idx_portefeuille_fournisseur;
+
+DROP INDEX CONCURRENTLY IF EXISTS public.idx_transaction_fournisseur;
+
+DROP INDEX CONCURRENTLY IF EXISTS public.idx_transaction_statut;
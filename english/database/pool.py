@@ -2,9 +2,23 @@
 # Importations nécessaires
 # ==========================================================
 
-# 'pool' : permet de gérer un ensemble (pool) de connexions réutilisables à PostgreSQL
+# 're' : conversion des paramètres $1, $2… des requêtes préparées
+# 'threading' / 'time' / 'deque' : synchronisation du pool, horodatage et file d'attente FIFO
+# 'OrderedDict' : écritures récentes (lecture de ses propres écritures), purgées par ordre d'échéance
+import re
+import threading
+import time
+from collections import deque, OrderedDict
+
+# 'contextvars' : unité de travail courante (propre à chaque thread / tâche asyncio)
+import contextvars
+
+# 'psycopg2' : pilote PostgreSQL
+# 'PoolError' : erreur de base des pools psycopg2 (conservée pour la compatibilité)
 # 'OperationalError' : pour intercepter les erreurs liées à la base de données (mauvais identifiants, serveur injoignable, etc.)
-from psycopg2 import pool, OperationalError
+import psycopg2
+from psycopg2 import OperationalError
+from psycopg2.pool import PoolError
 
 # 'contextmanager' : permet de créer des blocs "with" pour gérer proprement les connexions et curseurs
 from contextlib import contextmanager
@@ -12,14 +26,437 @@ from contextlib import contextmanager
 # 'Config' : contient les paramètres de connexion stockés dans le fichier .env (importés via config.py)
 from config import Config
 
+# Métriques optionnelles (attente, détention, latence des requêtes) — voir database/metrics.py
+from database.metrics import get_metriques
+
 # 'psycopg2.extras' : permet d’utiliser des curseurs spéciaux comme 'RealDictCursor' pour récupérer les résultats sous forme de dictionnaires
+# 'psycopg2.extensions' : classe de connexion de base et constantes d'état des transactions
 import psycopg2.extras
+import psycopg2.extensions
+
+
+# Paramètres positionnels PostgreSQL ($1, $2…) utilisés par les requêtes préparées
+_RE_PARAM_POSITIONNEL = re.compile(r"\$\d+")
+
+
+# ==========================================================
+# Exception : PoolTimeout
+# ----------------------------------------------------------
+# Levée lorsqu'aucune connexion ne s'est libérée dans le délai
+# PG_POOL_TIMEOUT. Hérite de PoolError comme l'ancien pool psycopg2.
+# ==========================================================
+class PoolTimeout(PoolError):
+    pass
+
+
+# ==========================================================
+# Classe : PooledConnection
+# ----------------------------------------------------------
+# Connexion psycopg2 enrichie des informations nécessaires
+# au pool (date de création, dernière utilisation) et de la
+# liste des requêtes préparées côté serveur sur cette session.
+# ==========================================================
+class PooledConnection(psycopg2.extensions.connection):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cree_le = time.monotonic()
+        self.utilise_le = self.cree_le
+        self.preparees = set()
+
+
+# ==========================================================
+# Classe interne : _Attente
+# ----------------------------------------------------------
+# Représente un thread en attente d'une connexion. Le pool lui
+# remet soit une connexion libre, soit l'autorisation d'en ouvrir
+# une nouvelle (place libérée par une connexion fermée).
+# ==========================================================
+class _Attente:
+    __slots__ = ("evenement", "conn", "ouvrir")
+
+    def __init__(self):
+        self.evenement = threading.Event()
+        self.conn = None
+        self.ouvrir = False
+
+
+# ==========================================================
+# Classe : ConnectionPool
+# ----------------------------------------------------------
+# Pool de connexions bloquant et équitable :
+# - les threads attendent dans une file FIFO (premier arrivé, premier servi)
+#   au lieu d'obtenir une erreur immédiate quand le pool est plein
+# - les connexions inactives depuis longtemps sont vérifiées avant usage
+# - les connexions trop anciennes ou inutilisées sont recyclées
+# - les connexions cassées ne sont jamais remises dans le pool
+# - un thread d'arrière-plan maintient au moins 'minconn' connexions ouvertes
+# ==========================================================
+class ConnectionPool:
+
+    def __init__(self, minconn, maxconn, timeout=None, max_lifetime=None,
+                 max_idle=None, check_idle=None, **dsn):
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout if timeout is not None else Config.PG_POOL_TIMEOUT
+        self.max_lifetime = max_lifetime if max_lifetime is not None else Config.PG_POOL_MAX_LIFETIME
+        self.max_idle = max_idle if max_idle is not None else Config.PG_POOL_MAX_IDLE
+        self.check_idle = check_idle if check_idle is not None else Config.PG_POOL_CHECK_IDLE
+        self._dsn = dsn
+
+        self._lock = threading.Lock()
+        self._libres = deque()      # connexions disponibles (la plus récente à droite)
+        self._attentes = deque()    # threads en attente, dans l'ordre d'arrivée
+        self._taille = 0            # connexions ouvertes ou en cours d'ouverture
+        self._ferme = False
+        self._epuisements = 0       # nombre de fois où un thread a dû attendre son tour
+        self._timeouts = 0          # nombre d'attentes abandonnées (PoolTimeout)
+
+        # Première connexion ouverte immédiatement : une erreur de configuration
+        # (identifiants, serveur injoignable) est ainsi signalée dès l'initialisation
+        with self._lock:
+            self._taille += 1
+        try:
+            conn = self._ouvrir()
+        except Exception:
+            with self._lock:
+                self._taille -= 1
+            raise
+        self.putconn(conn)
+
+        # Thread de maintenance : préchauffage jusqu'à 'minconn' puis recyclage périodique
+        self._arret = threading.Event()
+        self._maintenance = threading.Thread(target=self._boucle_maintenance, name="pg-pool", daemon=True)
+        self._maintenance.start()
+
+    # ------------------------------------------------------
+    # Ouverture / fermeture physique d'une connexion
+    # ------------------------------------------------------
+    def _ouvrir(self):
+        return psycopg2.connect(connection_factory=PooledConnection, **self._dsn)
+
+    @staticmethod
+    def _fermer(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _trop_vieille(self, conn, maintenant):
+        return self.max_lifetime > 0 and maintenant - conn.cree_le > self.max_lifetime
+
+    @staticmethod
+    def _est_cassee(conn):
+        """Une connexion fermée ou dans un état inconnu ne doit pas être réutilisée."""
+        if conn.closed:
+            return True
+        return conn.info.transaction_status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN
+
+    @staticmethod
+    def _verifier(conn):
+        """Vérifie qu'une connexion restée inactive répond toujours (SELECT 1)."""
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    # ------------------------------------------------------
+    # Libération d'une place (connexion fermée)
+    # ------------------------------------------------------
+    def _liberer_place(self):
+        """
+        À appeler sous verrou après la fermeture d'une connexion : la place
+        est donnée au premier thread en attente, qui ouvrira une connexion neuve.
+        """
+        if self._attentes:
+            attente = self._attentes.popleft()
+            attente.ouvrir = True
+            attente.evenement.set()
+        else:
+            self._taille -= 1
+
+    # ------------------------------------------------------
+    # Méthode : getconn
+    # ------------------------------------------------------
+    def getconn(self, timeout=None):
+        """
+        Récupère une connexion du pool, en attendant au plus 'timeout' secondes.
+
+        Raises:
+            PoolTimeout: aucune connexion disponible dans le délai
+            PoolError: le pool est fermé
+        """
+        delai = self.timeout if timeout is None else timeout
+        limite = time.monotonic() + delai
+
+        conn, ouvrir = self._reserver(limite, delai)
+
+        # Connexion existante : on écarte celles qui sont cassées, trop vieilles
+        # ou qui ne répondent plus après une longue inactivité
+        if not ouvrir:
+            maintenant = time.monotonic()
+            if not (self._est_cassee(conn) or self._trop_vieille(conn, maintenant) or (
+                    self.check_idle >= 0 and maintenant - conn.utilise_le > self.check_idle
+                    and not self._verifier(conn))):
+                return conn
+
+            # La place est conservée par ce thread : il ouvrira une connexion neuve
+            self._fermer(conn)
+            with self._lock:
+                if self._ferme:
+                    self._taille -= 1
+                    raise PoolError("Le pool de connexions est fermé.")
+
+        try:
+            return self._ouvrir()
+        except Exception:
+            with self._lock:
+                self._liberer_place()
+            raise
+
+    def _reserver(self, limite, delai):
+        """
+        Obtient soit une connexion libre, soit le droit d'en ouvrir une.
+
+        Returns:
+            tuple: (connexion | None, ouvrir: bool)
+        """
+        with self._lock:
+            if self._ferme:
+                raise PoolError("Le pool de connexions est fermé.")
+
+            # Personne n'attend : on sert directement
+            if not self._attentes:
+                if self._libres:
+                    return self._libres.pop(), False
+                if self._taille < self.maxconn:
+                    self._taille += 1
+                    return None, True
+
+            # Sinon on prend place dans la file FIFO
+            attente = _Attente()
+            self._attentes.append(attente)
+            self._epuisements += 1
+
+        attente.evenement.wait(max(0.0, limite - time.monotonic()))
+
+        with self._lock:
+            if attente.conn is not None or attente.ouvrir:
+                return attente.conn, attente.ouvrir
+            if self._ferme:
+                raise PoolError("Le pool de connexions est fermé.")
+            # Délai expiré sans rien recevoir : on quitte la file
+            self._attentes.remove(attente)
+            self._timeouts += 1
+
+        raise PoolTimeout(
+            f"Aucune connexion PostgreSQL disponible après {delai:g}s (PG_POOL_MAX={self.maxconn})."
+        )
+
+    # ------------------------------------------------------
+    # Méthode : putconn
+    # ------------------------------------------------------
+    def putconn(self, conn, close=False):
+        """
+        Rend une connexion au pool. Les connexions cassées, trop anciennes
+        ou dont la transaction ne peut être annulée sont fermées.
+        """
+        maintenant = time.monotonic()
+        jeter = close or self._ferme or self._est_cassee(conn) or self._trop_vieille(conn, maintenant)
+
+        # Une transaction restée ouverte est annulée avant réutilisation
+        if not jeter and conn.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except Exception:
+                jeter = True
+            jeter = jeter or self._est_cassee(conn)
+
+        if jeter:
+            self._fermer(conn)
+            with self._lock:
+                self._liberer_place()
+            return
+
+        conn.utilise_le = maintenant
+        with self._lock:
+            if self._attentes:
+                attente = self._attentes.popleft()
+                attente.conn = conn
+                attente.evenement.set()
+            else:
+                self._libres.append(conn)
+
+    # ------------------------------------------------------
+    # Maintenance en arrière-plan
+    # ------------------------------------------------------
+    def _boucle_maintenance(self):
+        while not self._arret.is_set():
+            try:
+                self._recycler()
+                self._prechauffer()
+            except Exception as e:
+                print(" Maintenance du pool PostgreSQL :", e)
+            self._arret.wait(min(5.0, max(0.5, self.check_idle or 5.0)))
+
+    def _recycler(self):
+        """Ferme les connexions libres trop anciennes ou inutilisées depuis longtemps."""
+        maintenant = time.monotonic()
+        a_fermer = []
+        with self._lock:
+            garder = deque()
+            for conn in self._libres:
+                trop_inactive = (self.max_idle > 0 and maintenant - conn.utilise_le > self.max_idle
+                                 and self._taille - len(a_fermer) > self.minconn)
+                if self._est_cassee(conn) or self._trop_vieille(conn, maintenant) or trop_inactive:
+                    a_fermer.append(conn)
+                else:
+                    garder.append(conn)
+            self._libres = garder
+
+        for conn in a_fermer:
+            self._fermer(conn)
+            with self._lock:
+                self._liberer_place()
+
+    def _prechauffer(self):
+        """Ouvre des connexions jusqu'à atteindre 'minconn'."""
+        while not self._arret.is_set():
+            with self._lock:
+                if self._ferme or self._taille >= self.minconn:
+                    return
+                self._taille += 1
+            try:
+                conn = self._ouvrir()
+            except Exception:
+                with self._lock:
+                    self._liberer_place()
+                raise
+            self.putconn(conn)
+
+    # ------------------------------------------------------
+    # Informations et fermeture
+    # ------------------------------------------------------
+    def stats(self):
+        """Retourne la taille du pool, l'occupation, les threads en attente et les compteurs d'épuisement."""
+        with self._lock:
+            return {
+                "taille": self._taille,
+                "libres": len(self._libres),
+                "en_cours": self._taille - len(self._libres),
+                "en_attente": len(self._attentes),
+                "max": self.maxconn,
+                "epuisements": self._epuisements,
+                "timeouts": self._timeouts,
+            }
+
+    def closeall(self):
+        """Ferme toutes les connexions libres ; celles en cours d'usage seront fermées à leur retour."""
+        self._arret.set()
+        with self._lock:
+            self._ferme = True
+            libres, self._libres = list(self._libres), deque()
+            self._taille -= len(libres)
+            attentes, self._attentes = list(self._attentes), deque()
+        for conn in libres:
+            self._fermer(conn)
+        # Réveille les threads en attente : ils recevront une PoolError
+        for attente in attentes:
+            attente.evenement.set()
+
+
+# ==========================================================
+# Curseurs instrumentés
+# ----------------------------------------------------------
+# Utilisés uniquement lorsque les métriques sont actives :
+# chaque execute()/executemany() est chronométré et enregistré
+# (latence par requête normalisée + journal des requêtes lentes).
+#
+# Les observateurs (observer_requetes) reçoivent en plus le texte
+# exact de chaque requête réussie, paramètres inclus (ex : la
+# vérification des plans de benchmarks/verifier_plans.py) :
+#   - executemany() : une requête par jeu de paramètres
+#   - curseur nommé (curseur_nomme) : la requête, sans le DECLARE
+#   - écritures différées d'une unité de travail : chacune, bien
+#     qu'elles partent ensemble en un seul aller-retour
+# ==========================================================
+_observateurs_requetes = []
+
+
+def observer_requetes(fonction):
+    """Appelle 'fonction(requete: bytes)' après chaque requête des curseurs instrumentés."""
+    _observateurs_requetes.append(fonction)
+
+
+def retirer_observateur(fonction):
+    if fonction in _observateurs_requetes:
+        _observateurs_requetes.remove(fonction)
+
+
+class _MesureMixin:
+
+    def execute(self, query, vars=None):
+        debut = time.perf_counter()
+        try:
+            resultat = super().execute(query, vars)
+        finally:
+            metriques = get_metriques()
+            if metriques is not None:
+                metriques.requete(query, time.perf_counter() - debut)
+        if _observateurs_requetes:
+            # Curseur nommé : self.query est le DECLARE qui enveloppe la requête
+            self._observer([self.query if self.name is None else self.mogrify(query, vars)])
+        return resultat
+
+    def executemany(self, query, vars_list):
+        vars_list = list(vars_list)
+        debut = time.perf_counter()
+        try:
+            resultat = super().executemany(query, vars_list)
+        finally:
+            metriques = get_metriques()
+            if metriques is not None:
+                metriques.requete(query, time.perf_counter() - debut)
+        if _observateurs_requetes:
+            self._observer([self.mogrify(query, vars) for vars in vars_list])
+        return resultat
+
+    def execute_lot(self, requetes):
+        """Envoie des requêtes déjà formatées (mogrify) en un seul aller-retour."""
+        debut = time.perf_counter()
+        try:
+            resultat = super().execute(b";\n".join(requetes))
+        finally:
+            metriques = get_metriques()
+            if metriques is not None:
+                metriques.requete(self.query, time.perf_counter() - debut)
+        if _observateurs_requetes:
+            self._observer(requetes)
+        return resultat
+
+    @staticmethod
+    def _observer(requetes):
+        for observateur in list(_observateurs_requetes):
+            for requete in requetes:
+                observateur(requete)
+
+
+class CurseurMesure(_MesureMixin, psycopg2.extensions.cursor):
+    pass
+
+
+class CurseurDictMesure(_MesureMixin, psycopg2.extras.RealDictCursor):
+    pass
 
 
 # ==========================================================
 # Variable globale pour stocker le pool de connexions
 # ==========================================================
 _conn_pool = None
+_init_lock = threading.Lock()
 # Elle sera initialisée une seule fois et réutilisée pendant toute la durée du programme
 
 
@@ -32,28 +469,569 @@ _conn_pool = None
 def init_pool():
     global _conn_pool
 
-    # Si le pool n'est pas encore créé, on l'initialise
-    if _conn_pool is None:
+    with _init_lock:
+        # Si le pool n'est pas encore créé, on l'initialise
+        if _conn_pool is None:
+            try:
+                # Création du pool (bloquant, équitable et vérifié)
+                _conn_pool = ConnectionPool(
+                    minconn=Config.PG_POOL_MIN,   # Nombre minimum de connexions actives
+                    maxconn=Config.PG_POOL_MAX,   # Nombre maximum de connexions simultanées
+                    host=Config.PG_HOST,           # Hôte PostgreSQL (souvent localhost)
+                    port=Config.PG_PORT,           # Port (par défaut 5432)
+                    database=Config.PG_DBNAME,     # Nom de la base de données
+                    user=Config.PG_USER,           # Nom d'utilisateur PostgreSQL
+                    password=Config.PG_PASSWORD,   # Mot de passe PostgreSQL
+                    sslmode=Config.PG_SSLMODE      # Mode SSL (disable, require, etc.)
+                )
+
+                # Si la création réussit, on confirme à l'utilisateur
+                print("✅ Connexion PostgreSQL sécurisée établie.")
+
+                # Pools des réplicas en lecture (facultatifs)
+                _init_replicas()
+
+            # Si une erreur survient (serveur non accessible, identifiants incorrects, etc.)
+            except OperationalError as e:
+                # On élève une exception personnalisée avec un message clair
+                raise RuntimeError(f"Échec de la connexion à PostgreSQL : {e}")
+
+
+# ==========================================================
+# Fonction : close_pool()
+# ----------------------------------------------------------
+# Ferme toutes les connexions du pool (arrêt du programme).
+# ==========================================================
+def close_pool():
+    global _conn_pool
+
+    with _init_lock:
+        if _conn_pool is not None:
+            _close_replicas()
+            _conn_pool.closeall()
+            _conn_pool = None
+
+
+# ==========================================================
+# Réplicas en lecture
+# ----------------------------------------------------------
+# PG_REPLICA_HOSTS="replica1:5432,replica2:5433" : chaque réplica
+# a son propre pool. get_conn_cursor(readonly=True) y envoie les
+# lectures (réplica le moins chargé, à charge égale tour à tour),
+# sauf si :
+#   - aucun réplica n'est disponible ou assez à jour
+#     (retard > PG_REPLICA_MAX_LAG, mesuré par un thread de
+#     surveillance toutes les PG_REPLICA_CHECK secondes)
+#   - la clé de la lecture (email, id…) a été écrite il y a moins
+#     de PG_RYW_DELAI secondes (lecture de ses propres écritures)
+#   - la réception du WAL est interrompue (réplica coupé du
+#     primaire : ses données ne sont plus mises à jour)
+#   - la connexion au réplica échoue, ou aucune ne se libère en
+#     PG_REPLICA_POOL_TIMEOUT secondes (repli sur le primaire)
+#
+# Une erreur survenue pendant la requête elle-même n'est pas
+# rejouée sur le primaire : elle remonte à l'appelant.
+# ==========================================================
+def _lire_hotes(texte):
+    """"h1:5433,h2" → [("h1", 5433), ("h2", PG_PORT)]"""
+    hotes = []
+    for element in (texte or "").split(","):
+        element = element.strip()
+        if not element:
+            continue
+        hote, _, port = element.partition(":")
+        hotes.append((hote, int(port) if port else Config.PG_PORT))
+    return hotes
+
+
+class _Replica:
+
+    # Retard de réplication (secondes) ; nul si le réplica a rejoué tout ce qu'il a
+    # reçu ET reçoit encore le WAL du primaire, NULL si la réception est interrompue.
+    # (sans pg_read_all_stats, 'status' est NULL : seule la présence du processus
+    # de réception est alors vérifiée)
+    SQL_RETARD = """
+        SELECT CASE
+            WHEN NOT pg_is_in_recovery() THEN 0
+            WHEN NOT EXISTS (SELECT 1 FROM pg_stat_wal_receiver
+                             WHERE status IS NULL OR status = 'streaming') THEN NULL
+            WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+            ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+        END
+    """
+
+    def __init__(self, hote, port):
+        self.hote = hote
+        self.port = port
+        self.pool = None
+        self.disponible = False
+        self.retard = None
+        self.echecs = 0
+
+    @property
+    def nom(self):
+        return f"{self.hote}:{self.port}"
+
+    def ouvrir(self):
+        self.pool = ConnectionPool(
+            minconn=Config.PG_POOL_MIN,
+            maxconn=Config.PG_REPLICA_POOL_MAX,
+            host=self.hote,
+            port=self.port,
+            database=Config.PG_DBNAME,
+            user=Config.PG_USER,
+            password=Config.PG_PASSWORD,
+            sslmode=Config.PG_SSLMODE,
+            # Un réplica injoignable ne doit pas bloquer la surveillance
+            connect_timeout=max(1, int(Config.PG_REPLICA_CHECK))
+        )
+
+    def charge(self):
+        """Occupation du pool (0 = libre, 1 = plein, > 1 = threads en attente)."""
+        stats = self.pool.stats()
+        return (stats["en_cours"] + stats["en_attente"]) / max(1, stats["max"])
+
+    def verifier(self):
+        """Ouvre le pool si nécessaire et mesure le retard de réplication."""
         try:
-            # Création d’un pool de connexions multithreadé
-            _conn_pool = pool.ThreadedConnectionPool(
-                minconn=Config.PG_POOL_MIN,   # Nombre minimum de connexions actives
-                maxconn=Config.PG_POOL_MAX,   # Nombre maximum de connexions simultanées
-                host=Config.PG_HOST,           # Hôte PostgreSQL (souvent localhost)
-                port=Config.PG_PORT,           # Port (par défaut 5432)
-                database=Config.PG_DBNAME,     # Nom de la base de données
-                user=Config.PG_USER,           # Nom d'utilisateur PostgreSQL
-                password=Config.PG_PASSWORD,   # Mot de passe PostgreSQL
-                sslmode=Config.PG_SSLMODE      # Mode SSL (disable, require, etc.)
-            )
+            if self.pool is None:
+                self.ouvrir()
+            conn = self.pool.getconn(timeout=Config.PG_REPLICA_CHECK)
+            try:
+                with conn.cursor() as cur:
+                    cur.execute(self.SQL_RETARD)
+                    retard = cur.fetchone()[0]
+                conn.rollback()
+            finally:
+                self.pool.putconn(conn)
+            if retard is None:
+                self.retard = None
+                self.signaler_echec("réception du WAL interrompue")
+                return
+            self.retard = float(retard)
+            self.disponible = True
+            self.echecs = 0
+        except Exception as e:
+            self.signaler_echec(e)
+
+    def signaler_echec(self, erreur):
+        if self.disponible:
+            print(f" Réplica {self.nom} indisponible, lectures redirigées :", erreur)
+        self.disponible = False
+        self.echecs += 1
+
+    def utilisable(self):
+        return (self.disponible and self.pool is not None
+                and self.retard is not None and self.retard <= Config.PG_REPLICA_MAX_LAG)
+
+    def etat(self):
+        return {
+            "replica": self.nom,
+            "disponible": self.disponible,
+            "retard_s": self.retard,
+            "echecs": self.echecs,
+            "pool": self.pool.stats() if self.pool is not None else None,
+        }
+
+
+_replicas = []
+_tour = 0                          # compteur du tour de rôle entre réplicas à charge égale
+_surveillance_arret = threading.Event()
+_ecritures = OrderedDict()         # clé -> échéance (lecture sur le primaire jusque-là)
+_ecritures_lock = threading.Lock()
+
+
+def _surveiller_replicas():
+    # Première vérification immédiate : les lectures restent sur le primaire d'ici là
+    while not _surveillance_arret.is_set():
+        for replica in list(_replicas):
+            replica.verifier()
+        _surveillance_arret.wait(Config.PG_REPLICA_CHECK)
+
+
+def _choisir_replica():
+    """Réplica utilisable le moins chargé (tour de rôle à charge égale), ou None."""
+    global _tour
+
+    candidats = [r for r in _replicas if r.utilisable()]
+    if not candidats:
+        return None
+    _tour += 1
+    depart = _tour % len(candidats)
+    ordre = candidats[depart:] + candidats[:depart]
+    return min(ordre, key=lambda r: r.charge())
+
+
+def marquer_ecriture(*cles):
+    """
+    Signale une écriture : les lectures avec l'une de ces clés (email, id…)
+    iront sur le primaire pendant PG_RYW_DELAI secondes.
+    """
+    if not _replicas:
+        return
+    maintenant = time.monotonic()
+    echeance = maintenant + Config.PG_RYW_DELAI
+    with _ecritures_lock:
+        for cle in cles:
+            if cle is None:
+                continue
+            _ecritures[str(cle)] = echeance
+            _ecritures.move_to_end(str(cle))
+        # Échéances croissantes dans l'ordre d'insertion : purge par le début
+        while _ecritures and next(iter(_ecritures.values())) <= maintenant:
+            _ecritures.popitem(last=False)
+
+
+def _ecrit_recemment(cle):
+    if cle is None:
+        return False
+    with _ecritures_lock:
+        echeance = _ecritures.get(str(cle))
+    return echeance is not None and echeance > time.monotonic()
+
+
+def _init_replicas():
+    """
+    Déclare les réplicas configurés. Leurs pools sont ouverts par le thread
+    de surveillance : un réplica injoignable ne retarde pas le démarrage.
+    """
+    for hote, port in _lire_hotes(Config.PG_REPLICA_HOSTS):
+        _replicas.append(_Replica(hote, port))
+
+    if _replicas:
+        _surveillance_arret.clear()
+        threading.Thread(target=_surveiller_replicas, name="pg-replicas", daemon=True).start()
+
+
+def _close_replicas():
+    _surveillance_arret.set()
+    for replica in _replicas:
+        if replica.pool is not None:
+            replica.pool.closeall()
+    _replicas.clear()
+    with _ecritures_lock:
+        _ecritures.clear()
+
+
+def etat_replicas():
+    """État de chaque réplica (disponibilité, retard, occupation du pool)."""
+    return [replica.etat() for replica in list(_replicas)]
+
+
+def _obtenir_connexion(readonly, cle):
+    """
+    Choisit le pool (réplica ou primaire) et en obtient une connexion.
+
+    Returns:
+        tuple: (pool, connexion)
+    """
+    if readonly and _replicas and not _ecrit_recemment(cle):
+        replica = _choisir_replica()
+        if replica is not None:
+            try:
+                return replica.pool, replica.pool.getconn(timeout=Config.PG_REPLICA_POOL_TIMEOUT)
+            except PoolTimeout:
+                pass   # réplica saturé mais joignable : lecture sur le primaire
+            except (PoolError, OperationalError) as e:
+                replica.signaler_echec(e)
+    return _conn_pool, _conn_pool.getconn()
+
+
+# ==========================================================
+# Fonction : execute_prepare()
+# ----------------------------------------------------------
+# Exécute une requête fréquente via une requête préparée côté
+# serveur (PREPARE / EXECUTE) : PostgreSQL n'analyse et ne planifie
+# la requête qu'une fois par connexion.
+#
+# La requête utilise les paramètres positionnels PostgreSQL ($1, $2…).
+#
+# Exemple :
+#   execute_prepare(cur, "utilisateur_par_email",
+#                   "SELECT id, nom FROM public.utilisateur WHERE email = $1", (email,))
+#   ligne = cur.fetchone()
+# ==========================================================
+def execute_prepare(cur, nom, sql, params=()):
+    conn = cur.connection
+    preparees = getattr(conn, "preparees", None)
+
+    # Connexion hors pool (sans suivi des requêtes préparées) : exécution directe
+    if preparees is None:
+        cur.execute(_RE_PARAM_POSITIONNEL.sub("%s", sql), params)
+        return
+
+    if nom not in preparees:
+        cur.execute(f"PREPARE {nom} AS {sql}")
+        preparees.add(nom)
+
+    if params:
+        cur.execute(f"EXECUTE {nom} ({', '.join(['%s'] * len(params))})", params)
+    else:
+        cur.execute(f"EXECUTE {nom}")
+
+
+# ==========================================================
+# Fonctions : metriques_snapshot() / metriques_prometheus()
+# ----------------------------------------------------------
+# Exposent les mesures du chemin base de données (si activées
+# via PG_METRICS=1 ou activer_metriques()).
+# ==========================================================
+def _stats_pool():
+    pool = _conn_pool
+    return pool.stats() if pool is not None else {}
+
+
+def metriques_snapshot():
+    """Retourne un dictionnaire des mesures, ou None si les métriques sont désactivées."""
+    metriques = get_metriques()
+    if metriques is None:
+        return None
+    metriques.source_pool = _stats_pool
+    return metriques.snapshot()
+
+
+def metriques_prometheus():
+    """Retourne les mesures au format texte Prometheus (chaîne vide si désactivées)."""
+    metriques = get_metriques()
+    if metriques is None:
+        return ""
+    metriques.source_pool = _stats_pool
+    return metriques.prometheus()
+
+
+# ==========================================================
+# Unité de travail
+# ----------------------------------------------------------
+# Regroupe plusieurs appels de modèles en une seule transaction
+# sur une seule connexion :
+#   - la connexion est empruntée au premier accès à la base (le
+#     calcul d'un hash avant la première requête ne la retient pas)
+#     et rendue à la fin du bloc
+#   - get_conn_cursor() appelé dans le bloc (même thread / même
+#     tâche asyncio) réutilise cette connexion ; conn.commit()
+#     n'y fait rien : la validation a lieu une seule fois, en fin
+#     de bloc
+#   - les écritures dont le résultat n'est pas lu (differer())
+#     sont mises en file et envoyées ensemble en un seul aller-
+#     retour, avant le prochain accès à la base ou au commit
+#   - apres_commit() reporte les effets de bord (abonnés,
+#     caches…) après la validation réelle
+#
+# conn.rollback() ou une exception annule toute l'unité. Les
+# lectures (readonly=True) y sont faites sur le primaire : elles
+# voient les écritures de l'unité.
+#
+# Une unité annulée par conn.rollback() ne peut plus accéder à
+# la base, et la fin du bloc lève UniteAnnulee : l'appelant ne
+# croit jamais validées des écritures perdues. Les modèles qui
+# gèrent une erreur attendue dans une unité reviennent donc à un
+# SAVEPOINT (ex : UniqueViolation dans
+# UtilisateurModel.creer_utilisateur), et les lectures ne
+# terminent leur transaction par rollback() que hors unité.
+#
+# Utilisée par TransferService.transferer (donc le paiement QR) :
+# transfert et notifications dans la même transaction.
+#
+# Exemple :
+#   with unite_de_travail():
+#       TransferService.transferer(expediteur_id, destinataire_id, montant)
+#       get_notification_dispatcher().envoyer(destinataire_id, "Paiement reçu", "...")
+# ==========================================================
+class UniteAnnulee(RuntimeError):
+    """Accès à la base après l'annulation de l'unité de travail."""
+
+
+class _ConnexionUnite:
+    """Connexion remise aux modèles dans une unité de travail (commit différé)."""
+
+    def __init__(self, unite):
+        self._unite = unite
+
+    def commit(self):
+        pass   # validée en fin d'unité
+
+    def rollback(self):
+        self._unite.annuler()
+
+    def cursor(self, *args, **kwargs):
+        # Curseurs nommés, COPY… : les écritures en file passent d'abord
+        self._unite.envoyer()
+        return self._unite.connexion().cursor(*args, **kwargs)
+
+    def __getattr__(self, nom):
+        return getattr(self._unite.connexion(), nom)
+
+
+class UniteDeTravail:
+
+    def __init__(self):
+        self.pool = None
+        self.conn = None
+        self.annulee = False
+        self.allers_retours_groupes = 0    # envois de la file des écritures différées
+        self._differees = []               # (sql, params)
+        self._apres_commit = []
+        self._connexion_unite = _ConnexionUnite(self)
 
-            # Si la création réussit, on confirme à l'utilisateur
-            print("✅ Connexion PostgreSQL sécurisée établie.")
+    def connexion(self):
+        """Connexion de l'unité (empruntée au pool primaire au premier appel)."""
+        if self.annulee:
+            raise UniteAnnulee("L'unité de travail a été annulée.")
+        if self.conn is None:
+            if _conn_pool is None:
+                init_pool()
+            self.pool = _conn_pool
+            self.conn = self.pool.getconn()
+        return self.conn
 
-        # Si une erreur survient (serveur non accessible, identifiants incorrects, etc.)
-        except OperationalError as e:
-            # On élève une exception personnalisée avec un message clair
-            raise RuntimeError(f"Échec de la connexion à PostgreSQL : {e}")
+    def differer(self, sql, params=None):
+        """Met une écriture en file (envoyée avec les suivantes)."""
+        if self.annulee:
+            raise UniteAnnulee("L'unité de travail a été annulée.")
+        self._differees.append((sql, params))
+
+    def envoyer(self):
+        """Envoie les écritures en file, toutes dans une seule requête."""
+        if not self._differees:
+            return
+        differees, self._differees = self._differees, []
+        # Curseur instrumenté comme les autres requêtes de l'unité (métriques, observateurs)
+        with self.connexion().cursor(cursor_factory=_fabrique_curseur(get_metriques(), False)) as cur:
+            requetes = [cur.mogrify(sql, params) for sql, params in differees]
+            if isinstance(cur, _MesureMixin):
+                cur.execute_lot(requetes)   # chaque écriture reste visible des observateurs
+            else:
+                cur.execute(b";\n".join(requetes))
+        self.allers_retours_groupes += 1
+
+    def apres_commit(self, fonction):
+        self._apres_commit.append(fonction)
+
+    def annuler(self):
+        if self.annulee:
+            return
+        self._differees.clear()
+        self._apres_commit.clear()
+        self.annulee = True
+        if self.conn is not None:
+            try:
+                self.conn.rollback()
+            except Exception:
+                pass
+
+    def _valider(self):
+        if self.annulee:
+            # Un modèle a appelé conn.rollback() : les écritures de l'unité sont perdues
+            raise UniteAnnulee("L'unité de travail a été annulée par un rollback.")
+        self.envoyer()
+        if self.conn is not None:
+            self.conn.commit()
+
+    def _executer_apres_commit(self):
+        fonctions, self._apres_commit = self._apres_commit, []
+        for fonction in fonctions:
+            try:
+                fonction()
+            except Exception as e:
+                # Les données sont validées : un effet de bord ne doit pas faire échouer l'appelant
+                print(" Erreur après la validation de l'unité de travail :", e)
+
+    def _liberer(self):
+        if self.conn is not None:
+            self.pool.putconn(self.conn)
+            self.conn = None
+
+
+_unite_courante = contextvars.ContextVar("unite_de_travail", default=None)
+
+
+@contextmanager
+def unite_de_travail():
+    """
+    Ouvre une unité de travail (ou rejoint celle déjà en cours).
+
+    Yields:
+        UniteDeTravail
+    """
+    unite = _unite_courante.get()
+    if unite is not None:
+        yield unite
+        return
+
+    unite = UniteDeTravail()
+    jeton = _unite_courante.set(unite)
+    try:
+        yield unite
+        unite._valider()
+    except BaseException:
+        unite.annuler()
+        raise
+    finally:
+        _unite_courante.reset(jeton)
+        unite._liberer()
+
+    # Hors de l'unité (connexion rendue) : les effets de bord peuvent accéder à la base
+    unite._executer_apres_commit()
+
+
+def unite_courante():
+    """Unité de travail en cours dans ce contexte, ou None."""
+    return _unite_courante.get()
+
+
+def differer(sql, params=None):
+    """
+    Écriture dont le résultat n'est pas lu : mise en file de l'unité de
+    travail en cours, ou exécutée et validée immédiatement hors unité.
+    """
+    unite = _unite_courante.get()
+    if unite is not None:
+        unite.differer(sql, params)
+        return
+    with get_conn_cursor() as (conn, cur):
+        cur.execute(sql, params)
+        conn.commit()
+
+
+def apres_commit(fonction):
+    """Appelle 'fonction' après la validation de l'unité en cours (immédiatement hors unité)."""
+    unite = _unite_courante.get()
+    if unite is not None:
+        unite.apres_commit(fonction)
+    else:
+        fonction()
+
+
+def _fabrique_curseur(metriques, dict_cursor):
+    # Les curseurs "Mesure" chronomètrent chaque requête quand les métriques sont actives
+    if metriques is not None:
+        return CurseurDictMesure if dict_cursor else CurseurMesure
+    return psycopg2.extras.RealDictCursor if dict_cursor else None
+
+
+def curseur_nomme(conn, nom, dict_cursor=False):
+    """
+    Curseur nommé (côté serveur, lu par lots) sur 'conn', instrumenté comme
+    ceux de get_conn_cursor() quand les métriques sont actives.
+    """
+    return conn.cursor(name=nom, cursor_factory=_fabrique_curseur(get_metriques(), dict_cursor))
+
+
+@contextmanager
+def _curseur_unite(unite, dict_cursor):
+    conn = unite.connexion()
+    # Les écritures en file passent avant les requêtes du bloc
+    unite.envoyer()
+    cur = conn.cursor(cursor_factory=_fabrique_curseur(get_metriques(), dict_cursor))
+    try:
+        yield unite._connexion_unite, cur
+    finally:
+        # Pas de rollback ici : une exception qui sort de l'unité l'annule entièrement
+        if not cur.closed:
+            try:
+                cur.close()
+            except Exception:
+                pass
 
 
 # ==========================================================
@@ -62,40 +1040,77 @@ def init_pool():
 # Fournit automatiquement une connexion et un curseur à la base
 # via un bloc 'with', et gère leur libération proprement.
 #
+# Si toutes les connexions sont occupées, l'appel attend son tour
+# (file FIFO) au plus PG_POOL_TIMEOUT secondes avant de lever PoolTimeout.
+#
+# readonly=True : la lecture peut être servie par un réplica
+# (voir PG_REPLICA_HOSTS). 'cle' identifie la donnée lue : si elle
+# vient d'être écrite (marquer_ecriture), la lecture reste sur le
+# primaire.
+#
+# Dans une unité de travail (unite_de_travail()), la connexion de
+# l'unité est réutilisée et conn.commit() est différé.
+#
 # Exemple d’utilisation :
 #   with get_conn_cursor(dict_cursor=True) as (conn, cur):
 #       cur.execute("SELECT * FROM utilisateur")
 #       result = cur.fetchall()
 #
+#   with get_conn_cursor(readonly=True, cle=email) as (conn, cur):
+#       ...
+#
 # ==========================================================
 @contextmanager
-def get_conn_cursor(dict_cursor=False):
-    global _conn_pool
+def get_conn_cursor(dict_cursor=False, readonly=False, cle=None):
+    # Unité de travail en cours : même connexion, même transaction
+    unite = _unite_courante.get()
+    if unite is not None:
+        with _curseur_unite(unite, dict_cursor) as (conn, cur):
+            yield conn, cur
+        return
 
     # Si le pool n’a pas encore été initialisé, on le fait maintenant
     if _conn_pool is None:
         init_pool()
+    metriques = get_metriques()
 
-    # On récupère une connexion disponible dans le pool
-    conn = _conn_pool.getconn()
+    # On récupère une connexion disponible (réplica ou primaire, attente si nécessaire)
+    debut = time.perf_counter()
+    pool, conn = _obtenir_connexion(readonly, cle)
+    if metriques is not None:
+        obtenu = time.perf_counter()
+        metriques.acquisition(obtenu - debut)
+    cur = None
 
     try:
         # Création d’un curseur :
         # Si dict_cursor=True → les résultats seront sous forme de dictionnaire (clé = nom de colonne)
         # Sinon → résultats classiques (tuple)
-        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor if dict_cursor else None)
+        # Les curseurs "Mesure" chronomètrent chaque requête quand les métriques sont actives
+        cur = conn.cursor(cursor_factory=_fabrique_curseur(metriques, dict_cursor))
 
         # On "donne" la connexion et le curseur au bloc "with"
         yield conn, cur
 
     except Exception:
         # En cas d’erreur SQL ou autre, on annule la transaction pour éviter les incohérences
-        conn.rollback()
+        # (si la connexion est cassée, le pool la détectera et la fermera)
+        try:
+            conn.rollback()
+        except Exception:
+            pass
         raise
 
     finally:
         # Fermeture du curseur proprement
-        cur.close()
+        if cur is not None and not cur.closed:
+            try:
+                cur.close()
+            except Exception:
+                pass
+
+        # On remet la connexion dans le pool (elle sera fermée si elle est cassée)
+        pool.putconn(conn)
 
-        # On remet la connexion dans le pool (au lieu de la fermer complètement)
-        _conn_pool.putconn(conn)
+        if metriques is not None:
+            metriques.detention.observer(time.perf_counter() - obtenu)
@@ -0,0 +1,48 @@
+-- ==========================================================
+-- Alertes de solde : déclencheur NOTIFY sur portefeuille
+-- ----------------------------------------------------------
+-- Publie sur le canal 'portefeuille_solde' chaque changement de
+-- solde utile aux alertes (écouté par EcouteSoldes quand
+-- ALERTE_LISTEN=1). Seuls les changements dont l'ancien ou le
+-- nouveau solde est sous le seuil passé en argument sont publiés.
+--
+-- Ce seuil doit être le plus élevé de ALERTE_SEUILS et
+-- ALERTE_SEUIL_DEFAUT (.env) : il est passé à l'installation, et
+-- le script est relancé à chaque hausse d'un seuil.
+-- demarrer_alertes_solde() vérifie au démarrage (ALERTE_LISTEN=1)
+-- que le déclencheur est installé avec un seuil suffisant.
+--
+-- Installation : psql -v seuil=5000 -f database/sql/alerte_solde.sql
+-- ==========================================================
+
+CREATE OR REPLACE FUNCTION public.notifier_solde_portefeuille() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+DECLARE
+    seuil numeric := TG_ARGV[0]::numeric;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        IF OLD.solde < seuil THEN
+            PERFORM pg_notify('portefeuille_solde',
+                json_build_object('id', OLD.id, 'supprime', true)::text);
+        END IF;
+        RETURN OLD;
+    END IF;
+
+    IF TG_OP = 'UPDATE' AND NEW.solde IS NOT DISTINCT FROM OLD.solde THEN
+        RETURN NEW;
+    END IF;
+
+    IF NEW.solde < seuil OR (TG_OP = 'UPDATE' AND OLD.solde < seuil) THEN
+        PERFORM pg_notify('portefeuille_solde', json_build_object(
+            'id', NEW.id, 'utilisateur_id', NEW.utilisateur_id,
+            'devise', NEW.devise, 'solde', NEW.solde)::text);
+    END IF;
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS portefeuille_solde_notify ON public.portefeuille;
+
+CREATE TRIGGER portefeuille_solde_notify
+    AFTER INSERT OR DELETE OR UPDATE OF solde ON public.portefeuille
+    FOR EACH ROW EXECUTE FUNCTION public.notifier_solde_portefeuille(:'seuil');
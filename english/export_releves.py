@@ -0,0 +1,69 @@
+# ==========================================================
+# Importations nécessaires
+# ==========================================================
+
+# 'argparse' : lecture des options de la ligne de commande
+# 'date' : bornes de l'export (format AAAA-MM-JJ)
+import argparse
+from datetime import date
+
+# Initialisation et fermeture du pool de connexions PostgreSQL
+from database.pool import init_pool, close_pool
+
+# Export des relevés (COPY TO STDOUT → CSV gzip ou Parquet)
+from models.export_model import ExportReleves, COLONNES, FORMATS
+
+
+# ==========================================================
+# Fonction principale : main()
+# ----------------------------------------------------------
+# Export quotidien des transactions et portefeuilles pour le
+# rapprochement comptable (par défaut : la journée d'hier).
+#
+# Exemples :
+#   python export_releves.py exports/
+#   python export_releves.py exports/ --du 2026-10-01 --au 2026-10-17 --par-marchand --workers 4
+#   python export_releves.py exports/ --format parquet --tables transaction
+# ==========================================================
+def main():
+    parser = argparse.ArgumentParser(description="Export des transactions et portefeuilles (CSV gzip ou Parquet).")
+    parser.add_argument("dossier", help="dossier de destination")
+    parser.add_argument("--du", type=date.fromisoformat, help="premier jour exporté (défaut : hier)")
+    parser.add_argument("--au", type=date.fromisoformat, help="dernier jour exporté, inclus (défaut : --du)")
+    parser.add_argument("--tables", default=",".join(COLONNES), help="tables à exporter (séparées par des virgules)")
+    parser.add_argument("--par-marchand", action="store_true", help="un fichier par marchand (et un pour les lignes sans marchand)")
+    parser.add_argument("--format", choices=FORMATS, default="csv", help="csv (gzip) ou parquet (nécessite pyarrow)")
+    parser.add_argument("--workers", type=int, help="partitions exportées en parallèle (défaut : 4)")
+    args = parser.parse_args()
+
+    try:
+        export = ExportReleves(
+            args.dossier, args.du, args.au, [t for t in args.tables.split(",") if t],
+            args.par_marchand, args.format, args.workers
+        )
+    except (ValueError, RuntimeError) as e:
+        print(" Export impossible :", e)
+        return 2
+
+    try:
+        init_pool()
+    except Exception as e:
+        print(" Erreur de connexion à la base :", e)
+        return 1
+
+    try:
+        bilan = export.executer()
+    finally:
+        close_pool()
+
+    print(f" Export terminé : {bilan['partitions']} fichiers, {bilan['lignes']} lignes, "
+          f"{bilan['octets']} octets en {bilan['duree_s']} s.")
+    print(f" Manifeste : {bilan['manifeste']}")
+    return 0
+
+
+# ==========================================================
+# Point d’entrée du script
+# ==========================================================
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,56 @@
+# ==========================================================
+# Importations nécessaires
+# ==========================================================
+
+# 'argparse' : lecture des options de la ligne de commande
+import argparse
+
+# Initialisation et fermeture du pool de connexions PostgreSQL
+from database.pool import init_pool, close_pool
+
+# Pipeline d'import en masse des utilisateurs
+from models.import_model import ImportUtilisateurs
+
+
+# ==========================================================
+# Fonction principale : main()
+# ----------------------------------------------------------
+# Import en masse d'utilisateurs depuis un fichier CSV ou JSONL.
+#
+# Exemple :
+#   python import_utilisateurs.py partenaire.csv --lot 2000 --workers 8
+# ==========================================================
+def main():
+    parser = argparse.ArgumentParser(description="Import en masse d'utilisateurs (CSV ou JSONL).")
+    parser.add_argument("fichier", help="fichier à importer (en-tête CSV : nom,prenom,email,mot_de_passe,numero_telephone,...)")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="format du fichier (déduit de l'extension par défaut)")
+    parser.add_argument("--lot", type=int, default=1000, help="nombre de lignes par transaction (défaut : 1000)")
+    parser.add_argument("--workers", type=int, help="processus de hachage (défaut : nombre de cœurs)")
+    parser.add_argument("--rejets", help="fichier des lignes rejetées (défaut : <fichier>.rejets.csv)")
+    args = parser.parse_args()
+
+    try:
+        init_pool()
+    except Exception as e:
+        print(" Erreur de connexion à la base :", e)
+        return 1
+
+    try:
+        bilan = ImportUtilisateurs(
+            args.fichier, args.format, args.lot, args.workers, args.rejets
+        ).executer()
+    finally:
+        close_pool()
+
+    print(f" Import terminé : {bilan['importees']} importées, {bilan['rejetees']} rejetées "
+          f"en {bilan['duree_s']} s ({bilan['lignes_par_s']} lignes/s).")
+    if bilan["rejetees"]:
+        print(f" Lignes rejetées : {bilan['fichier_rejets']}")
+    return 0
+
+
+# ==========================================================
+# Point d’entrée du script
+# ==========================================================
+if __name__ == "__main__":
+    raise SystemExit(main())
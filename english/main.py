@@ -2,13 +2,31 @@
 # Importations nécessaires
 # ==========================================================
 
-# Import de la fonction 'init_pool' pour initialiser la connexion sécurisée
+# Import des fonctions 'init_pool' / 'close_pool' pour ouvrir et fermer la connexion sécurisée
 # à la base de données via un pool de connexions (dans database/pool.py)
-from database.pool import init_pool
+from database.pool import init_pool, close_pool
 
 # Import du contrôleur principal qui gère les inscriptions et connexions utilisateurs
 from controllers.auth_controller import AuthController
 
+# Import de la fonction d'arrêt du pool de hachage des mots de passe
+from models.hash_executor import fermer_hash_executor
+
+# Import de la fonction d'arrêt de la file des transferts groupés
+from models.transfert_model import fermer_file_transferts
+
+# Import du répartiteur de notifications (branchement sur les transferts, arrêt propre)
+from models.notification_model import brancher_transferts, fermer_notification_dispatcher
+
+# Import des alertes de solde faible (ensemble en mémoire des portefeuilles sous le seuil)
+from models.alerte_solde_model import demarrer_alertes_solde, arreter_alertes_solde
+
+# Index mémoire des emails et numéros déjà utilisés (vérification des doublons sans requête SQL)
+from models.index_existence import get_index_existence
+
+# Paramètres de l'application (activation de l'index)
+from config import Config
+
 
 # ==========================================================
 # Fonction principale : main()
@@ -27,6 +45,23 @@ def main():
         print(" Erreur de connexion à la base :", e)
         return
 
+    # Construction de l'index des emails/numéros existants (facultatif)
+    if Config.INDEX_EXISTENCE:
+        try:
+            get_index_existence().charger()
+        except Exception as e:
+            # Sans index, les doublons sont simplement vérifiés en base
+            print(" Index des utilisateurs indisponible :", e)
+
+    # Notifications automatiques (en file, hors transaction) après chaque transfert
+    brancher_transferts()
+
+    # Alertes de solde faible (un seul parcours des portefeuilles au démarrage)
+    try:
+        demarrer_alertes_solde()
+    except Exception as e:
+        print(" Alertes de solde indisponibles :", e)
+
     # Boucle principale du menu textuel (interface console)
     while True:
         # Affichage du menu de navigation principal
@@ -50,6 +85,11 @@ def main():
         elif choix == "3":
             # Sort proprement du programme
             print("Au revoir.")
+            arreter_alertes_solde()
+            fermer_file_transferts()
+            fermer_notification_dispatcher()
+            fermer_hash_executor()
+            close_pool()
             break
 
         else:
@@ -0,0 +1,63 @@
+# ==========================================================
+# Importations nécessaires
+# ==========================================================
+
+# 'argparse' : lecture des options de la ligne de commande
+import argparse
+
+# Pilote PostgreSQL (erreurs de connexion et de migration)
+import psycopg2
+
+# Migrations versionnées du schéma (database/migrations/NNNN_*.sql)
+from database.migrateur import Migrateur, MigrationModifiee
+
+
+# ==========================================================
+# Fonction principale : main()
+# ----------------------------------------------------------
+# Met le schéma de la base du .env à jour (schéma de référence :
+# database/migrations/). À lancer à chaque déploiement, avant
+# le démarrage de l'application ; sans effet si tout est appliqué.
+#
+# Exemples :
+#   python migrer.py
+#   python migrer.py --etat
+#   python migrer.py --jusqu-a 0002
+# ==========================================================
+def main():
+    parser = argparse.ArgumentParser(description="Migrations du schéma PostgreSQL EBPay.")
+    parser.add_argument("--etat", action="store_true", help="affiche les migrations appliquées / en attente")
+    parser.add_argument("--jusqu-a", help="dernière version à appliquer (ex : 0002)")
+    args = parser.parse_args()
+
+    try:
+        migrateur = Migrateur()
+    except psycopg2.OperationalError as e:
+        print(" Erreur de connexion à la base :", e)
+        return 1
+
+    try:
+        if args.etat:
+            for version, nom, statut in migrateur.etat():
+                print(f" {version}  {nom:<30} {statut}")
+            return 0
+
+        faites = migrateur.appliquer(args.jusqu_a)
+    except (MigrationModifiee, psycopg2.Error, RuntimeError) as e:
+        print(" Migration interrompue :", e)
+        return 1
+    finally:
+        migrateur.fermer()
+
+    if faites:
+        print(f"✅ {len(faites)} migration(s) appliquée(s) : {', '.join(faites)}")
+    else:
+        print("✅ Schéma à jour.")
+    return 0
+
+
+# ==========================================================
+# Point d’entrée du script
+# ==========================================================
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,378 @@
+# ==========================================================
+# Importations des bibliothèques nécessaires
+# ==========================================================
+import json, select, threading  # Messages NOTIFY, attente sur le socket et thread d'écoute
+from decimal import Decimal, InvalidOperation  # Soldes et seuils exacts
+from typing import NamedTuple  # Portefeuille en alerte
+import psycopg2  # Connexion dédiée à l'écoute (LISTEN)
+from config import Config  # Seuils et activation de l'écoute
+from database.pool import get_conn_cursor, unite_courante, curseur_nomme  # Chargement initial des portefeuilles sous le seuil
+from models.transfert_model import abonner  # Mise à jour depuis le chemin des transferts
+from models.notification_model import get_notification_dispatcher  # Notification "solde faible"
+
+# Canal NOTIFY alimenté par le déclencheur de database/sql/alerte_solde.sql
+CANAL = "portefeuille_solde"
+DECLENCHEUR = "portefeuille_solde_notify"
+
+
+# ==========================================================
+# Fonction : lire_seuils
+# ----------------------------------------------------------
+# "XAF:5000,EUR:10" → {"XAF": Decimal("5000"), "EUR": Decimal("10")}
+# ==========================================================
+def lire_seuils(texte):
+    seuils = {}
+    for element in (texte or "").split(","):
+        if ":" in element:
+            devise, seuil = element.split(":", 1)
+            seuils[devise.strip().upper()] = Decimal(seuil.strip())
+    return seuils
+
+
+# ==========================================================
+# Enregistrement : PortefeuilleEnAlerte
+# ==========================================================
+class PortefeuilleEnAlerte(NamedTuple):
+    portefeuille_id: str
+    utilisateur_id: str
+    devise: str
+    solde: Decimal
+    seuil: Decimal
+
+
+# ==========================================================
+# Classe : AlertesSolde
+# ----------------------------------------------------------
+# Ensemble en mémoire des portefeuilles dont le solde est sous
+# le seuil de leur devise (remplace les lectures de la vue
+# vue_portefeuilles_alerte, qui parcourt toute la table).
+#
+# - chargé une fois au démarrage (un seul parcours)
+# - tenu à jour à chaque changement de solde :
+#     * par les transferts (abonné de TransferService)
+#     * ou par LISTEN/NOTIFY (ALERTE_LISTEN=1), qui voit aussi
+#       les modifications faites hors de l'application
+# - les passages sous le seuil déclenchent les abonnés (ex :
+#   notification "solde faible")
+#
+# Les abonnés des transferts sont appelés après le commit, dans
+# le thread de chaque transfert : deux transferts simultanés sur
+# un même portefeuille peuvent être vus dans le désordre. L'écoute
+# NOTIFY (messages livrés dans l'ordre des commits) est exacte :
+# quand elle est active, elle est la seule source (un transfert
+# vu en retard écraserait un solde plus récent).
+# ==========================================================
+class AlertesSolde:
+
+    def __init__(self, seuils=None, seuil_defaut=None):
+        self.seuils = seuils if seuils is not None else lire_seuils(Config.ALERTE_SEUILS)
+        self.seuil_defaut = Decimal(str(seuil_defaut if seuil_defaut is not None else Config.ALERTE_SEUIL_DEFAUT))
+        self._en_alerte = {}    # portefeuille_id -> PortefeuilleEnAlerte
+        self._journaux = []     # changements reçus pendant un chargement (rejoués après)
+        self._lock = threading.Lock()
+        self._abonnes = []
+        self.charge = False
+
+    def seuil(self, devise):
+        return self.seuils.get((devise or "").upper(), self.seuil_defaut)
+
+    def seuil_max(self):
+        """Plus élevé des seuils : argument attendu du déclencheur NOTIFY."""
+        return max([self.seuil_defaut, *self.seuils.values()])
+
+    def _noter(self, portefeuille_id, alerte):
+        # Appelé sous verrou : 'alerte' vaut None quand le portefeuille sort de l'ensemble
+        if alerte is None:
+            self._en_alerte.pop(portefeuille_id, None)
+        else:
+            self._en_alerte[portefeuille_id] = alerte
+        for journal in self._journaux:
+            journal.append((portefeuille_id, alerte))
+
+    # ------------------------------------------------------
+    # Chargement initial
+    # ------------------------------------------------------
+    def charger(self, taille_lot=10000):
+        """
+        Construit l'ensemble à partir de la table portefeuille (un parcours,
+        lu par lots via un curseur nommé). Les changements reçus pendant le
+        parcours sont rejoués sur le nouvel ensemble avant de le publier.
+
+        Returns:
+            int: nombre de portefeuilles en alerte
+        """
+        seuil_max = self.seuil_max()
+        en_alerte = {}
+        journal = []
+        with self._lock:
+            self._journaux.append(journal)
+
+        try:
+            self._parcourir(seuil_max, en_alerte, taille_lot)
+        except BaseException:
+            with self._lock:
+                self._journaux.remove(journal)
+            raise
+
+        # Rejeu et remplacement sous le même verrou : aucun changement ne se perd entre les deux
+        with self._lock:
+            self._journaux.remove(journal)
+            for portefeuille_id, alerte in journal:
+                if alerte is None:
+                    en_alerte.pop(portefeuille_id, None)
+                else:
+                    en_alerte[portefeuille_id] = alerte
+            self._en_alerte = en_alerte
+            self.charge = True
+        return len(en_alerte)
+
+    def _parcourir(self, seuil_max, en_alerte, taille_lot):
+        with get_conn_cursor() as (conn, _):
+            with curseur_nomme(conn, "alertes_solde") as cur:
+                cur.itersize = taille_lot
+                cur.execute(
+                    "SELECT id::text, utilisateur_id::text, devise, solde FROM public.portefeuille WHERE solde < %s",
+                    (seuil_max,)
+                )
+                for portefeuille_id, utilisateur_id, devise, solde in cur:
+                    seuil = self.seuil(devise)
+                    if solde < seuil:
+                        en_alerte[portefeuille_id] = PortefeuilleEnAlerte(
+                            portefeuille_id, utilisateur_id, devise, solde, seuil)
+            # Dans une unité de travail, un rollback annulerait aussi ses écritures
+            if unite_courante() is None:
+                conn.rollback()
+
+    # ------------------------------------------------------
+    # Mise à jour incrémentale
+    # ------------------------------------------------------
+    def mettre_a_jour(self, portefeuille_id, utilisateur_id, devise, solde):
+        """
+        Enregistre le nouveau solde d'un portefeuille.
+
+        Returns:
+            bool: True si le portefeuille vient de passer sous le seuil
+        """
+        seuil = self.seuil(devise)
+        solde = Decimal(str(solde))
+        with self._lock:
+            etait_en_alerte = portefeuille_id in self._en_alerte
+            if solde < seuil:
+                self._noter(portefeuille_id, PortefeuilleEnAlerte(
+                    portefeuille_id, utilisateur_id, devise, solde, seuil))
+            else:
+                self._noter(portefeuille_id, None)
+            franchi = solde < seuil and not etait_en_alerte
+
+        if franchi:
+            alerte = PortefeuilleEnAlerte(portefeuille_id, utilisateur_id, devise, solde, seuil)
+            for callback in list(self._abonnes):
+                try:
+                    callback(alerte)
+                except Exception as e:
+                    print(" Erreur d'un abonné aux alertes de solde :", e)
+        return franchi
+
+    def retirer(self, portefeuille_id):
+        with self._lock:
+            self._noter(portefeuille_id, None)
+
+    def abonner(self, callback):
+        """Enregistre 'callback(PortefeuilleEnAlerte)' appelé à chaque passage sous le seuil."""
+        if callback not in self._abonnes:
+            self._abonnes.append(callback)
+
+    # ------------------------------------------------------
+    # Consultation (sans requête SQL)
+    # ------------------------------------------------------
+    def portefeuilles_en_alerte(self, devise=None):
+        """Portefeuilles sous le seuil, du solde le plus bas au plus haut."""
+        with self._lock:
+            alertes = list(self._en_alerte.values())
+        if devise is not None:
+            alertes = [a for a in alertes if a.devise == devise.upper()]
+        return sorted(alertes, key=lambda a: a.solde)
+
+    def est_en_alerte(self, portefeuille_id):
+        with self._lock:
+            return str(portefeuille_id) in self._en_alerte
+
+    def __len__(self):
+        with self._lock:
+            return len(self._en_alerte)
+
+    # ------------------------------------------------------
+    # Abonné des transferts
+    # ------------------------------------------------------
+    def _apres_transferts(self, effectues):
+        # Dernier solde connu de chaque portefeuille dans le lot
+        derniers = {}
+        for t in effectues:
+            derniers[t.portefeuille_expediteur] = (t.expediteur_id, t.devise, t.solde_expediteur)
+            derniers[t.portefeuille_destinataire] = (t.destinataire_id, t.devise, t.solde_destinataire)
+        for portefeuille_id, (utilisateur_id, devise, solde) in derniers.items():
+            if portefeuille_id is not None:
+                self.mettre_a_jour(portefeuille_id, utilisateur_id, devise, solde)
+
+
+# ==========================================================
+# Classe : EcouteSoldes
+# ----------------------------------------------------------
+# Thread qui écoute le canal NOTIFY 'portefeuille_solde' sur une
+# connexion dédiée (hors pool : elle reste ouverte en
+# permanence). Après une coupure, l'ensemble est rechargé car
+# les messages émis pendant la coupure sont perdus.
+# ==========================================================
+class EcouteSoldes:
+
+    def __init__(self, alertes):
+        self.alertes = alertes
+        self._arret = threading.Event()
+        self._thread = threading.Thread(target=self._boucle, name="ecoute-soldes", daemon=True)
+
+    def demarrer(self):
+        self._thread.start()
+
+    def _connecter(self):
+        conn = psycopg2.connect(
+            host=Config.PG_HOST, port=Config.PG_PORT, database=Config.PG_DBNAME,
+            user=Config.PG_USER, password=Config.PG_PASSWORD, sslmode=Config.PG_SSLMODE
+        )
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute(f"LISTEN {CANAL}")
+        return conn
+
+    def _boucle(self):
+        delai = 1
+        while not self._arret.is_set():
+            conn = None
+            try:
+                conn = self._connecter()
+                # Les changements antérieurs à l'écoute sont relus en base
+                self.alertes.charger()
+                delai = 1
+                while not self._arret.is_set():
+                    if select.select([conn], [], [], 1.0)[0]:
+                        conn.poll()
+                        while conn.notifies:
+                            self._traiter(conn.notifies.pop(0).payload)
+            except Exception as e:
+                print(" Écoute des soldes interrompue :", e)
+                self._arret.wait(delai)
+                delai = min(delai * 2, 60)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+    def _traiter(self, message):
+        # Un message mal formé est ignoré : il ne doit pas forcer une reconnexion
+        # (et donc un rechargement complet)
+        try:
+            donnees = json.loads(message, parse_float=Decimal)
+        except ValueError:
+            return
+        if not isinstance(donnees, dict) or donnees.get("id") is None:
+            return
+        try:
+            if donnees.get("supprime"):
+                self.alertes.retirer(str(donnees["id"]))
+            elif donnees.get("solde") is not None:
+                self.alertes.mettre_a_jour(str(donnees["id"]), donnees.get("utilisateur_id"),
+                                           donnees.get("devise"), donnees["solde"])
+        except (InvalidOperation, TypeError, ValueError, AttributeError):
+            return
+
+    def arreter(self):
+        self._arret.set()
+        self._thread.join(timeout=5)
+
+
+# ==========================================================
+# Instance globale partagée
+# ==========================================================
+_alertes = None
+_ecoute = None
+_alertes_lock = threading.Lock()
+
+
+def get_alertes_solde():
+    """Retourne l'ensemble global des portefeuilles en alerte, créé à la première utilisation."""
+    global _alertes
+
+    if _alertes is None:
+        with _alertes_lock:
+            if _alertes is None:
+                _alertes = AlertesSolde()
+    return _alertes
+
+
+def verifier_declencheur(alertes):
+    """
+    Vérifie que le déclencheur NOTIFY (database/sql/alerte_solde.sql) est
+    installé avec un seuil au moins égal au plus élevé des seuils configurés :
+    sinon, les passages sous un seuil plus élevé ne seraient jamais publiés.
+
+    Returns:
+        str | None: message d'avertissement, ou None si tout est correct
+    """
+    with get_conn_cursor() as (conn, cur):
+        cur.execute(
+            "SELECT tgargs FROM pg_trigger WHERE tgname = %s AND tgrelid = 'public.portefeuille'::regclass",
+            (DECLENCHEUR,)
+        )
+        ligne = cur.fetchone()
+        if unite_courante() is None:
+            conn.rollback()
+
+    if ligne is None:
+        return "déclencheur NOTIFY absent (psql -v seuil=... -f database/sql/alerte_solde.sql)"
+    try:
+        seuil = Decimal(bytes(ligne[0]).split(b"\x00")[0].decode())
+    except (InvalidOperation, UnicodeDecodeError):
+        return "seuil du déclencheur NOTIFY illisible"
+    if seuil < alertes.seuil_max():
+        return (f"seuil du déclencheur NOTIFY ({seuil}) inférieur au seuil configuré "
+                f"({alertes.seuil_max()}) : réinstaller database/sql/alerte_solde.sql")
+    return None
+
+
+def _notifier_solde_faible(alerte):
+    get_notification_dispatcher().envoyer(
+        alerte.utilisateur_id, "Solde faible",
+        f"Votre solde est de {alerte.solde} {alerte.devise}, sous le seuil de {alerte.seuil} {alerte.devise}.",
+        "SYSTEME"
+    )
+
+
+def demarrer_alertes_solde():
+    """
+    Charge l'ensemble des portefeuilles en alerte et branche sa source de
+    mise à jour : l'écoute NOTIFY si ALERTE_LISTEN=1, sinon les transferts.
+    """
+    global _ecoute
+
+    alertes = get_alertes_solde()
+    alertes.abonner(_notifier_solde_faible)
+
+    if Config.ALERTE_LISTEN:
+        avertissement = verifier_declencheur(alertes)
+        if avertissement:
+            print(" Alertes de solde :", avertissement)
+        with _alertes_lock:
+            if _ecoute is None:
+                _ecoute = EcouteSoldes(alertes)
+                _ecoute.demarrer()   # charge l'ensemble après s'être mis à l'écoute
+    else:
+        abonner(alertes._apres_transferts)
+        alertes.charger()
+
+
+def arreter_alertes_solde():
+    """Arrête l'écoute NOTIFY (si elle a été démarrée)."""
+    global _ecoute
+
+    with _alertes_lock:
+        if _ecoute is not None:
+            _ecoute.arreter()
+            _ecoute = None
@@ -0,0 +1,62 @@
+# ==========================================================
+# Importations nécessaires
+# ==========================================================
+
+# 'threading' / 'time' : accès concurrent protégé par verrou et expiration des entrées
+import threading
+import time
+
+# 'OrderedDict' : conserve l'ordre d'utilisation pour évincer l'entrée la moins récente (LRU)
+from collections import OrderedDict
+
+
+# ==========================================================
+# Classe : TTLCache
+# ----------------------------------------------------------
+# Cache mémoire borné, partagé entre threads :
+# - chaque entrée expire après 'ttl' secondes
+# - au-delà de 'taille_max' entrées, la moins récemment utilisée
+#   est évincée (LRU)
+# ==========================================================
+class TTLCache:
+
+    def __init__(self, taille_max, ttl):
+        self.taille_max = taille_max
+        self.ttl = ttl
+        self._donnees = OrderedDict()  # cle -> (expiration, valeur)
+        self._lock = threading.Lock()
+
+    def get(self, cle, defaut=None):
+        """Retourne la valeur associée à 'cle' si elle existe et n'a pas expiré."""
+        with self._lock:
+            entree = self._donnees.get(cle)
+            if entree is None:
+                return defaut
+            if entree[0] <= time.monotonic():
+                del self._donnees[cle]
+                return defaut
+            self._donnees.move_to_end(cle)
+            return entree[1]
+
+    def set(self, cle, valeur, ttl=None):
+        """Ajoute ou remplace une entrée ; 'ttl' permet de raccourcir sa durée de vie."""
+        expiration = time.monotonic() + (self.ttl if ttl is None else min(ttl, self.ttl))
+        with self._lock:
+            self._donnees[cle] = (expiration, valeur)
+            self._donnees.move_to_end(cle)
+            while len(self._donnees) > self.taille_max:
+                self._donnees.popitem(last=False)
+
+    def pop(self, cle, defaut=None):
+        """Supprime une entrée et retourne sa valeur (ou 'defaut')."""
+        with self._lock:
+            entree = self._donnees.pop(cle, None)
+        return defaut if entree is None else entree[1]
+
+    def clear(self):
+        with self._lock:
+            self._donnees.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._donnees)
@@ -0,0 +1,20 @@
+# ==========================================================
+# Importations nécessaires
+# ==========================================================
+
+# 'base64' : encodage des jetons de session, codes QR et curseurs de pagination
+import base64
+
+
+# ==========================================================
+# Fonctions utilitaires : encodage base64 "url-safe" sans '='
+# ----------------------------------------------------------
+# Partagées par les jetons signés (sessions, codes QR) et les
+# curseurs de pagination de l'historique.
+# ==========================================================
+def b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def unb64(texte: str) -> bytes:
+    return base64.urlsafe_b64decode(texte + "=" * (-len(texte) % 4))
@@ -0,0 +1,299 @@
+# ==========================================================
+# Importations des bibliothèques nécessaires
+# ==========================================================
+import gzip, json, os, threading, time  # Fichiers compressés, tube COPY → Parquet et mesure du débit
+from concurrent.futures import ThreadPoolExecutor  # Partitions exportées en parallèle
+from datetime import date, timedelta  # Découpage par jour
+from typing import NamedTuple, Optional  # Description d'une partition
+from config import Config  # Taille du pool (nombre de connexions utilisables)
+from database.pool import get_conn_cursor, unite_courante  # Connexions issues du pool
+
+# 'pyarrow' est facultatif : il n'est nécessaire que pour l'export en colonnes (Parquet)
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pa_parquet
+except ImportError:
+    pa = None
+
+
+# ==========================================================
+# Colonnes exportées par table (type utilisé pour le format Parquet)
+# ==========================================================
+COLONNES = {
+    "transaction": (
+        ("id", "uuid"), ("date", "timestamp"), ("montant", "numeric"), ("devise", "texte"),
+        ("type", "texte"), ("statut", "texte"), ("methode_paiement", "texte"),
+        ("moyen_paiement", "texte"), ("fournisseur", "texte"),
+        ("expediteur_id", "uuid"), ("destinataire_id", "uuid"),
+        ("reference_externe", "texte"), ("frais", "reel"), ("commission", "reel"),
+        ("message", "texte"),
+    ),
+    "portefeuille": (
+        ("id", "uuid"), ("utilisateur_id", "uuid"), ("solde", "numeric"), ("devise", "texte"),
+        ("fournisseur", "texte"), ("statut", "texte"), ("numero_compte", "texte"),
+        ("derniere_transaction_id", "uuid"), ("date_derniere_mise_a_jour", "timestamp"),
+    ),
+}
+
+FORMATS = ("csv", "parquet")
+
+# Partition des lignes qui ne concernent aucun marchand (export par marchand)
+SANS_MARCHAND = "aucun"
+
+
+def _type_arrow(type_colonne):
+    return {
+        "uuid": pa.string(),
+        "texte": pa.string(),
+        "timestamp": pa.timestamp("us"),
+        "numeric": pa.decimal128(12, 2),
+        "reel": pa.float64(),
+    }[type_colonne]
+
+
+# ==========================================================
+# Enregistrement : Partition
+# ----------------------------------------------------------
+# Une partie de l'export : une table, éventuellement limitée à
+# un jour et/ou à un marchand, écrite dans un fichier.
+# marchand_id = SANS_MARCHAND : lignes sans aucun marchand (une
+# transaction entre deux marchands figure chez chacun des deux).
+# ==========================================================
+class Partition(NamedTuple):
+    table: str
+    jour: Optional[date]
+    marchand_id: Optional[str]
+    chemin: str
+
+    def requete(self):
+        """Requête COPY (SELECT ...) et ses paramètres."""
+        colonnes = ", ".join(nom for nom, _ in COLONNES[self.table])
+        conditions, params = [], []
+
+        if self.table == "transaction":
+            if self.jour is not None:
+                conditions.append("date >= %s AND date < %s")
+                params += [self.jour, self.jour + timedelta(days=1)]
+            if self.marchand_id == SANS_MARCHAND:
+                conditions.append("NOT EXISTS (SELECT 1 FROM public.utilisateur u WHERE u.role = 'MARCHAND'"
+                                  " AND u.id IN (expediteur_id, destinataire_id))")
+            elif self.marchand_id is not None:
+                conditions.append("(expediteur_id = %s OR destinataire_id = %s)")
+                params += [self.marchand_id, self.marchand_id]
+        elif self.marchand_id == SANS_MARCHAND:
+            conditions.append("NOT EXISTS (SELECT 1 FROM public.utilisateur u WHERE u.role = 'MARCHAND'"
+                              " AND u.id = utilisateur_id)")
+        elif self.marchand_id is not None:
+            conditions.append("utilisateur_id = %s")
+            params.append(self.marchand_id)
+
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        # Transactions dans l'ordre chronologique (ordre de l'index sur date)
+        ordre = " ORDER BY date, id" if self.table == "transaction" else ""
+        return f"SELECT {colonnes} FROM public.{self.table}{where}{ordre}", params
+
+
+# ==========================================================
+# Classe : ExportReleves
+# ----------------------------------------------------------
+# Export des tables transaction / portefeuille pour le
+# rapprochement comptable :
+# - COPY ... TO STDOUT écrit directement dans le fichier gzip
+#   (ou dans un tube lu par pyarrow) : mémoire constante
+# - partitions par jour et, en option, par marchand (plus une
+#   partition "marchand=aucun" : aucune ligne n'est omise)
+# - partitions exportées en parallèle sur des connexions du
+#   pool, toutes dans le même instantané de la base
+#   (pg_export_snapshot) : les fichiers sont cohérents entre eux
+#
+# Arborescence produite (style "clé=valeur", lisible par les
+# outils d'analyse) :
+#   <dossier>/transaction/jour=2026-10-17/[marchand=<id>|aucun/]transaction.csv.gz
+#   <dossier>/portefeuille/[marchand=<id>|aucun/]portefeuille.csv.gz
+#   <dossier>/manifeste.json
+# ==========================================================
+class ExportReleves:
+
+    def __init__(self, dossier, du=None, au=None, tables=("transaction", "portefeuille"),
+                 par_marchand=False, format_fichier="csv", workers=None):
+        if format_fichier not in FORMATS:
+            raise ValueError(f"Format inconnu : {format_fichier}")
+        if format_fichier == "parquet" and pa is None:
+            raise RuntimeError("Le format parquet nécessite pyarrow (pip install pyarrow).")
+        for table in tables:
+            if table not in COLONNES:
+                raise ValueError(f"Table non exportable : {table}")
+
+        hier = date.today() - timedelta(days=1)
+        self.dossier = dossier
+        self.du = du or hier
+        self.au = au or self.du
+        if self.au < self.du:
+            raise ValueError("La date de fin précède la date de début.")
+        self.tables = tuple(tables)
+        self.par_marchand = par_marchand
+        self.format = format_fichier
+
+        # Une connexion du pool reste réservée à l'instantané partagé
+        self.workers = max(1, min(workers or 4, Config.PG_POOL_MAX - 1))
+        self.resultats = []
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------
+    # Méthode principale : executer
+    # ------------------------------------------------------
+    def executer(self):
+        """
+        Exporte toutes les partitions et écrit le manifeste.
+
+        Returns:
+            dict: bilan (partitions, lignes, octets, durée, fichier manifeste)
+        """
+        debut = time.perf_counter()
+
+        with get_conn_cursor() as (conn, cur):
+            cur.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY")
+            marchands = self._marchands(cur) if self.par_marchand else [None]
+            partitions = self._partitions(marchands)
+
+            if Config.PG_POOL_MAX < 2:
+                # Pool d'une seule connexion : export séquentiel dans la transaction courante
+                for partition in partitions:
+                    self._exporter(cur, partition)
+            else:
+                cur.execute("SELECT pg_export_snapshot()")
+                instantane = cur.fetchone()[0]
+                with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="export") as pool:
+                    # list() propage la première erreur rencontrée
+                    list(pool.map(lambda p: self._exporter_partition(p, instantane), partitions))
+            # Dans une unité de travail, un rollback annulerait aussi ses écritures
+            if unite_courante() is None:
+                conn.rollback()
+
+        return self._ecrire_manifeste(time.perf_counter() - debut)
+
+    # ------------------------------------------------------
+    # Préparation des partitions
+    # ------------------------------------------------------
+    def _marchands(self, cur):
+        cur.execute("SELECT id::text FROM public.utilisateur WHERE role = 'MARCHAND' ORDER BY id")
+        return [ligne[0] for ligne in cur.fetchall()] + [SANS_MARCHAND]
+
+    def _partitions(self, marchands):
+        extension = "csv.gz" if self.format == "csv" else "parquet"
+        partitions = []
+
+        for table in self.tables:
+            # Les portefeuilles sont un état à l'instant de l'export : pas de découpage par jour
+            jours = [None]
+            if table == "transaction":
+                jours = [self.du + timedelta(days=i) for i in range((self.au - self.du).days + 1)]
+
+            for jour in jours:
+                for marchand_id in marchands:
+                    dossier = os.path.join(self.dossier, table)
+                    if jour is not None:
+                        dossier = os.path.join(dossier, f"jour={jour.isoformat()}")
+                    if marchand_id is not None:
+                        dossier = os.path.join(dossier, f"marchand={marchand_id}")
+                    partitions.append(Partition(table, jour, marchand_id,
+                                                os.path.join(dossier, f"{table}.{extension}")))
+        return partitions
+
+    # ------------------------------------------------------
+    # Export d'une partition
+    # ------------------------------------------------------
+    def _exporter_partition(self, partition, instantane):
+        """Exporte une partition sur sa propre connexion, dans l'instantané partagé."""
+        with get_conn_cursor() as (conn, cur):
+            cur.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY")
+            cur.execute("SET TRANSACTION SNAPSHOT %s", (instantane,))
+            self._exporter(cur, partition)
+            if unite_courante() is None:
+                conn.rollback()
+
+    def _exporter(self, cur, partition):
+        requete, params = partition.requete()
+        copy_sql = f"COPY ({cur.mogrify(requete, params).decode()}) TO STDOUT WITH (FORMAT csv, HEADER)"
+
+        os.makedirs(os.path.dirname(partition.chemin), exist_ok=True)
+        temporaire = partition.chemin + ".tmp"
+        try:
+            if self.format == "csv":
+                with gzip.open(temporaire, "wb", compresslevel=6) as sortie:
+                    cur.copy_expert(copy_sql, sortie)
+            else:
+                self._copier_parquet(cur, copy_sql, partition.table, temporaire)
+            lignes = cur.rowcount
+            os.replace(temporaire, partition.chemin)
+        except BaseException:
+            if os.path.exists(temporaire):
+                os.remove(temporaire)
+            raise
+
+        with self._lock:
+            self.resultats.append({
+                "table": partition.table,
+                "jour": partition.jour.isoformat() if partition.jour else None,
+                "marchand_id": partition.marchand_id,
+                "fichier": os.path.relpath(partition.chemin, self.dossier),
+                "lignes": lignes,
+                "octets": os.path.getsize(partition.chemin),
+            })
+
+    def _copier_parquet(self, cur, copy_sql, table, chemin):
+        """
+        Le COPY est écrit dans un tube par un thread ; pyarrow lit le tube
+        par blocs et écrit chaque bloc dans le fichier Parquet.
+        """
+        colonnes = COLONNES[table]
+        schema = {nom: _type_arrow(type_colonne) for nom, type_colonne in colonnes}
+        lecture, ecriture = os.pipe()
+        erreurs = []
+
+        def produire():
+            try:
+                with os.fdopen(ecriture, "wb") as tube:
+                    cur.copy_expert(copy_sql, tube)
+            except Exception as e:
+                erreurs.append(e)
+
+        producteur = threading.Thread(target=produire, daemon=True)
+        producteur.start()
+        try:
+            # Fermer le tube (même en cas d'erreur) débloque le producteur
+            with os.fdopen(lecture, "rb") as tube:
+                lecteur = pa_csv.open_csv(
+                    tube,
+                    convert_options=pa_csv.ConvertOptions(column_types=schema, strings_can_be_null=True),
+                )
+                with pa_parquet.ParquetWriter(chemin, lecteur.schema, compression="zstd") as sortie:
+                    for bloc in lecteur:
+                        sortie.write_batch(bloc)
+        finally:
+            producteur.join()
+        if erreurs:
+            raise erreurs[0]
+
+    # ------------------------------------------------------
+    # Manifeste
+    # ------------------------------------------------------
+    def _ecrire_manifeste(self, duree):
+        resultats = sorted(self.resultats, key=lambda r: r["fichier"])
+        bilan = {
+            "du": self.du.isoformat(),
+            "au": self.au.isoformat(),
+            "format": self.format,
+            "partitions": len(resultats),
+            "lignes": sum(r["lignes"] for r in resultats),
+            "octets": sum(r["octets"] for r in resultats),
+            "duree_s": round(duree, 2),
+            "fichiers": resultats,
+        }
+        chemin = os.path.join(self.dossier, "manifeste.json")
+        os.makedirs(self.dossier, exist_ok=True)
+        with open(chemin, "w", encoding="utf-8") as f:
+            json.dump(bilan, f, indent=2, ensure_ascii=False)
+        bilan["manifeste"] = chemin
+        return bilan
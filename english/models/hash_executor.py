@@ -0,0 +1,315 @@
+# ==========================================================
+# Importations nécessaires
+# ==========================================================
+
+# 'threading' : sémaphore bornée pour limiter le nombre de tâches en attente (back-pressure)
+import threading
+
+# 'asyncio' / 'time' : attente non bloquante d'une place dans la file depuis une coroutine, durées
+import asyncio
+import time
+
+# 'deque' : file FIFO des coroutines en attente d'une place
+from collections import deque
+
+# 'concurrent.futures' : pools de threads / de processus et gestion des résultats (Future)
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+
+# 'Config' : nombre de workers, taille de file et délais lus depuis le fichier .env
+from config import Config
+
+# Métriques optionnelles : durée des hachages, pour la distinguer de la latence base de données
+from database.metrics import get_metriques
+
+
+# ==========================================================
+# Exception : HachageIndisponible
+# ----------------------------------------------------------
+# Levée lorsque l'exécuteur est saturé (file pleine) ou que le
+# calcul du hash dépasse le délai autorisé.
+# ==========================================================
+class HachageIndisponible(RuntimeError):
+    pass
+
+
+def _reveiller(signal):
+    if not signal.done():
+        signal.set_result(None)
+
+
+class _Attente:
+    """Coroutine en attente d'une place (executer_async) ; protégée par _attentes_lock."""
+    __slots__ = ("boucle", "signal", "place", "abandonnee")
+
+    def __init__(self, boucle):
+        self.boucle = boucle
+        self.signal = boucle.create_future()
+        self.place = False        # place remise par _liberer
+        self.abandonnee = False   # délai dépassé ou coroutine annulée
+
+
+# ==========================================================
+# Classe : HashExecutor
+# ----------------------------------------------------------
+# Exécute les calculs PBKDF2 sur un pool de workers dédié afin
+# que les connexions/inscriptions simultanées se répartissent
+# sur tous les cœurs au lieu de s'exécuter sur le thread appelant.
+#
+# - mode "thread"  : hashlib relâche le GIL pendant PBKDF2,
+#                    un pool de threads suffit à occuper les cœurs
+# - mode "process" : isolation complète dans des processus séparés
+#
+# La file d'attente est bornée : au-delà de 'taille_file' tâches
+# en attente, les nouvelles soumissions attendent au plus
+# 'delai_file' secondes puis échouent (back-pressure).
+# ==========================================================
+class HashExecutor:
+
+    def __init__(self, workers=None, taille_file=None, delai_file=None, delai_resultat=None, mode=None):
+        self.workers = workers or Config.HASH_WORKERS
+        self.taille_file = taille_file if taille_file is not None else Config.HASH_QUEUE_MAX
+        self.delai_file = delai_file if delai_file is not None else Config.HASH_QUEUE_TIMEOUT
+        self.delai_resultat = delai_resultat if delai_resultat is not None else Config.HASH_TIMEOUT
+        self.mode = (mode or Config.HASH_EXECUTOR).lower()
+
+        # Création du pool de workers selon le mode choisi
+        if self.mode == "process":
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="hash")
+
+        # Nombre maximal de tâches acceptées simultanément (en cours + en attente)
+        self._places = threading.BoundedSemaphore(self.workers + self.taille_file)
+
+        # Coroutines en attente d'une place (FIFO) : chaque place libérée est
+        # remise à la première, sans passer par la sémaphore
+        self._attentes = deque()
+        self._attentes_lock = threading.Lock()
+
+        # Thread des suites de tâches d'arrière-plan (ex : UPDATE du hash) : elles
+        # n'occupent ni un worker de hachage ni le thread de gestion du pool de processus
+        self._suites = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hash-suite")
+
+    # ------------------------------------------------------
+    # Méthode : soumettre
+    # ------------------------------------------------------
+    def soumettre(self, fn, *args, bloquant=True):
+        """
+        Soumet une fonction de hachage au pool.
+
+        Args:
+            fn (callable): fonction à exécuter (doit être picklable en mode "process")
+            *args: arguments transmis à la fonction
+            bloquant (bool): si False, échoue immédiatement quand la file est pleine
+
+        Returns:
+            Future: résultat à récupérer avec .result() ou asyncio.wrap_future()
+
+        Raises:
+            HachageIndisponible: si aucune place ne se libère à temps
+        """
+        if bloquant:
+            obtenu = self._places.acquire(timeout=self.delai_file)
+        else:
+            obtenu = self._places.acquire(blocking=False)
+
+        if not obtenu:
+            raise HachageIndisponible("File de hachage saturée, réessayez plus tard.")
+        return self._lancer(fn, *args)
+
+    def _lancer(self, fn, *args):
+        """Soumet au pool une tâche dont la place est déjà obtenue."""
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._liberer()
+            raise
+
+        # La place est libérée dès que la tâche est terminée (succès ou erreur)
+        future.add_done_callback(self._liberer)
+        return future
+
+    def _liberer(self, _future=None):
+        """
+        Libère une place : elle est remise à la première coroutine en attente
+        (executer_async), sinon rendue à la sémaphore. Une seule coroutine est
+        réveillée par place libérée.
+        """
+        with self._attentes_lock:
+            attente = None
+            while self._attentes:
+                suivante = self._attentes.popleft()
+                if not suivante.abandonnee:
+                    suivante.place = True
+                    attente = suivante
+                    break
+            if attente is None:
+                # Sous le verrou : une coroutine qui s'inscrit ensuite trouve la place
+                self._places.release()
+                return
+
+        try:
+            attente.boucle.call_soon_threadsafe(_reveiller, attente.signal)
+        except RuntimeError:
+            # Boucle fermée entre-temps : la place passe à la coroutine suivante
+            self._liberer()
+
+    async def _attendre_place(self, boucle, limite):
+        """
+        Attend (sans scrutation) qu'une place soit remise à cette coroutine,
+        dans l'ordre d'arrivée.
+
+        Raises:
+            HachageIndisponible: aucune place avant 'limite'
+        """
+        attente = _Attente(boucle)
+        with self._attentes_lock:
+            # Nouvelle tentative sous le verrou : aucune libération ne peut passer inaperçue
+            if self._places.acquire(blocking=False):
+                return
+            self._attentes.append(attente)
+
+        try:
+            await asyncio.wait_for(attente.signal, max(0.0, limite - boucle.time()))
+        except BaseException as e:
+            with self._attentes_lock:
+                attente.abandonnee = True
+                place = attente.place
+            if place:
+                # Place remise au même moment : elle passe à la coroutine suivante
+                self._liberer()
+            if isinstance(e, asyncio.TimeoutError):
+                raise HachageIndisponible("File de hachage saturée, réessayez plus tard.")
+            raise
+
+    # ------------------------------------------------------
+    # Méthode : executer
+    # ------------------------------------------------------
+    def executer(self, fn, *args):
+        """
+        Soumet une fonction au pool et attend son résultat.
+
+        Raises:
+            HachageIndisponible: file saturée ou délai de calcul dépassé
+        """
+        debut = time.perf_counter()
+        future = self.soumettre(fn, *args)
+        try:
+            return future.result(timeout=self.delai_resultat)
+        except FutureTimeoutError:
+            future.cancel()
+            raise HachageIndisponible("Délai de hachage dépassé.")
+        finally:
+            metriques = get_metriques()
+            if metriques is not None:
+                metriques.hachage.observer(time.perf_counter() - debut)
+
+    # ------------------------------------------------------
+    # Méthode : executer_async
+    # ------------------------------------------------------
+    async def executer_async(self, fn, *args):
+        """
+        Variante asyncio de 'executer' : ne bloque jamais la boucle d'événements.
+        Quand la file est pleine, la coroutine prend place dans une file FIFO et
+        reçoit directement la prochaine place libérée (sans scrutation).
+
+        Raises:
+            HachageIndisponible: file saturée ou délai de calcul dépassé
+        """
+        debut = time.perf_counter()
+        boucle = asyncio.get_running_loop()
+        try:
+            future = self.soumettre(fn, *args, bloquant=False)
+        except HachageIndisponible:
+            await self._attendre_place(boucle, boucle.time() + self.delai_file)
+            future = self._lancer(fn, *args)
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.delai_resultat)
+        except asyncio.TimeoutError:
+            # Comme 'executer' : une tâche encore en file n'est pas calculée pour rien
+            future.cancel()
+            raise HachageIndisponible("Délai de hachage dépassé.")
+        finally:
+            metriques = get_metriques()
+            if metriques is not None:
+                metriques.hachage.observer(time.perf_counter() - debut)
+
+    # ------------------------------------------------------
+    # Méthode : arriere_plan
+    # ------------------------------------------------------
+    def arriere_plan(self, fn, *args, callback=None):
+        """
+        Soumet une tâche sans attendre son résultat (ex : rehachage après connexion).
+        Si la file est pleine, la tâche est simplement abandonnée :
+        elle sera retentée lors d'une prochaine occasion.
+
+        Args:
+            fn (callable): fonction à exécuter dans le pool
+            *args: arguments de la fonction
+            callback (callable | None): appelé avec le résultat si la tâche réussit,
+                                        sur le thread des suites (jamais sur un worker)
+
+        Returns:
+            bool: True si la tâche a été acceptée
+        """
+        try:
+            future = self.soumettre(fn, *args, bloquant=False)
+        except HachageIndisponible:
+            return False
+
+        if callback is not None:
+            def _suite(resultat):
+                try:
+                    callback(resultat)
+                except Exception as e:
+                    # Une tâche d'arrière-plan ne doit jamais faire échouer la requête
+                    print(" Tâche de hachage en arrière-plan échouée :", e)
+
+            def _terminer(f):
+                # Appelé sur le worker (ou le thread de gestion des processus) :
+                # seule la remise au thread des suites est faite ici
+                if not f.cancelled() and f.exception() is None:
+                    try:
+                        self._suites.submit(_suite, f.result())
+                    except RuntimeError:
+                        pass   # exécuteur en cours d'arrêt
+
+            future.add_done_callback(_terminer)
+        return True
+
+    # ------------------------------------------------------
+    # Méthode : fermer
+    # ------------------------------------------------------
+    def fermer(self, attendre=True):
+        """Arrête le pool de workers (attend les tâches en cours par défaut)."""
+        self._executor.shutdown(wait=attendre)
+        self._suites.shutdown(wait=attendre)
+
+
+# ==========================================================
+# Instance globale partagée par les modèles
+# ==========================================================
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_hash_executor():
+    """Retourne l'exécuteur global, créé à la première utilisation."""
+    global _executor
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = HashExecutor()
+    return _executor
+
+
+def fermer_hash_executor(attendre=True):
+    """Arrête l'exécuteur global s'il a été créé."""
+    global _executor
+
+    with _executor_lock:
+        if _executor is not None:
+            _executor.fermer(attendre)
+            _executor = None
@@ -0,0 +1,201 @@
+# ==========================================================
+# Importations des bibliothèques nécessaires
+# ==========================================================
+from datetime import datetime  # Date de la dernière ligne d'une page
+from decimal import Decimal  # Montants des transactions
+from typing import NamedTuple, Optional  # Ligne d'historique compacte
+from database.pool import get_conn_cursor, execute_prepare, curseur_nomme  # Requêtes SQL via le pool (préparées côté serveur)
+from models.transfert_model import identifiant_uuid  # Validation de l'identifiant utilisateur
+from models.encodage import b64, unb64  # Encodage du curseur de pagination
+
+# Nombre maximal de lignes par page
+LIMITE_MAX = 200
+
+# Bornes de la première page : toutes les transactions sont "avant" ce point
+DEBUT_INFINI = ("infinity", "ffffffff-ffff-ffff-ffff-ffffffffffff")
+
+# Colonnes lues dans chaque branche (envois / réceptions)
+COLONNES_TRANSACTION = (
+    "id, date, montant, devise, type, statut, message, "
+    "methode_paiement, expediteur_id, destinataire_id"
+)
+
+
+# ==========================================================
+# Enregistrement : LigneHistorique
+# ----------------------------------------------------------
+# Une transaction vue par un utilisateur ; 'sens' vaut DEBIT
+# (il est l'expéditeur) ou CREDIT (il est le destinataire).
+# ==========================================================
+class LigneHistorique(NamedTuple):
+    id: str
+    date: datetime
+    montant: Decimal
+    devise: Optional[str]
+    type: Optional[str]
+    statut: Optional[str]
+    message: Optional[str]
+    methode_paiement: Optional[str]
+    expediteur_id: Optional[str]
+    destinataire_id: Optional[str]
+    nom_expediteur: Optional[str]
+    nom_destinataire: Optional[str]
+    sens: str
+
+
+class CurseurInvalide(ValueError):
+    """Curseur de pagination illisible."""
+
+
+# ==========================================================
+# Curseur de pagination : position (date, id) opaque pour le client
+# ==========================================================
+def encoder_curseur(date, transaction_id):
+    texte = f"{date.isoformat()}|{transaction_id}"
+    return b64(texte.encode())
+
+
+def decoder_curseur(curseur):
+    """
+    Returns:
+        tuple (date, id)
+
+    Raises:
+        CurseurInvalide
+    """
+    try:
+        texte = unb64(curseur).decode()
+        date, transaction_id = texte.split("|")
+        return datetime.fromisoformat(date), identifiant_uuid(transaction_id, "transaction")
+    except (TypeError, ValueError, UnicodeDecodeError):
+        raise CurseurInvalide("Curseur de pagination invalide.")
+
+
+# ==========================================================
+# Requêtes
+# ----------------------------------------------------------
+# Chaque branche de l'UNION ALL suit un index composite
+# (expediteur_id, date, id) / (destinataire_id, date, id) en
+# ordre décroissant à partir de la position du curseur : une
+# page ne lit que ses lignes, quelle que soit la longueur de
+# l'historique. Les noms ne sont joints qu'après la limite.
+#
+# Les transactions sans date (impossible avec DEFAULT
+# CURRENT_TIMESTAMP) sont exclues : la position (date, id)
+# doit être comparable.
+# ==========================================================
+def _branche(colonne, sens, suite_sql):
+    return f"""
+        (SELECT {COLONNES_TRANSACTION}, '{sens}' AS sens
+         FROM public.transaction
+         WHERE {colonne} = $1 AND date IS NOT NULL AND (date, id) < ($2, $3)
+         {suite_sql})"""
+
+
+SQL_PAGE = f"""
+    SELECT t.id, t.date, t.montant, t.devise, t.type, t.statut, t.message,
+           t.methode_paiement, t.expediteur_id, t.destinataire_id,
+           u1.nom, u2.nom, t.sens
+    FROM (
+        {_branche("expediteur_id", "DEBIT", "ORDER BY date DESC, id DESC LIMIT $4")}
+        UNION ALL
+        {_branche("destinataire_id", "CREDIT", "AND expediteur_id IS DISTINCT FROM $1 ORDER BY date DESC, id DESC LIMIT $4")}
+    ) AS t
+    LEFT JOIN public.utilisateur u1 ON u1.id = t.expediteur_id
+    LEFT JOIN public.utilisateur u2 ON u2.id = t.destinataire_id
+    ORDER BY t.date DESC, t.id DESC
+    LIMIT $4
+"""
+
+# Export : mêmes branches sans limite, fusionnées dans l'ordre des index
+# (Merge Append) et lues par lots via un curseur nommé côté serveur
+SQL_EXPORT = """
+    SELECT t.id, t.date, t.montant, t.devise, t.type, t.statut, t.message,
+           t.methode_paiement, t.expediteur_id, t.destinataire_id,
+           u1.nom, u2.nom, t.sens
+    FROM (
+        (SELECT {colonnes}, 'DEBIT' AS sens FROM public.transaction
+         WHERE expediteur_id = %(u)s AND date >= %(depuis)s AND date < %(jusqu_a)s)
+        UNION ALL
+        (SELECT {colonnes}, 'CREDIT' AS sens FROM public.transaction
+         WHERE destinataire_id = %(u)s AND expediteur_id IS DISTINCT FROM %(u)s
+           AND date >= %(depuis)s AND date < %(jusqu_a)s)
+    ) AS t
+    LEFT JOIN public.utilisateur u1 ON u1.id = t.expediteur_id
+    LEFT JOIN public.utilisateur u2 ON u2.id = t.destinataire_id
+    ORDER BY t.date DESC, t.id DESC
+""".format(colonnes=COLONNES_TRANSACTION)
+
+
+# ==========================================================
+# Classe : HistoriqueModel
+# ----------------------------------------------------------
+# Historique des transactions d'un utilisateur (envoyées et
+# reçues), du plus récent au plus ancien.
+# ==========================================================
+class HistoriqueModel:
+
+    # ------------------------------------------------------
+    # Méthode : page
+    # ------------------------------------------------------
+    @staticmethod
+    def page(utilisateur_id, limite=50, curseur=None):
+        """
+        Retourne une page d'historique (pagination par clé).
+
+        Args:
+            utilisateur_id: utilisateur concerné
+            limite: nombre de lignes (au plus LIMITE_MAX)
+            curseur: valeur 'suivant' de la page précédente, ou None pour la première page
+
+        Returns:
+            tuple (list[LigneHistorique], suivant): 'suivant' vaut None sur la dernière page
+
+        Raises:
+            CurseurInvalide: curseur illisible
+        """
+        utilisateur_id = identifiant_uuid(utilisateur_id, "utilisateur")
+        limite = max(1, min(int(limite), LIMITE_MAX))
+        date, transaction_id = decoder_curseur(curseur) if curseur else DEBUT_INFINI
+
+        # Lecture servie par un réplica si possible (sauf transfert récent de l'utilisateur)
+        with get_conn_cursor(readonly=True, cle=utilisateur_id) as (conn, cur):
+            execute_prepare(cur, "historique_page", SQL_PAGE, (utilisateur_id, date, transaction_id, limite))
+            lignes = [LigneHistorique(*ligne) for ligne in cur.fetchall()]
+
+        suivant = None
+        if len(lignes) == limite:
+            suivant = encoder_curseur(lignes[-1].date, lignes[-1].id)
+        return lignes, suivant
+
+    # ------------------------------------------------------
+    # Méthode : exporter
+    # ------------------------------------------------------
+    @staticmethod
+    def exporter(utilisateur_id, depuis=None, jusqu_a=None, taille_lot=1000):
+        """
+        Parcourt tout l'historique (générateur) à mémoire constante.
+
+        Les lignes sont lues par lots de 'taille_lot' via un curseur nommé
+        (côté serveur) : la connexion reste empruntée au pool jusqu'à la fin
+        du parcours (ou la fermeture du générateur).
+
+        Args:
+            depuis / jusqu_a: bornes de date facultatives (jusqu_a exclue)
+
+        Yields:
+            LigneHistorique
+        """
+        utilisateur_id = identifiant_uuid(utilisateur_id, "utilisateur")
+        params = {
+            "u": utilisateur_id,
+            "depuis": depuis or "-infinity",
+            "jusqu_a": jusqu_a or "infinity",
+        }
+
+        with get_conn_cursor() as (conn, _):
+            with curseur_nomme(conn, "historique_export") as cur:
+                cur.itersize = taille_lot
+                cur.execute(SQL_EXPORT, params)
+                for ligne in cur:
+                    yield LigneHistorique(*ligne)
@@ -0,0 +1,268 @@
+# ==========================================================
+# Importations des bibliothèques nécessaires
+# ==========================================================
+import csv, io, json, os, time  # Lecture en flux des fichiers, tampon COPY et mesure du débit
+from concurrent.futures import ProcessPoolExecutor  # Hachage parallèle sur tous les cœurs
+from datetime import datetime  # Validation des dates de naissance
+from database.pool import get_conn_cursor  # Connexions issues du pool
+from models.utilisateur_model import ROLES, hash_password, valider_email, champ_trop_long  # Règles et hachage identiques à l'inscription
+from models.index_existence import get_index_existence  # Mise à jour de l'index des doublons
+
+
+# Colonnes attendues dans le fichier d'import (dans l'ordre du COPY)
+COLONNES = ("nom", "prenom", "email", "mot_de_passe", "numero_telephone", "date_naissance", "adresse", "role")
+OBLIGATOIRES = ("nom", "prenom", "email", "mot_de_passe", "numero_telephone")
+
+
+# ==========================================================
+# Fonction : lire_fichier
+# ----------------------------------------------------------
+# Lit le fichier ligne par ligne (CSV avec en-tête ou JSONL)
+# sans jamais le charger entièrement en mémoire.
+# ==========================================================
+def lire_fichier(chemin, format_fichier=None):
+    """
+    Args:
+        chemin (str): fichier à importer
+        format_fichier (str | None): "csv" ou "jsonl" (déduit de l'extension si absent)
+
+    Yields:
+        tuple: (numéro de ligne, dict des champs | None si la ligne est illisible)
+    """
+    format_fichier = (format_fichier or os.path.splitext(chemin)[1].lstrip(".")).lower()
+
+    # Octets non UTF-8 conservés (surrogateescape) : la ligne est rejetée par
+    # valider_ligne au lieu d'interrompre la lecture du fichier
+    with open(chemin, newline="", encoding="utf-8", errors="surrogateescape") as f:
+        if format_fichier in ("jsonl", "json", "ndjson"):
+            for numero, ligne in enumerate(f, start=1):
+                if not ligne.strip():
+                    continue
+                try:
+                    donnees = json.loads(ligne)
+                except json.JSONDecodeError:
+                    donnees = None
+                yield numero, donnees if isinstance(donnees, dict) else None
+        else:
+            # La ligne 1 est l'en-tête : les données commencent à la ligne 2
+            lecteur = csv.DictReader(f)
+            numero = 1
+            while True:
+                numero += 1
+                try:
+                    donnees = next(lecteur)
+                except StopIteration:
+                    break
+                except csv.Error:
+                    donnees = None   # ligne mal formée : rejetée, la lecture continue
+                yield numero, donnees
+
+
+# ==========================================================
+# Fonction : valider_ligne
+# ==========================================================
+def valider_ligne(donnees):
+    """
+    Vérifie et normalise une ligne d'import.
+
+    Returns:
+        tuple: (ligne normalisée | None, raison du rejet | None)
+    """
+    if donnees is None:
+        return None, "ligne illisible"
+
+    ligne = {col: (str(donnees.get(col) or "")).strip() for col in COLONNES}
+    ligne["mot_de_passe"] = str(donnees.get("mot_de_passe") or "")  # les espaces font partie du mot de passe
+
+    for col in COLONNES:
+        try:
+            ligne[col].encode("utf-8")
+        except UnicodeEncodeError:
+            return None, f"encodage invalide (UTF-8 attendu) : {col}"
+        if "\x00" in ligne[col]:
+            return None, f"caractère nul interdit : {col}"
+
+    for col in OBLIGATOIRES:
+        if not ligne[col]:
+            return None, f"champ obligatoire manquant : {col}"
+
+    # Une valeur trop longue ferait échouer l'INSERT du lot entier
+    trop_long = champ_trop_long(ligne)
+    if trop_long is not None:
+        return None, f"champ trop long : {trop_long}"
+
+    ligne["email"] = ligne["email"].lower()
+    if not valider_email(ligne["email"]):
+        return None, "email invalide"
+
+    ligne["role"] = ligne["role"].upper() or "CLIENT"
+    if ligne["role"] not in ROLES:
+        return None, f"rôle inconnu : {ligne['role']}"
+
+    if ligne["date_naissance"]:
+        try:
+            datetime.strptime(ligne["date_naissance"], "%Y-%m-%d")
+        except ValueError:
+            return None, "date de naissance invalide (YYYY-MM-DD)"
+
+    return ligne, None
+
+
+# ==========================================================
+# Classe : ImportUtilisateurs
+# ----------------------------------------------------------
+# Pipeline d'import en masse :
+#   1. lecture en flux du fichier
+#   2. validation (email, rôle, champs obligatoires, doublons du fichier)
+#   3. hachage PBKDF2 en parallèle sur un pool de processus
+#      (le lot suivant est haché pendant l'écriture du lot courant)
+#   4. écriture par lots : COPY dans une table temporaire puis
+#      INSERT ... ON CONFLICT DO NOTHING, une transaction par lot
+#
+# Les lignes rejetées (invalides ou déjà présentes en base) sont
+# écrites dans un fichier à part au lieu d'interrompre l'import.
+# ==========================================================
+class ImportUtilisateurs:
+
+    def __init__(self, chemin, format_fichier=None, taille_lot=1000, workers=None, chemin_rejets=None):
+        self.chemin = chemin
+        self.format_fichier = format_fichier
+        self.taille_lot = taille_lot
+        self.workers = workers or os.cpu_count() or 2
+        self.chemin_rejets = chemin_rejets or f"{chemin}.rejets.csv"
+
+        self.lues = 0
+        self.importees = 0
+        self.rejetees = 0
+        self._debut = None
+
+    # ------------------------------------------------------
+    # Méthode : executer
+    # ------------------------------------------------------
+    def executer(self):
+        """
+        Lance l'import complet.
+
+        Returns:
+            dict: bilan (lignes lues, importées, rejetées, durée, débit)
+        """
+        self._debut = time.perf_counter()
+
+        # Les octets invalides d'une ligne rejetée sont recopiés tels quels
+        with open(self.chemin_rejets, "w", newline="", encoding="utf-8", errors="surrogateescape") as f_rejets, \
+                ProcessPoolExecutor(max_workers=self.workers) as pool:
+            self._rejets = csv.writer(f_rejets)
+            self._rejets.writerow(["ligne", "raison"] + [c for c in COLONNES if c != "mot_de_passe"])
+
+            en_cours = None  # (lot, future des hachages) en attente d'écriture
+            for lot in self._lots():
+                # Le hachage du nouveau lot démarre avant l'écriture du précédent
+                hachages = pool.map(hash_password, [l["mot_de_passe"] for _, l in lot],
+                                    chunksize=max(1, len(lot) // (self.workers * 4)))
+                if en_cours is not None:
+                    self._ecrire(*en_cours)
+                en_cours = (lot, hachages)
+            if en_cours is not None:
+                self._ecrire(*en_cours)
+
+        return self.bilan()
+
+    def _lots(self):
+        """Regroupe les lignes valides en lots ; les invalides sont rejetées au fil de l'eau."""
+        vus_emails, vus_numeros = set(), set()
+        lot = []
+
+        for numero, donnees in lire_fichier(self.chemin, self.format_fichier):
+            self.lues += 1
+            ligne, raison = valider_ligne(donnees)
+
+            if ligne is not None:
+                if ligne["email"] in vus_emails:
+                    raison = "email en double dans le fichier"
+                elif ligne["numero_telephone"] in vus_numeros:
+                    raison = "numéro de téléphone en double dans le fichier"
+
+            if raison is not None:
+                self._rejeter(numero, raison, ligne or donnees or {})
+                continue
+
+            vus_emails.add(ligne["email"])
+            vus_numeros.add(ligne["numero_telephone"])
+            lot.append((numero, ligne))
+            if len(lot) >= self.taille_lot:
+                yield lot
+                lot = []
+
+        if lot:
+            yield lot
+
+    # ------------------------------------------------------
+    # Écriture d'un lot (une transaction)
+    # ------------------------------------------------------
+    def _ecrire(self, lot, hachages):
+        tampon = io.StringIO()
+        ecrivain = csv.writer(tampon)
+        for (numero, ligne), mot_hash in zip(lot, hachages):
+            ecrivain.writerow([numero] + [mot_hash if c == "mot_de_passe" else (ligne[c] or None) for c in COLONNES])
+        tampon.seek(0)
+
+        with get_conn_cursor() as (conn, cur):
+            cur.execute("""
+                CREATE TEMP TABLE IF NOT EXISTS import_utilisateur (
+                    ligne integer, nom text, prenom text, email text, mot_de_passe text,
+                    numero_telephone text, date_naissance date, adresse text, role text
+                ) ON COMMIT DELETE ROWS
+            """)
+            cur.copy_expert(
+                f"COPY import_utilisateur (ligne, {', '.join(COLONNES)}) FROM STDIN WITH (FORMAT csv)",
+                tampon
+            )
+            # Les comptes déjà présents (email ou numéro) sont ignorés puis signalés comme rejets
+            cur.execute("""
+                INSERT INTO public.utilisateur (
+                    nom, prenom, email, mot_de_passe, numero_telephone, date_naissance, adresse,
+                    kyc_status, role, niveau_verification, date_inscription
+                )
+                SELECT nom, prenom, email, mot_de_passe, numero_telephone, date_naissance, adresse,
+                       'EN_ATTENTE', role, 0, now()
+                FROM import_utilisateur
+                ORDER BY ligne
+                ON CONFLICT DO NOTHING
+                RETURNING email
+            """)
+            inserees = {email for (email,) in cur.fetchall()}
+            conn.commit()
+
+        index = get_index_existence()
+        for numero, ligne in lot:
+            if ligne["email"] in inserees:
+                self.importees += 1
+                index.ajouter(ligne["email"], ligne["numero_telephone"])
+            else:
+                self._rejeter(numero, "email ou numéro de téléphone déjà utilisé", ligne)
+
+        self._progression()
+
+    # ------------------------------------------------------
+    # Rejets, progression et bilan
+    # ------------------------------------------------------
+    def _rejeter(self, numero, raison, donnees):
+        self.rejetees += 1
+        self._rejets.writerow([numero, raison] + [donnees.get(c, "") for c in COLONNES if c != "mot_de_passe"])
+
+    def _progression(self):
+        duree = time.perf_counter() - self._debut
+        debit = self.lues / duree if duree > 0 else 0.0
+        print(f" {self.lues} lignes lues — {self.importees} importées, "
+              f"{self.rejetees} rejetées ({debit:.0f} lignes/s)")
+
+    def bilan(self):
+        duree = time.perf_counter() - self._debut
+        return {
+            "lues": self.lues,
+            "importees": self.importees,
+            "rejetees": self.rejetees,
+            "duree_s": round(duree, 3),
+            "lignes_par_s": round(self.lues / duree, 1) if duree > 0 else 0.0,
+            "fichier_rejets": self.chemin_rejets,
+        }
@@ -0,0 +1,161 @@
+# ==========================================================
+# Importations des bibliothèques nécessaires
+# ==========================================================
+import hashlib, math, threading  # Fonctions de hachage du filtre et verrou d'accès concurrent
+from config import Config  # Taille attendue et taux de faux positifs du filtre
+from database.pool import get_conn_cursor, unite_courante, curseur_nomme  # Chargement initial des emails et numéros existants
+
+
+# ==========================================================
+# Classe : FiltreBloom
+# ----------------------------------------------------------
+# Ensemble probabiliste très compact :
+# - "absent" est toujours exact (aucun faux négatif)
+# - "peut-être présent" peut être un faux positif (taux réglable)
+# Les suppressions ne sont pas possibles : un compte supprimé
+# provoque seulement une vérification en base superflue.
+# ==========================================================
+class FiltreBloom:
+
+    def __init__(self, capacite, taux_faux_positifs=0.01):
+        capacite = max(1, capacite)
+        # Formules classiques : m = -n ln(p) / (ln 2)^2, k = m/n ln 2
+        self.nb_bits = max(64, int(-capacite * math.log(taux_faux_positifs) / (math.log(2) ** 2)))
+        self.nb_hash = max(1, round(self.nb_bits / capacite * math.log(2)))
+        self._bits = bytearray((self.nb_bits + 7) // 8)
+
+    def _positions(self, valeur):
+        # Double hachage (Kirsch-Mitzenmacher) à partir d'un seul condensat
+        condensat = hashlib.blake2b(valeur.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(condensat[:8], "little")
+        h2 = int.from_bytes(condensat[8:], "little") | 1
+        return ((h1 + i * h2) % self.nb_bits for i in range(self.nb_hash))
+
+    def ajouter(self, valeur):
+        for pos in self._positions(valeur):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, valeur):
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(valeur))
+
+
+# ==========================================================
+# Classe : IndexExistence
+# ----------------------------------------------------------
+# Index mémoire des emails et numéros de téléphone déjà utilisés.
+# Construit au démarrage, puis mis à jour à chaque inscription :
+# pour un nouvel utilisateur (cas le plus courant), la
+# vérification des doublons ne touche pas la base de données.
+#
+# Tant que l'index n'est pas chargé, il répond "peut-être présent"
+# et la vérification se fait en base comme auparavant.
+# ==========================================================
+class IndexExistence:
+
+    def __init__(self, capacite=None, taux_faux_positifs=None):
+        self.capacite = capacite or Config.INDEX_EXISTENCE_CAPACITE
+        self.taux = taux_faux_positifs or Config.INDEX_EXISTENCE_TAUX_FP
+        self._lock = threading.Lock()
+        self._emails = None
+        self._telephones = None
+        self._pendants = None  # ajouts reçus pendant un chargement en cours
+
+    @property
+    def charge(self):
+        return self._emails is not None
+
+    # ------------------------------------------------------
+    # Méthode : charger
+    # ------------------------------------------------------
+    def charger(self, taille_lot=10000):
+        """
+        Construit l'index à partir de la table utilisateur.
+        La lecture passe par un curseur serveur pour ne jamais charger
+        toute la table en mémoire.
+
+        Returns:
+            int: nombre d'utilisateurs indexés
+        """
+        emails = FiltreBloom(self.capacite, self.taux)
+        telephones = FiltreBloom(self.capacite, self.taux)
+        total = 0
+
+        # Les inscriptions concurrentes au chargement sont mises de côté puis rejouées
+        with self._lock:
+            self._pendants = []
+
+        try:
+            with get_conn_cursor() as (conn, _):
+                with curseur_nomme(conn, "index_existence") as cur:
+                    cur.itersize = taille_lot
+                    cur.execute("SELECT email, numero_telephone FROM public.utilisateur")
+                    for email, numero in cur:
+                        if email:
+                            emails.ajouter(normaliser_email(email))
+                        if numero:
+                            telephones.ajouter(normaliser_telephone(numero))
+                        total += 1
+                # Dans une unité de travail, un rollback annulerait aussi ses écritures
+                if unite_courante() is None:
+                    conn.rollback()
+        except Exception:
+            with self._lock:
+                self._pendants = None
+            raise
+
+        with self._lock:
+            for email, numero in self._pendants:
+                if email:
+                    emails.ajouter(normaliser_email(email))
+                if numero:
+                    telephones.ajouter(normaliser_telephone(numero))
+            self._emails, self._telephones = emails, telephones
+            self._pendants = None
+        return total
+
+    # ------------------------------------------------------
+    # Consultation et mise à jour
+    # ------------------------------------------------------
+    def email_peut_exister(self, email):
+        """False uniquement si l'email n'est certainement pas utilisé."""
+        with self._lock:
+            return self._emails is None or normaliser_email(email) in self._emails
+
+    def telephone_peut_exister(self, numero):
+        """False uniquement si le numéro n'est certainement pas utilisé."""
+        with self._lock:
+            return self._telephones is None or normaliser_telephone(numero) in self._telephones
+
+    def ajouter(self, email=None, numero=None):
+        """Enregistre un email et/ou un numéro nouvellement utilisés."""
+        with self._lock:
+            if self._pendants is not None:
+                self._pendants.append((email, numero))
+            if self._emails is None:
+                return
+            if email:
+                self._emails.ajouter(normaliser_email(email))
+            if numero:
+                self._telephones.ajouter(normaliser_telephone(numero))
+
+
+# ==========================================================
+# Fonctions utilitaires : normalisation des clés indexées
+# ==========================================================
+def normaliser_email(email):
+    return email.strip().lower()
+
+
+def normaliser_telephone(numero):
+    return "".join(numero.split())
+
+
+# ==========================================================
+# Instance globale partagée
+# ==========================================================
+_index = IndexExistence()
+
+
+def get_index_existence():
+    """Retourne l'index global des emails et numéros utilisés."""
+    return _index
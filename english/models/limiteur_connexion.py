@@ -0,0 +1,220 @@
+# ==========================================================
+# Importations des bibliothèques nécessaires
+# ==========================================================
+import threading, time  # Verrou partagé, sémaphore des vérifications et horloge monotone
+from collections import OrderedDict  # Suivi borné, éviction du moins récemment utilisé
+from config import Config  # Rafales, rythmes, blocages et plafond des vérifications
+from models.hash_executor import HachageIndisponible  # Plafond des vérifications simultanées atteint
+
+
+# ==========================================================
+# Exception : ConnexionLimitee
+# ----------------------------------------------------------
+# Tentative refusée avant tout calcul de hash ; 'reessayer_dans'
+# indique (en secondes) quand une nouvelle tentative sera acceptée.
+# ==========================================================
+class ConnexionLimitee(RuntimeError):
+
+    def __init__(self, reessayer_dans):
+        super().__init__("Trop de tentatives de connexion, réessayez plus tard.")
+        self.reessayer_dans = reessayer_dans
+
+
+class _Suivi:
+    __slots__ = ("jetons", "maj", "echecs", "dernier_echec", "bloque_jusqu_a")
+
+    def __init__(self, jetons, maintenant):
+        self.jetons = jetons
+        self.maj = maintenant
+        self.echecs = 0
+        self.dernier_echec = 0.0
+        self.bloque_jusqu_a = 0.0
+
+
+# ==========================================================
+# Classe : _Seaux
+# ----------------------------------------------------------
+# Seaux de jetons et compteurs d'échecs d'une catégorie de clés
+# (emails ou clients). Au plus 'taille_max' clés sont suivies :
+# au-delà, la moins récemment vue est oubliée.
+# Non protégé : le verrou est celui de LimiteurConnexion.
+# ==========================================================
+class _Seaux:
+
+    def __init__(self, rafale, par_minute, echecs_libres, taille_max):
+        self.rafale = max(1, rafale)
+        self.taux = max(par_minute, 1e-6) / 60.0   # jetons par seconde
+        self.echecs_libres = echecs_libres
+        self.taille_max = taille_max
+        self._suivis = OrderedDict()
+
+    def _suivi(self, cle, maintenant):
+        suivi = self._suivis.get(cle)
+        if suivi is None:
+            suivi = self._suivis[cle] = _Suivi(float(self.rafale), maintenant)
+            while len(self._suivis) > self.taille_max:
+                self._suivis.popitem(last=False)
+        else:
+            self._suivis.move_to_end(cle)
+            # Recharge depuis la dernière visite
+            suivi.jetons = min(self.rafale, suivi.jetons + (maintenant - suivi.maj) * self.taux)
+            suivi.maj = maintenant
+        return suivi
+
+    def attente(self, cle, maintenant):
+        """
+        Secondes à attendre avant qu'une tentative soit acceptée (0 : acceptée).
+        Lecture seule : une tentative refusée ne crée ni ne rafraîchit aucune
+        entrée (sinon des refus en rafale évinceraient les blocages en cours).
+        """
+        suivi = self._suivis.get(cle)
+        if suivi is None:
+            return 0.0
+        jetons = min(self.rafale, suivi.jetons + (maintenant - suivi.maj) * self.taux)
+        attente = max(0.0, suivi.bloque_jusqu_a - maintenant)
+        if jetons < 1:
+            attente = max(attente, (1 - jetons) / self.taux)
+        return attente
+
+    def consommer(self, cle, maintenant):
+        """Tentative acceptée : l'entrée est créée (ou rafraîchie) et un jeton consommé."""
+        self._suivi(cle, maintenant).jetons -= 1
+
+    def echec(self, cle, maintenant):
+        suivi = self._suivi(cle, maintenant)
+        if maintenant - suivi.dernier_echec > Config.LOGIN_ECHECS_OUBLI:
+            suivi.echecs = 0
+        suivi.echecs += 1
+        suivi.dernier_echec = maintenant
+
+        # Au-delà des échecs tolérés : blocage doublé à chaque nouvel échec
+        excedent = suivi.echecs - self.echecs_libres
+        if excedent > 0:
+            duree = min(Config.LOGIN_BLOCAGE_MAX, Config.LOGIN_BLOCAGE_BASE * 2 ** min(excedent - 1, 30))
+            suivi.bloque_jusqu_a = maintenant + duree
+
+    def succes(self, cle):
+        suivi = self._suivis.get(cle)
+        if suivi is not None:
+            suivi.echecs = 0
+            suivi.bloque_jusqu_a = 0.0
+
+    def __len__(self):
+        return len(self._suivis)
+
+
+# ==========================================================
+# Classe : LimiteurConnexion
+# ----------------------------------------------------------
+# Filtre placé devant la vérification du mot de passe (PBKDF2) :
+# - un seau de jetons par email et un par client (adresse IP) :
+#   rafale courte autorisée, puis rythme limité
+# - après quelques échecs, blocage exponentiel de l'email et du
+#   client (1 s, 2 s, 4 s… jusqu'à LOGIN_BLOCAGE_MAX)
+# - au plus LOGIN_VERIFICATIONS_MAX vérifications simultanées :
+#   les connexions ne peuvent pas occuper tout le pool de hachage
+#
+# Un refus ne coûte qu'un accès à un dictionnaire sous verrou.
+# Un email inexistant compte comme un échec : l'énumération des
+# comptes est freinée comme la recherche de mots de passe.
+#
+# Utilisation :
+#   limiteur.autoriser(email, client)     # peut lever une exception
+#   reussi = None
+#   try:
+#       reussi = verification(...)
+#   finally:
+#       limiteur.terminer(email, client, reussi)
+# ==========================================================
+class LimiteurConnexion:
+
+    def __init__(self, verifications_max=None, taille_max=None):
+        taille_max = taille_max or Config.LOGIN_SUIVI_MAX
+        self.emails = _Seaux(Config.LOGIN_EMAIL_RAFALE, Config.LOGIN_EMAIL_PAR_MINUTE,
+                             Config.LOGIN_ECHECS_LIBRES, taille_max)
+        # Un client (souvent une IP partagée) n'est bloqué qu'après une rafale entière d'échecs
+        self.clients = _Seaux(Config.LOGIN_CLIENT_RAFALE, Config.LOGIN_CLIENT_PAR_MINUTE,
+                              Config.LOGIN_CLIENT_RAFALE, taille_max)
+        self.verifications_max = verifications_max or Config.LOGIN_VERIFICATIONS_MAX
+        self._verifications = threading.BoundedSemaphore(self.verifications_max)
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------
+    # Méthode : autoriser
+    # ------------------------------------------------------
+    def autoriser(self, email, client=None):
+        """
+        Accepte ou refuse une tentative de connexion, sans calcul de hash.
+        Une tentative acceptée doit être suivie d'un appel à terminer().
+
+        Raises:
+            ConnexionLimitee: email ou client trop sollicité / bloqué
+            HachageIndisponible: trop de vérifications déjà en cours
+        """
+        maintenant = time.monotonic()
+        with self._lock:
+            # Le client d'abord : un client déjà limité est refusé sans toucher aux emails
+            if client is not None:
+                attente = self.clients.attente(client, maintenant)
+                if attente > 0:
+                    raise ConnexionLimitee(attente)
+            attente = self.emails.attente(email, maintenant)
+            if attente > 0:
+                raise ConnexionLimitee(attente)
+
+            if not self._verifications.acquire(blocking=False):
+                raise HachageIndisponible("Trop de vérifications de mot de passe en cours.")
+
+            # Les entrées ne sont créées et les jetons consommés que si la tentative est acceptée
+            self.emails.consommer(email, maintenant)
+            if client is not None:
+                self.clients.consommer(client, maintenant)
+
+    # ------------------------------------------------------
+    # Méthode : terminer
+    # ------------------------------------------------------
+    def terminer(self, email, client=None, reussi=None):
+        """
+        Libère la place de vérification et enregistre le résultat.
+
+        Args:
+            reussi: True (connexion réussie), False (échec), None (erreur :
+                    la tentative n'est comptée ni comme un succès ni comme un échec)
+        """
+        self._verifications.release()
+        if reussi is None:
+            return
+
+        maintenant = time.monotonic()
+        with self._lock:
+            if reussi:
+                # Seul l'email est réhabilité : un client peut essayer plusieurs comptes
+                self.emails.succes(email)
+            else:
+                self.emails.echec(email, maintenant)
+                if client is not None:
+                    self.clients.echec(client, maintenant)
+
+    def etat(self):
+        """Nombre d'emails / de clients suivis."""
+        with self._lock:
+            return {"emails": len(self.emails), "clients": len(self.clients),
+                    "verifications_max": self.verifications_max}
+
+
+# ==========================================================
+# Instance globale partagée
+# ==========================================================
+_limiteur = None
+_limiteur_lock = threading.Lock()
+
+
+def get_limiteur_connexion():
+    """Retourne le limiteur global, créé à la première utilisation."""
+    global _limiteur
+
+    if _limiteur is None:
+        with _limiteur_lock:
+            if _limiteur is None:
+                _limiteur = LimiteurConnexion()
+    return _limiteur
@@ -0,0 +1,370 @@
+# ==========================================================
+# Importations des bibliothèques nécessaires
+# ==========================================================
+import threading, time  # Thread d'écriture des notifications et fenêtre de regroupement
+from collections import Counter  # Notifications en attente d'écriture, par utilisateur
+from datetime import datetime  # Date d'envoi des notifications
+from queue import Queue, Empty, Full  # File d'attente bornée des notifications
+from typing import NamedTuple  # Notification compacte
+from psycopg2.extras import execute_values  # Insertion multi-lignes en une requête
+from config import Config  # Taille des lots, de la file et du cache des compteurs
+from database.pool import get_conn_cursor, execute_prepare, unite_courante, differer, apres_commit  # Requêtes SQL via le pool
+from models.cache import TTLCache  # Compteurs de notifications non lues (LRU + expiration)
+from models.transfert_model import abonner, identifiant_uuid  # Notifications des transferts
+
+# Types acceptés par la table notification
+TYPES_NOTIFICATION = {"TRANSACTION", "SYSTEME", "ADMIN"}
+
+# Notification écrite dans une unité de travail (utilisateur supprimé : ignorée, comme dans les lots)
+SQL_NOTIFICATION_UNITE = """
+    INSERT INTO public.notification (utilisateur_id, titre, contenu, date_envoi, type, vu)
+    SELECT id, %(titre)s, %(contenu)s, %(date)s, %(type)s, false
+    FROM public.utilisateur WHERE id = %(u)s
+"""
+
+
+# ==========================================================
+# Enregistrement : Notification
+# ==========================================================
+class Notification(NamedTuple):
+    utilisateur_id: str
+    titre: str
+    contenu: str
+    type: str = "SYSTEME"
+
+
+# ==========================================================
+# Classe : CompteursNonLus
+# ----------------------------------------------------------
+# Nombre de notifications non lues par utilisateur (badge),
+# sans COUNT(*) à chaque affichage :
+# - chargé une fois depuis la base, puis tenu à jour en mémoire
+#   (nouvelles notifications, lectures)
+# - une diffusion ADMIN ne parcourt pas le cache : un compteur
+#   global (et un par rôle) est incrémenté, chaque entrée ajoute
+#   les diffusions survenues depuis son chargement
+# - les entrées expirent (NOTIF_COMPTEURS_TTL) : les écarts
+#   éventuels (autres processus, courses rares) sont corrigés au
+#   rechargement suivant
+# ==========================================================
+class CompteursNonLus:
+
+    def __init__(self, taille_max=None, ttl=None):
+        self._cache = TTLCache(taille_max or Config.NOTIF_COMPTEURS_MAX, ttl or Config.NOTIF_COMPTEURS_TTL)
+        self._lock = threading.Lock()
+        self._diffusions = 0                 # diffusions à tous les utilisateurs
+        self._diffusions_role = Counter()    # rôle -> diffusions ciblées
+
+    def _charger(self, uid, en_attente):
+        with self._lock:
+            instantane = (self._diffusions, dict(self._diffusions_role))
+
+        with get_conn_cursor() as (conn, cur):
+            execute_prepare(
+                cur, "notification_non_lues",
+                """
+                SELECT u.role,
+                       (SELECT count(*) FROM public.notification n WHERE n.utilisateur_id = u.id AND n.vu = false)
+                FROM public.utilisateur u WHERE u.id = $1
+                """,
+                (uid,)
+            )
+            ligne = cur.fetchone()
+        if ligne is None:
+            return None
+
+        role, nombre = ligne
+        # [non lues, rôle, diffusions globales au chargement, diffusions du rôle au chargement]
+        entree = [nombre + en_attente, role, instantane[0], instantane[1].get(role, 0)]
+        self._cache.set(uid, entree)
+        return entree
+
+    def valeur(self, uid, en_attente=0):
+        entree = self._cache.get(uid) or self._charger(uid, en_attente)
+        if entree is None:
+            return 0
+        with self._lock:
+            return max(0, entree[0]
+                       + self._diffusions - entree[2]
+                       + self._diffusions_role[entree[1]] - entree[3])
+
+    def ajouter(self, uid, delta):
+        """Modifie le compteur s'il est en cache (sinon il sera chargé à la demande)."""
+        entree = self._cache.get(uid)
+        if entree is not None:
+            with self._lock:
+                entree[0] += delta
+
+    def remettre_a_zero(self, uid, en_attente=0):
+        entree = self._cache.get(uid)
+        if entree is not None:
+            with self._lock:
+                entree[0] = en_attente
+                entree[2] = self._diffusions
+                entree[3] = self._diffusions_role[entree[1]]
+
+    def diffusion(self, role=None):
+        with self._lock:
+            if role is None:
+                self._diffusions += 1
+            else:
+                self._diffusions_role[role] += 1
+
+
+# ==========================================================
+# Classe : NotificationDispatcher
+# ----------------------------------------------------------
+# Les notifications sont mises en file (sans attente ni requête
+# SQL pour l'appelant, par ex. le chemin des transferts) puis
+# écrites par un thread dédié, par lots de NOTIF_LOT_MAX lignes
+# ou toutes les NOTIF_LOT_DELAI_MS millisecondes, en une seule
+# requête INSERT multi-lignes par lot.
+# ==========================================================
+class NotificationDispatcher:
+
+    def __init__(self, lot_max=None, delai=None, taille_file=None):
+        self.lot_max = lot_max or Config.NOTIF_LOT_MAX
+        self.delai = delai if delai is not None else Config.NOTIF_LOT_DELAI_MS / 1000.0
+        self._file = Queue(maxsize=taille_file or Config.NOTIF_FILE_MAX)
+        self.compteurs = CompteursNonLus()
+        self._en_attente = Counter()   # utilisateur -> notifications pas encore écrites
+        self._lock = threading.Lock()
+        self._ferme = False
+        self.perdues = 0
+        self._thread = threading.Thread(target=self._boucle, name="notifications", daemon=True)
+        self._thread.start()
+
+    # ------------------------------------------------------
+    # Envoi
+    # ------------------------------------------------------
+    def envoyer(self, utilisateur_id, titre, contenu, type_notification="SYSTEME"):
+        """
+        Met une notification en file (non bloquant).
+        Dans une unité de travail, elle est écrite avec les autres écritures
+        de l'unité (même transaction, sans aller-retour supplémentaire).
+
+        Returns:
+            bool: False si la file est pleine ou fermée (notification perdue)
+        """
+        if type_notification not in TYPES_NOTIFICATION:
+            raise ValueError(f"Type de notification inconnu : {type_notification}")
+        uid = identifiant_uuid(utilisateur_id, "utilisateur")
+
+        if unite_courante() is not None:
+            differer(SQL_NOTIFICATION_UNITE, {
+                "u": uid, "titre": titre[:150], "contenu": contenu[:750],
+                "date": datetime.now(), "type": type_notification,
+            })
+            apres_commit(lambda: self.compteurs.ajouter(uid, 1))
+            return True
+
+        if self._ferme:
+            return False
+        # Comptée en attente avant la mise en file : le thread d'écriture ne
+        # peut pas la décompter avant qu'elle ait été comptée
+        with self._lock:
+            self._en_attente[uid] += 1
+        try:
+            self._file.put_nowait((Notification(uid, titre[:150], contenu[:750], type_notification), datetime.now()))
+        except Full:
+            # Le chemin appelant (transfert, KYC…) ne doit jamais attendre les notifications
+            with self._lock:
+                self._en_attente[uid] -= 1
+                if self._en_attente[uid] <= 0:
+                    del self._en_attente[uid]
+                self.perdues += 1
+            print(" File des notifications pleine : notification ignorée.")
+            return False
+
+        self.compteurs.ajouter(uid, 1)
+        return True
+
+    def diffuser(self, titre, contenu, role=None):
+        """
+        Envoie une notification ADMIN à tous les utilisateurs (ou à un rôle)
+        en une seule requête INSERT ... SELECT.
+
+        Returns:
+            int: nombre de notifications créées
+        """
+        condition, params = "", [titre[:150], contenu[:750], datetime.now()]
+        if role is not None:
+            condition = " WHERE role = %s"
+            params.append(role)
+
+        with get_conn_cursor() as (conn, cur):
+            cur.execute(
+                f"""
+                INSERT INTO public.notification (utilisateur_id, titre, contenu, date_envoi, type, vu)
+                SELECT id, %s, %s, %s, 'ADMIN', false FROM public.utilisateur{condition}
+                """,
+                params
+            )
+            nombre = cur.rowcount
+            conn.commit()
+
+        self.compteurs.diffusion(role)
+        return nombre
+
+    # ------------------------------------------------------
+    # Compteurs
+    # ------------------------------------------------------
+    def nombre_non_lues(self, utilisateur_id):
+        """Nombre de notifications non lues (y compris celles encore en file)."""
+        uid = identifiant_uuid(utilisateur_id, "utilisateur")
+        with self._lock:
+            en_attente = self._en_attente[uid]
+        return self.compteurs.valeur(uid, en_attente)
+
+    def marquer_vues(self, utilisateur_id, ids=None):
+        """
+        Marque des notifications (ou toutes si ids est None) comme lues.
+
+        Returns:
+            int: nombre de notifications modifiées
+        """
+        uid = identifiant_uuid(utilisateur_id, "utilisateur")
+        with get_conn_cursor() as (conn, cur):
+            if ids is None:
+                cur.execute("UPDATE public.notification SET vu = true WHERE utilisateur_id = %s AND vu = false", (uid,))
+            else:
+                cur.execute(
+                    "UPDATE public.notification SET vu = true "
+                    "WHERE utilisateur_id = %s AND vu = false AND id = ANY(%s::uuid[])",
+                    (uid, [str(i) for i in ids])
+                )
+            nombre = cur.rowcount
+            conn.commit()
+
+        if ids is None:
+            with self._lock:
+                en_attente = self._en_attente[uid]
+            self.compteurs.remettre_a_zero(uid, en_attente)
+        else:
+            self.compteurs.ajouter(uid, -nombre)
+        return nombre
+
+    # ------------------------------------------------------
+    # Écriture par lots (thread dédié)
+    # ------------------------------------------------------
+    def _boucle(self):
+        while True:
+            element = self._file.get()
+            if element is None:
+                return
+            lot = [element]
+
+            limite = time.monotonic() + self.delai
+            while len(lot) < self.lot_max:
+                reste = limite - time.monotonic()
+                try:
+                    element = self._file.get(timeout=reste) if reste > 0 else self._file.get_nowait()
+                except Empty:
+                    break
+                if element is None:
+                    self._ecrire(lot)
+                    return
+                lot.append(element)
+
+            self._ecrire(lot)
+
+    def _ecrire(self, lot):
+        lignes = [(n.utilisateur_id, n.titre, n.contenu, date, n.type) for n, date in lot]
+        for tentative in (1, 2):
+            try:
+                with get_conn_cursor() as (conn, cur):
+                    # La jointure ignore les utilisateurs supprimés entre-temps
+                    # (une clé étrangère violée ferait échouer tout le lot)
+                    execute_values(
+                        cur,
+                        """
+                        INSERT INTO public.notification (utilisateur_id, titre, contenu, date_envoi, type, vu)
+                        SELECT v.utilisateur_id, v.titre, v.contenu, v.date_envoi, v.type, false
+                        FROM (VALUES %s) AS v(utilisateur_id, titre, contenu, date_envoi, type)
+                        JOIN public.utilisateur u ON u.id = v.utilisateur_id
+                        """,
+                        lignes,
+                        template="(%s::uuid, %s, %s, %s::timestamp, %s)",
+                        page_size=len(lignes)
+                    )
+                    conn.commit()
+                break
+            except Exception as e:
+                if tentative == 2:
+                    print(f" Écriture de {len(lignes)} notifications impossible :", e)
+                    with self._lock:
+                        self.perdues += len(lignes)
+                    for n, _ in lot:
+                        self.compteurs.ajouter(n.utilisateur_id, -1)
+                else:
+                    time.sleep(0.5)
+
+        # Les notifications écrites sont désormais comptées par la base
+        with self._lock:
+            for n, _ in lot:
+                self._en_attente[n.utilisateur_id] -= 1
+                if self._en_attente[n.utilisateur_id] <= 0:
+                    del self._en_attente[n.utilisateur_id]
+
+    def fermer(self):
+        """Écrit les notifications déjà en file puis arrête le thread."""
+        if self._ferme:
+            return
+        self._ferme = True
+        self._file.put(None)
+        self._thread.join()
+
+
+# ==========================================================
+# Notifications des transferts
+# ----------------------------------------------------------
+# Abonné transactionnel de TransferService : une notification
+# pour l'expéditeur et une pour le destinataire.
+# - transfert unique (TransferService.transferer, paiement QR) :
+#   écrites dans la transaction du transfert (unité de travail),
+#   jamais perdues même si la file est pleine
+# - file des transferts groupés : mises en file après le commit
+# ==========================================================
+def _notifier_transferts(effectues):
+    dispatcher = get_notification_dispatcher()
+    for t in effectues:
+        montant = f"{t.montant} {t.devise}"
+        dispatcher.envoyer(t.expediteur_id, "Transfert envoyé",
+                           f"Vous avez envoyé {montant}. Nouveau solde : {t.solde_expediteur} {t.devise}.",
+                           "TRANSACTION")
+        dispatcher.envoyer(t.destinataire_id, "Paiement reçu",
+                           f"Vous avez reçu {montant}. Nouveau solde : {t.solde_destinataire} {t.devise}.",
+                           "TRANSACTION")
+
+
+def brancher_transferts():
+    """Active les notifications automatiques des transferts."""
+    abonner(_notifier_transferts, transactionnel=True)
+
+
+# ==========================================================
+# Instance globale partagée
+# ==========================================================
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_notification_dispatcher():
+    """Retourne le répartiteur de notifications global, créé à la première utilisation."""
+    global _dispatcher
+
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                _dispatcher = NotificationDispatcher()
+    return _dispatcher
+
+
+def fermer_notification_dispatcher():
+    """Écrit les notifications en attente et arrête le répartiteur (s'il a été créé)."""
+    global _dispatcher
+
+    with _dispatcher_lock:
+        if _dispatcher is not None:
+            _dispatcher.fermer()
+            _dispatcher = None
@@ -0,0 +1,281 @@
+# ==========================================================
+# Importations des bibliothèques nécessaires
+# ==========================================================
+import hashlib, heapq, hmac, os, secrets, threading, time  # Signature des codes et index anti-rejeu
+from decimal import Decimal  # Montant exact encodé dans le code
+from typing import NamedTuple, Optional  # Contenu décodé d'un code QR
+from config import Config  # Secret, durées de validité et tailles des index
+from models.encodage import b64, unb64  # Base64 "url-safe" sans '=' (jetons signés)
+from models.cache import TTLCache  # Cache des codes statiques déjà vérifiés
+from models.transfert_model import TransferService, TransfertInvalide, montant_decimal, identifiant_uuid  # Paiement
+
+
+# Préfixe de version : permet de faire évoluer le format sans casser les codes imprimés
+PREFIXE = "EBP1"
+
+
+# ==========================================================
+# Exceptions : QRInvalide / QRExpire / QRDejaUtilise / QRIndisponible
+# ==========================================================
+class QRInvalide(ValueError):
+    """Code QR illisible, falsifié ou incompatible avec le paiement demandé."""
+
+
+class QRExpire(QRInvalide):
+    """Code QR dynamique arrivé à expiration."""
+
+
+class QRDejaUtilise(QRInvalide):
+    """Code QR dynamique déjà utilisé pour un paiement."""
+
+
+class QRIndisponible(RuntimeError):
+    """Index anti-rejeu plein : les codes dynamiques sont refusés temporairement."""
+
+
+# ==========================================================
+# Enregistrement : CodeQR (contenu d'un code vérifié)
+# ==========================================================
+class CodeQR(NamedTuple):
+    beneficiaire_id: str
+    devise: str
+    montant: Optional[Decimal]
+    expire_le: Optional[int]
+    nonce: str
+    statique: bool
+
+
+# ==========================================================
+# Classe : IndexRejeu
+# ----------------------------------------------------------
+# Mémorise les codes dynamiques déjà utilisés jusqu'à leur
+# expiration (au-delà, la signature suffit à les refuser).
+#
+# La taille est bornée : la durée de validité des codes étant
+# plafonnée (QR_DUREE_MAX), les entrées expirées sont purgées
+# au fil de l'eau. Si l'index est plein de codes encore valides,
+# les paiements dynamiques sont refusés (jamais de rejeu possible).
+#
+# L'index est propre au processus : avec plusieurs serveurs, un
+# même code doit toujours être traité par le même processus.
+# ==========================================================
+class IndexRejeu:
+
+    def __init__(self, taille_max):
+        self.taille_max = taille_max
+        self._utilises = set()
+        self._expirations = []   # tas (expire_le, nonce)
+        self._lock = threading.Lock()
+
+    def _purger(self, maintenant):
+        while self._expirations and self._expirations[0][0] <= maintenant:
+            _, nonce = heapq.heappop(self._expirations)
+            self._utilises.discard(nonce)
+
+    def marquer(self, nonce, expire_le):
+        """
+        Marque un code comme utilisé.
+
+        Raises:
+            QRDejaUtilise: le code a déjà été utilisé
+            QRIndisponible: l'index est plein
+        """
+        with self._lock:
+            if nonce in self._utilises:
+                raise QRDejaUtilise("Ce code QR a déjà été utilisé.")
+            self._purger(time.time())
+            if len(self._utilises) >= self.taille_max:
+                raise QRIndisponible("Trop de paiements QR en cours, réessayez.")
+            self._utilises.add(nonce)
+            heapq.heappush(self._expirations, (expire_le, nonce))
+
+    def liberer(self, nonce):
+        """Rend un code à nouveau utilisable (paiement refusé, ex : solde insuffisant)."""
+        with self._lock:
+            self._utilises.discard(nonce)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._utilises)
+
+
+# ==========================================================
+# Classe : QRManager
+# ----------------------------------------------------------
+# Codes QR de paiement signés (HMAC-SHA256), vérifiés sans
+# requête SQL.
+#
+# Format : EBP1.base64(type|beneficiaire|devise|montant|expire_le|nonce).signature
+#   - type 'D' : code dynamique (montant facultatif, expiration, usage unique)
+#   - type 'S' : code statique de marchand (sans expiration, réutilisable)
+# ==========================================================
+class QRManager:
+
+    def __init__(self, secret=None, duree=None, duree_max=None, taille_index=None, taille_cache=None):
+        # Sans secret configuré, les codes ne survivent pas au redémarrage :
+        # QR_SECRET est indispensable pour les codes statiques imprimés
+        secret = secret or Config.QR_SECRET or secrets.token_hex(32)
+        self._secret = secret.encode() if isinstance(secret, str) else secret
+        self.duree = duree or Config.QR_DUREE
+        self.duree_max = duree_max or Config.QR_DUREE_MAX
+
+        self._rejeu = IndexRejeu(taille_index or Config.QR_INDEX_MAX)
+        taille_cache = taille_cache or Config.QR_CACHE_STATIQUE
+        self._statiques = TTLCache(taille_cache, float("inf"))   # valeur -> CodeQR vérifié
+        self._codes_marchands = TTLCache(taille_cache, float("inf"))   # (marchand, devise) -> valeur
+
+    def _signer(self, charge: bytes) -> str:
+        return b64(hmac.new(self._secret, charge, hashlib.sha256).digest())
+
+    def _encoder(self, type_code, beneficiaire_id, devise, montant, expire_le):
+        nonce = b64(os.urandom(12))
+        charge = "|".join((
+            type_code, beneficiaire_id, devise,
+            "" if montant is None else str(montant),
+            "" if expire_le is None else str(expire_le),
+            nonce,
+        )).encode()
+        return f"{PREFIXE}.{b64(charge)}.{self._signer(charge)}"
+
+    # ------------------------------------------------------
+    # Génération
+    # ------------------------------------------------------
+    def generer_dynamique(self, beneficiaire_id, montant=None, devise=None, duree=None):
+        """
+        Génère un code à usage unique (ex : montant saisi par le marchand).
+
+        Args:
+            beneficiaire_id: utilisateur qui reçoit le paiement
+            montant: montant imposé, ou None pour laisser le payeur le saisir
+            duree: validité en secondes (plafonnée à QR_DUREE_MAX)
+
+        Returns:
+            str: la valeur à afficher dans le code QR
+        """
+        beneficiaire_id = identifiant_uuid(beneficiaire_id, "bénéficiaire")
+        montant = montant_decimal(montant) if montant is not None else None
+        duree = min(duree or self.duree, self.duree_max)
+        devise = (devise or Config.TRANSFERT_DEVISE).upper()
+        return self._encoder("D", beneficiaire_id, devise, montant, int(time.time() + duree))
+
+    def generer_statique(self, marchand_id, devise=None):
+        """
+        Retourne le code fixe d'un marchand (affiché en caisse, sans montant).
+        Le même code est renvoyé tant qu'il reste dans le cache.
+        """
+        marchand_id = identifiant_uuid(marchand_id, "marchand")
+        devise = (devise or Config.TRANSFERT_DEVISE).upper()
+        valeur = self._codes_marchands.get((marchand_id, devise))
+        if valeur is None:
+            valeur = self._encoder("S", marchand_id, devise, None, None)
+            self._codes_marchands.set((marchand_id, devise), valeur)
+        return valeur
+
+    # ------------------------------------------------------
+    # Lecture / vérification
+    # ------------------------------------------------------
+    def lire(self, valeur):
+        """
+        Vérifie la signature et l'expiration d'un code (sans le consommer).
+
+        Returns:
+            CodeQR
+
+        Raises:
+            QRInvalide: code illisible ou falsifié
+            QRExpire: code dynamique expiré
+        """
+        # Valeur scannée (non fiable) : seule une chaîne peut être un code
+        if not isinstance(valeur, str):
+            raise QRInvalide("Code QR illisible.")
+
+        code = self._statiques.get(valeur)
+        if code is not None:
+            return code
+
+        try:
+            prefixe, charge_b64, signature = valeur.split(".")
+            charge = unb64(charge_b64)
+            # Comparaison en octets : une signature non ASCII est simplement refusée
+            signature_valide = hmac.compare_digest(self._signer(charge).encode(), signature.encode())
+        except ValueError:
+            raise QRInvalide("Code QR illisible.")
+        if prefixe != PREFIXE or not signature_valide:
+            raise QRInvalide("Code QR invalide.")
+
+        type_code, beneficiaire_id, devise, montant, expire_le, nonce = charge.decode().split("|")
+        code = CodeQR(
+            beneficiaire_id, devise,
+            Decimal(montant) if montant else None,
+            int(expire_le) if expire_le else None,
+            nonce, type_code == "S",
+        )
+
+        if code.statique:
+            # Signature vérifiée une fois : les scans suivants sont servis par le cache
+            self._statiques.set(valeur, code)
+        elif code.expire_le <= time.time():
+            raise QRExpire("Code QR expiré.")
+        return code
+
+    # ------------------------------------------------------
+    # Paiement
+    # ------------------------------------------------------
+    def payer(self, valeur, payeur_id, montant=None, message=None):
+        """
+        Paie le bénéficiaire d'un code QR depuis le portefeuille du payeur.
+
+        Args:
+            valeur: contenu scanné
+            payeur_id: utilisateur qui paie
+            montant: obligatoire si le code n'impose pas de montant
+
+        Returns:
+            TransfertEffectue
+
+        Raises:
+            QRInvalide / QRExpire / QRDejaUtilise: code refusé
+            QRIndisponible: index anti-rejeu plein
+            TransfertInvalide / SoldeInsuffisant: paiement refusé
+        """
+        code = self.lire(valeur)
+
+        if code.montant is not None:
+            if montant is not None and montant_decimal(montant) != code.montant:
+                raise QRInvalide("Le montant ne correspond pas au code QR.")
+            montant = code.montant
+        elif montant is None:
+            raise QRInvalide("Montant requis pour ce code QR.")
+
+        if code.statique:
+            return TransferService.transferer(payeur_id, code.beneficiaire_id, montant, code.devise,
+                                              methode_paiement="QR_CODE", message=message)
+
+        # Code dynamique : réservé avant le transfert, libéré si le paiement est refusé
+        self._rejeu.marquer(code.nonce, code.expire_le)
+        try:
+            return TransferService.transferer(payeur_id, code.beneficiaire_id, montant, code.devise,
+                                              methode_paiement="QR_CODE", message=message)
+        except TransfertInvalide:
+            # Refus certain (aucune écriture) ; après une erreur SQL, l'issue est
+            # incertaine et le code reste consommé
+            self._rejeu.liberer(code.nonce)
+            raise
+
+
+# ==========================================================
+# Instance globale partagée
+# ==========================================================
+_qr_manager = None
+_qr_lock = threading.Lock()
+
+
+def get_qr_manager():
+    """Retourne le gestionnaire de codes QR global, créé à la première utilisation."""
+    global _qr_manager
+
+    if _qr_manager is None:
+        with _qr_lock:
+            if _qr_manager is None:
+                _qr_manager = QRManager()
+    return _qr_manager
@@ -0,0 +1,196 @@
+# ==========================================================
+# Importations des bibliothèques nécessaires
+# ==========================================================
+import hashlib, hmac, os, secrets, threading, time  # Signature et génération des jetons
+from config import Config  # Secret, durées de vie et taille des caches
+from models.encodage import b64, unb64  # Base64 "url-safe" sans '=' (jetons signés)
+from database.pool import get_conn_cursor, execute_prepare  # Rechargement du profil en cas d'absence du cache
+from models.cache import TTLCache  # Cache mémoire LRU avec expiration
+from models.utilisateur import Utilisateur, COLONNES_PROFIL, colonnes_sql  # Profil compact (jamais le mot de passe)
+
+
+# ==========================================================
+# Classe : SessionManager
+# ----------------------------------------------------------
+# Émet et valide des jetons de session signés (HMAC-SHA256).
+#
+# Format du jeton : base64(utilisateur_id|emis_le|expire_le|jti).signature
+#
+# La validation d'un jeton ne demande ni PBKDF2 ni requête SQL
+# dans le cas courant :
+#   1. cache des jetons déjà validés (LRU + TTL)
+#   2. sinon vérification de la signature et de l'expiration
+#   3. profil lu dans le cache des utilisateurs, la base n'étant
+#      consultée qu'en cas d'absence
+#
+# Les révocations sont conservées en mémoire jusqu'à l'expiration
+# des jetons concernés (elles sont perdues au redémarrage).
+# ==========================================================
+class SessionManager:
+
+    def __init__(self, secret=None, duree=None, taille_cache=None, ttl_cache=None):
+        # Sans secret configuré, un secret aléatoire est généré : les jetons
+        # ne survivent alors pas au redémarrage du processus
+        secret = secret or Config.SESSION_SECRET or secrets.token_hex(32)
+        self._secret = secret.encode() if isinstance(secret, str) else secret
+        self.duree = duree or Config.SESSION_TTL
+
+        taille_cache = taille_cache or Config.SESSION_CACHE_MAX
+        ttl_cache = ttl_cache or Config.SESSION_CACHE_TTL
+        self._jetons = TTLCache(taille_cache, self.duree)   # jeton -> (utilisateur_id, emis_le, jti, expire_le)
+        self._profils = TTLCache(taille_cache, ttl_cache)   # utilisateur_id -> Utilisateur (profil)
+
+        self._lock = threading.Lock()
+        self._revoques = {}          # jti -> expiration
+        self._revoques_avant = {}    # utilisateur_id -> horodatage (jetons émis avant = invalides)
+
+    # ------------------------------------------------------
+    # Signature
+    # ------------------------------------------------------
+    def _signer(self, charge: bytes) -> str:
+        return b64(hmac.new(self._secret, charge, hashlib.sha256).digest())
+
+    # ------------------------------------------------------
+    # Méthode : creer_session
+    # ------------------------------------------------------
+    def creer_session(self, utilisateur):
+        """
+        Émet un jeton signé pour un utilisateur authentifié.
+
+        Args:
+            utilisateur (Utilisateur): infos renvoyées par verifier_connexion
+
+        Returns:
+            str: le jeton de session
+        """
+        uid = str(utilisateur.id)
+        emis_le = time.time()
+        expire_le = int(emis_le + self.duree)
+        jti = b64(os.urandom(12))
+
+        charge = f"{uid}|{emis_le:.6f}|{expire_le}|{jti}".encode()
+        jeton = f"{b64(charge)}.{self._signer(charge)}"
+
+        # Le profil est déjà connu : on évite une requête à la première validation
+        self._profils.set(uid, Utilisateur(*utilisateur[:len(COLONNES_PROFIL)]))
+        self._jetons.set(jeton, (uid, emis_le, jti, expire_le), ttl=self.duree)
+        return jeton
+
+    # ------------------------------------------------------
+    # Méthode : valider
+    # ------------------------------------------------------
+    def valider(self, jeton):
+        """
+        Valide un jeton et retourne le profil de l'utilisateur.
+
+        Returns:
+            Utilisateur | None: profil (sans mot de passe), ou None si le jeton est invalide,
+                                expiré ou révoqué.
+        """
+        if not jeton or not isinstance(jeton, str):
+            return None
+
+        infos = self._jetons.get(jeton)
+        if infos is None:
+            infos = self._decoder(jeton)
+            if infos is None:
+                return None
+            self._jetons.set(jeton, infos, ttl=infos[3] - time.time())
+
+        uid, emis_le, jti, expire_le = infos
+        if expire_le <= time.time() or self._est_revoque(uid, emis_le, jti):
+            self._jetons.pop(jeton)
+            return None
+
+        profil = self._profils.get(uid)
+        if profil is None:
+            profil = self._charger_profil(uid)
+            if profil is None:
+                return None
+        return profil
+
+    def _decoder(self, jeton):
+        """Vérifie la signature d'un jeton inconnu du cache et en extrait le contenu."""
+        if not isinstance(jeton, str):
+            return None
+        try:
+            charge_b64, signature = jeton.split(".", 1)
+            charge = unb64(charge_b64)
+            # Comparaison en octets : une signature non ASCII est simplement refusée
+            if not hmac.compare_digest(self._signer(charge).encode(), signature.encode()):
+                return None
+            uid, emis_le, expire_le, jti = charge.decode().split("|")
+            return uid, float(emis_le), jti, int(expire_le)
+        except (ValueError, UnicodeDecodeError):
+            return None
+
+    def _est_revoque(self, uid, emis_le, jti):
+        with self._lock:
+            if jti in self._revoques:
+                return True
+            limite = self._revoques_avant.get(uid)
+            return limite is not None and emis_le < limite
+
+    def _charger_profil(self, uid):
+        with get_conn_cursor(readonly=True, cle=uid) as (conn, cur):
+            execute_prepare(
+                cur, "utilisateur_profil",
+                f"SELECT {colonnes_sql(COLONNES_PROFIL)} FROM public.utilisateur WHERE id = $1",
+                (uid,)
+            )
+            ligne = cur.fetchone()
+        if ligne is None:
+            return None
+        profil = Utilisateur(*ligne)
+        self._profils.set(uid, profil)
+        return profil
+
+    # ------------------------------------------------------
+    # Révocation et invalidation
+    # ------------------------------------------------------
+    def revoquer(self, jeton):
+        """Révoque un jeton (déconnexion)."""
+        infos = self._jetons.pop(jeton) or self._decoder(jeton)
+        if infos is None:
+            return
+        maintenant = time.time()
+        with self._lock:
+            self._revoques[infos[2]] = infos[3]
+            # Purge des révocations devenues inutiles (jetons expirés)
+            for jti, expire_le in list(self._revoques.items()):
+                if expire_le <= maintenant:
+                    del self._revoques[jti]
+
+    def revoquer_utilisateur(self, utilisateur_id):
+        """Révoque toutes les sessions émises jusqu'ici pour un utilisateur (ex : changement de mot de passe)."""
+        uid = str(utilisateur_id)
+        maintenant = time.time()
+        with self._lock:
+            self._revoques_avant[uid] = maintenant
+            # Au-delà de la durée de vie d'un jeton, la limite n'a plus d'effet
+            for autre, limite in list(self._revoques_avant.items()):
+                if limite + self.duree <= maintenant:
+                    del self._revoques_avant[autre]
+        self._profils.pop(uid)
+
+    def invalider_utilisateur(self, utilisateur_id):
+        """Oublie le profil en cache : il sera relu en base à la prochaine validation."""
+        self._profils.pop(str(utilisateur_id))
+
+
+# ==========================================================
+# Instance globale partagée
+# ==========================================================
+_sessions = None
+_sessions_lock = threading.Lock()
+
+
+def get_session_manager():
+    """Retourne le gestionnaire de sessions global, créé à la première utilisation."""
+    global _sessions
+
+    if _sessions is None:
+        with _sessions_lock:
+            if _sessions is None:
+                _sessions = SessionManager()
+    return _sessions
@@ -0,0 +1,488 @@
+# ==========================================================
+# Importations des bibliothèques nécessaires
+# ==========================================================
+import threading, time, uuid  # File des transferts groupés et identifiants des transactions
+from collections import defaultdict  # Cumul des variations de solde par portefeuille
+from concurrent.futures import Future  # Résultat d'un transfert soumis à la file
+from datetime import datetime  # Date des transactions
+from decimal import Decimal, InvalidOperation  # Montants exacts (jamais de float pour de l'argent)
+from queue import Queue, Empty  # File d'attente des transferts groupés
+from typing import NamedTuple, Optional  # Enregistrements compacts
+from psycopg2.extras import execute_values  # Insertions / mises à jour multi-lignes en une requête
+from config import Config  # Devise par défaut et taille des lots
+from database.pool import get_conn_cursor, marquer_ecriture, apres_commit, unite_courante, unite_de_travail  # Requêtes SQL via le pool (et unité de travail)
+
+# Montant maximal représentable par la colonne numeric(12,2)
+MONTANT_MAX = Decimal("9999999999.99")
+CENTIME = Decimal("0.01")
+
+# Modes de paiement acceptés par la table transaction
+METHODES_PAIEMENT = {"QR_CODE", "NUMERO_TELEPHONE"}
+
+
+# ==========================================================
+# Exceptions : TransfertInvalide / PortefeuilleIntrouvable /
+#              SoldeInsuffisant / PlafondDepasse
+# ==========================================================
+class TransfertInvalide(ValueError):
+    """Transfert refusé : montant, participants ou mode de paiement incorrects."""
+
+
+class PortefeuilleIntrouvable(TransfertInvalide):
+    """Aucun portefeuille actif dans la devise pour l'expéditeur ou le destinataire."""
+
+
+class SoldeInsuffisant(TransfertInvalide):
+    """Le solde de l'expéditeur ne couvre pas le montant."""
+
+
+class PlafondDepasse(TransfertInvalide):
+    """Le solde du destinataire dépasserait MONTANT_MAX (numeric(12,2))."""
+
+
+# ==========================================================
+# Enregistrements : Transfert (demande) / TransfertEffectue (résultat)
+# ==========================================================
+class Transfert(NamedTuple):
+    expediteur_id: str
+    destinataire_id: str
+    montant: Decimal
+    devise: str
+    methode_paiement: str = "NUMERO_TELEPHONE"
+    message: Optional[str] = None
+
+
+class TransfertEffectue(NamedTuple):
+    transaction_id: str
+    expediteur_id: str
+    destinataire_id: str
+    montant: Decimal
+    devise: str
+    methode_paiement: str
+    date: datetime
+    solde_expediteur: Decimal
+    solde_destinataire: Decimal
+    portefeuille_expediteur: Optional[str] = None
+    portefeuille_destinataire: Optional[str] = None
+
+
+# ==========================================================
+# Fonctions de validation
+# ==========================================================
+def montant_decimal(valeur):
+    """
+    Convertit un montant en Decimal à deux décimales.
+
+    Raises:
+        TransfertInvalide: montant non numérique, négatif, nul, trop grand
+        ou avec plus de deux décimales (aucun arrondi silencieux)
+    """
+    try:
+        montant = Decimal(str(valeur).strip().replace(",", "."))
+    except (InvalidOperation, ValueError):
+        raise TransfertInvalide("Montant invalide.")
+    if not montant.is_finite() or montant <= 0:
+        raise TransfertInvalide("Le montant doit être positif.")
+    if montant != montant.quantize(CENTIME):
+        raise TransfertInvalide("Le montant ne peut pas avoir plus de deux décimales.")
+    if montant > MONTANT_MAX:
+        raise TransfertInvalide("Montant trop élevé.")
+    return montant.quantize(CENTIME)
+
+
+def identifiant_uuid(valeur, role):
+    """Normalise un identifiant UUID (TransfertInvalide s'il est mal formé)."""
+    try:
+        return str(uuid.UUID(str(valeur)))
+    except ValueError:
+        raise TransfertInvalide(f"Identifiant {role} invalide.")
+
+
+def preparer_transfert(expediteur_id, destinataire_id, montant, devise=None,
+                       methode_paiement="NUMERO_TELEPHONE", message=None):
+    """
+    Valide et normalise une demande de transfert.
+
+    Returns:
+        Transfert
+    """
+    expediteur_id = identifiant_uuid(expediteur_id, "expéditeur")
+    destinataire_id = identifiant_uuid(destinataire_id, "destinataire")
+    if expediteur_id == destinataire_id:
+        raise TransfertInvalide("L'expéditeur et le destinataire doivent être différents.")
+    if methode_paiement not in METHODES_PAIEMENT:
+        raise TransfertInvalide("Mode de paiement invalide.")
+    return Transfert(expediteur_id, destinataire_id, montant_decimal(montant),
+                     (devise or Config.TRANSFERT_DEVISE).upper(), methode_paiement, message)
+
+
+# ==========================================================
+# Abonnés : fonctions appelées après chaque commit de transferts
+# ----------------------------------------------------------
+# Point d'extension pour les notifications, alertes de solde, etc.
+# Chaque abonné reçoit la liste des TransfertEffectue validés ;
+# il doit rester rapide (mise en file, pas de requête bloquante).
+#
+# Un abonné "transactionnel" est appelé, dans une unité de
+# travail, avant sa validation : ses écritures différées
+# (differer) partent dans la même transaction que les transferts.
+# Hors unité, il est appelé après le commit comme les autres.
+# ==========================================================
+_abonnes = []
+_abonnes_transactionnels = []
+
+
+def abonner(callback, transactionnel=False):
+    """Enregistre 'callback(effectues)' appelé après chaque commit de transferts."""
+    abonnes = _abonnes_transactionnels if transactionnel else _abonnes
+    if callback not in abonnes:
+        abonnes.append(callback)
+
+
+def desabonner(callback):
+    for abonnes in (_abonnes, _abonnes_transactionnels):
+        if callback in abonnes:
+            abonnes.remove(callback)
+
+
+def _publier(effectues, abonnes):
+    if not effectues:
+        return
+    for callback in list(abonnes):
+        try:
+            callback(effectues)
+        except Exception as e:
+            # Les transferts sont déjà validés : une erreur d'abonné ne les annule pas
+            print(" Erreur d'un abonné aux transferts :", e)
+
+
+# ==========================================================
+# Fonctions internes : verrouillage et application d'un lot
+# ==========================================================
+def _verrouiller_portefeuilles(cur, transferts):
+    """
+    Verrouille (FOR UPDATE) les portefeuilles concernés, toujours dans
+    l'ordre de leur id : deux lots qui touchent les mêmes portefeuilles
+    prennent les verrous dans le même ordre et ne peuvent pas s'interbloquer.
+
+    Returns:
+        dict (utilisateur_id, devise) -> [portefeuille_id, solde]
+    """
+    utilisateurs = sorted({t.expediteur_id for t in transferts} | {t.destinataire_id for t in transferts})
+    devises = sorted({t.devise for t in transferts})
+    cur.execute(
+        """
+        SELECT id::text, utilisateur_id::text, devise, solde
+        FROM public.portefeuille
+        WHERE utilisateur_id = ANY(%s::uuid[]) AND devise = ANY(%s)
+          AND statut = 'ACTIF' AND fournisseur = 'INTERNE'
+        ORDER BY id
+        FOR UPDATE
+        """,
+        (utilisateurs, devises)
+    )
+    portefeuilles = {}
+    for portefeuille_id, utilisateur_id, devise, solde in cur.fetchall():
+        # Plusieurs portefeuilles dans la même devise : le premier (par id) est utilisé
+        portefeuilles.setdefault((utilisateur_id, devise), [portefeuille_id, solde])
+    return portefeuilles
+
+
+def _appliquer(cur, transferts):
+    """
+    Applique un lot de transferts dans la transaction courante (sans commit).
+
+    Les transferts sont évalués dans l'ordre sur les soldes verrouillés ;
+    un transfert refusé n'empêche pas les suivants. Les soldes sont ensuite
+    mis à jour par variation nette : un portefeuille marchand qui reçoit
+    mille paiements dans le lot n'est modifié qu'une fois.
+
+    Returns:
+        list: pour chaque transfert, un TransfertEffectue ou l'exception de refus
+    """
+    portefeuilles = _verrouiller_portefeuilles(cur, transferts)
+    date = datetime.now()
+    resultats, lignes = [], []
+    variations = defaultdict(Decimal)
+    derniere_transaction = {}
+
+    for t in transferts:
+        source = portefeuilles.get((t.expediteur_id, t.devise))
+        cible = portefeuilles.get((t.destinataire_id, t.devise))
+        if source is None or cible is None:
+            resultats.append(PortefeuilleIntrouvable(f"Aucun portefeuille actif en {t.devise}."))
+            continue
+        # Refus limités à ce transfert : une erreur SQL (solde NULL, dépassement de
+        # numeric(12,2)) annulerait tout le lot
+        if source[1] is None or cible[1] is None:
+            resultats.append(PortefeuilleIntrouvable("Solde du portefeuille indisponible."))
+            continue
+        if source[1] < t.montant:
+            resultats.append(SoldeInsuffisant("Solde insuffisant."))
+            continue
+        if cible[1] + t.montant > MONTANT_MAX:
+            resultats.append(PlafondDepasse("Le solde du destinataire dépasserait le plafond autorisé."))
+            continue
+
+        source[1] -= t.montant
+        cible[1] += t.montant
+        variations[source[0]] -= t.montant
+        variations[cible[0]] += t.montant
+
+        transaction_id = str(uuid.uuid4())
+        derniere_transaction[source[0]] = derniere_transaction[cible[0]] = transaction_id
+        lignes.append((transaction_id, t.montant, t.devise, date, t.message, t.methode_paiement,
+                       t.expediteur_id, t.destinataire_id))
+        resultats.append(TransfertEffectue(transaction_id, t.expediteur_id, t.destinataire_id, t.montant,
+                                           t.devise, t.methode_paiement, date, source[1], cible[1],
+                                           source[0], cible[0]))
+
+    if lignes:
+        # Une seule requête pour toutes les lignes de transaction du lot
+        execute_values(
+            cur,
+            """
+            INSERT INTO public.transaction (
+                id, montant, devise, date, message, methode_paiement,
+                expediteur_id, destinataire_id, type, statut, fournisseur, moyen_paiement
+            ) VALUES %s
+            """,
+            lignes,
+            template="(%s::uuid, %s, %s, %s, %s, %s, %s::uuid, %s::uuid, "
+                     "'ENVOI', 'SUCCES', 'INTERNE', 'PORTEFEUILLE_INTERNE')",
+            page_size=1000
+        )
+        # Une seule requête pour tous les portefeuilles touchés (variation nette)
+        execute_values(
+            cur,
+            """
+            UPDATE public.portefeuille AS p
+            SET solde = p.solde + v.variation,
+                derniere_transaction_id = v.transaction_id,
+                date_derniere_mise_a_jour = v.date
+            FROM (VALUES %s) AS v(id, variation, transaction_id, date)
+            WHERE p.id = v.id
+            """,
+            [(pid, variations[pid], derniere_transaction[pid], date) for pid in sorted(variations)],
+            template="(%s::uuid, %s::numeric, %s::uuid, %s::timestamp)",
+            page_size=1000
+        )
+    return resultats
+
+
+# ==========================================================
+# Classe : TransferService
+# ----------------------------------------------------------
+# Débit / crédit atomique des portefeuilles internes :
+# - montants Decimal (numeric(12,2) côté PostgreSQL)
+# - verrous pris dans un ordre déterministe (pas d'interblocage)
+# - lignes 'transaction' écrites dans le même commit que les soldes
+# ==========================================================
+class TransferService:
+
+    # ------------------------------------------------------
+    # Méthode : transferer
+    # ------------------------------------------------------
+    @staticmethod
+    def transferer(expediteur_id, destinataire_id, montant, devise=None,
+                   methode_paiement="NUMERO_TELEPHONE", message=None):
+        """
+        Effectue un transfert unique dans sa propre unité de travail (ou dans
+        celle de l'appelant) : les notifications du transfert sont écrites
+        dans la même transaction, en un seul aller-retour.
+
+        Returns:
+            TransfertEffectue
+
+        Raises:
+            TransfertInvalide: demande invalide
+            PortefeuilleIntrouvable: portefeuille actif manquant dans la devise
+            SoldeInsuffisant: solde de l'expéditeur trop faible
+            PlafondDepasse: solde du destinataire trop élevé après crédit
+        """
+        transfert = preparer_transfert(expediteur_id, destinataire_id, montant, devise,
+                                       methode_paiement, message)
+        with unite_de_travail():
+            resultat = TransferService.transferer_lot([transfert])[0]
+            if isinstance(resultat, Exception):
+                raise resultat   # annule l'unité (aucune écriture)
+        return resultat
+
+    # ------------------------------------------------------
+    # Méthode : transferer_lot
+    # ------------------------------------------------------
+    @staticmethod
+    def transferer_lot(transferts):
+        """
+        Applique plusieurs transferts (déjà validés par preparer_transfert)
+        en un seul commit.
+
+        Returns:
+            list: pour chaque transfert, un TransfertEffectue ou l'exception de refus
+
+        Raises:
+            psycopg2.Error: erreur SQL (le lot entier est annulé)
+        """
+        if not transferts:
+            return []
+
+        with get_conn_cursor() as (conn, cur):
+            resultats = _appliquer(cur, transferts)
+            effectues = [r for r in resultats if isinstance(r, TransfertEffectue)]
+            if effectues:
+                conn.commit()
+            elif unite_courante() is None:
+                # (dans une unité de travail, un rollback annulerait aussi ses autres écritures)
+                conn.rollback()
+
+        # Dans une unité, les abonnés transactionnels écrivent dans sa transaction
+        dans_unite = unite_courante() is not None
+        if dans_unite:
+            _publier(effectues, _abonnes_transactionnels)
+
+        def _apres_validation():
+            # L'historique des parties reste lu sur le primaire le temps de la réplication
+            marquer_ecriture(*{u for t in effectues for u in (t.expediteur_id, t.destinataire_id)})
+            _publier(effectues, _abonnes if dans_unite else _abonnes_transactionnels + _abonnes)
+
+        # Dans une unité de travail, les autres abonnés ne sont prévenus qu'après sa validation
+        apres_commit(_apres_validation)
+        return resultats
+
+    # ------------------------------------------------------
+    # Méthode : soumettre
+    # ------------------------------------------------------
+    @staticmethod
+    def soumettre(expediteur_id, destinataire_id, montant, devise=None,
+                  methode_paiement="NUMERO_TELEPHONE", message=None):
+        """
+        Envoie le transfert dans la file des transferts groupés.
+
+        Returns:
+            Future: résolu avec un TransfertEffectue, ou en erreur (TransfertInvalide…)
+
+        Raises:
+            TransfertInvalide: demande invalide (avant mise en file)
+        """
+        transfert = preparer_transfert(expediteur_id, destinataire_id, montant, devise,
+                                       methode_paiement, message)
+        return get_file_transferts().soumettre(transfert)
+
+
+def _demarrer(future):
+    try:
+        return future.set_running_or_notify_cancel()
+    except RuntimeError:
+        return False   # Future déjà démarré ou résolu ailleurs
+
+
+def _resoudre(methode, valeur):
+    # Une erreur sur un Future ne doit jamais arrêter le thread de la file
+    try:
+        methode(valeur)
+    except Exception as e:
+        print(" Résultat de transfert non transmis :", e)
+
+
+# ==========================================================
+# Classe : FileTransferts
+# ----------------------------------------------------------
+# Regroupe les transferts soumis par de nombreux threads en lots
+# appliqués par un thread unique : jusqu'à 'lot_max' transferts
+# ou 'delai' secondes d'attente par commit.
+#
+# Un portefeuille très sollicité (marchand) n'est plus verrouillé
+# et mis à jour à chaque paiement, mais une fois par lot.
+# ==========================================================
+class FileTransferts:
+
+    def __init__(self, lot_max=None, delai=None):
+        self.lot_max = lot_max or Config.TRANSFERT_LOT_MAX
+        self.delai = (delai if delai is not None else Config.TRANSFERT_LOT_DELAI_MS / 1000.0)
+        self._file = Queue()
+        self._ferme = False
+        self._thread = threading.Thread(target=self._boucle, name="transferts", daemon=True)
+        self._thread.start()
+
+    def soumettre(self, transfert):
+        if self._ferme:
+            raise RuntimeError("File des transferts fermée.")
+        future = Future()
+        self._file.put((transfert, future))
+        return future
+
+    def _boucle(self):
+        while True:
+            element = self._file.get()
+            if element is None:
+                return
+            lot = [element]
+
+            # Complète le lot pendant au plus 'delai' secondes
+            limite = time.monotonic() + self.delai
+            while len(lot) < self.lot_max:
+                reste = limite - time.monotonic()
+                try:
+                    element = self._file.get(timeout=reste) if reste > 0 else self._file.get_nowait()
+                except Empty:
+                    break
+                if element is None:
+                    self._executer(lot)
+                    return
+                lot.append(element)
+
+            self._executer(lot)
+
+    def _executer(self, lot):
+        # Un transfert dont l'appelant a annulé le Future n'est pas appliqué ;
+        # les autres ne peuvent plus être annulés pendant leur application
+        lot = [(t, future) for t, future in lot if _demarrer(future)]
+        if not lot:
+            return
+        try:
+            resultats = TransferService.transferer_lot([t for t, _ in lot])
+        except Exception as e:
+            for _, future in lot:
+                _resoudre(future.set_exception, e)
+            return
+        for (_, future), resultat in zip(lot, resultats):
+            if isinstance(resultat, Exception):
+                _resoudre(future.set_exception, resultat)
+            else:
+                _resoudre(future.set_result, resultat)
+
+    def fermer(self):
+        """Applique les transferts déjà soumis puis arrête le thread."""
+        if self._ferme:
+            return
+        self._ferme = True
+        self._file.put(None)
+        self._thread.join()
+
+
+# ==========================================================
+# File globale des transferts groupés
+# ==========================================================
+_file_transferts = None
+_file_lock = threading.Lock()
+
+
+def get_file_transferts():
+    """Retourne la file des transferts groupés, créée à la première utilisation."""
+    global _file_transferts
+
+    if _file_transferts is None:
+        with _file_lock:
+            if _file_transferts is None:
+                _file_transferts = FileTransferts()
+    return _file_transferts
+
+
+def fermer_file_transferts():
+    """Vide et arrête la file des transferts groupés (si elle a été créée)."""
+    global _file_transferts
+
+    with _file_lock:
+        if _file_transferts is not None:
+            _file_transferts.fermer()
+            _file_transferts = None
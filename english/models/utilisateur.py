@@ -0,0 +1,54 @@
+# ==========================================================
+# Importations nécessaires
+# ==========================================================
+from datetime import date, datetime  # Types des colonnes date_naissance / date_inscription
+from typing import NamedTuple, Optional  # Enregistrement compact (tuple) et annotations
+
+
+# ==========================================================
+# Classe : Utilisateur
+# ----------------------------------------------------------
+# Enregistrement compact d'un utilisateur, stocké comme un tuple
+# (pas de dictionnaire par ligne, contrairement à RealDictRow).
+#
+# L'ordre des champs est choisi pour que chaque projection soit
+# un préfixe : une requête qui sélectionne COLONNES_PROFIL ou
+# COLONNES_CONNEXION construit directement Utilisateur(*ligne),
+# les champs non sélectionnés valant None.
+# ==========================================================
+class Utilisateur(NamedTuple):
+    id: object
+    nom: Optional[str] = None
+    prenom: Optional[str] = None
+    role: Optional[str] = None
+    email: Optional[str] = None
+    kyc_status: Optional[str] = None
+    niveau_verification: Optional[int] = None
+    mot_de_passe: Optional[str] = None
+    numero_telephone: Optional[str] = None
+    date_naissance: Optional[date] = None
+    adresse: Optional[str] = None
+    date_inscription: Optional[datetime] = None
+
+    def profil(self):
+        """Retourne les informations publiques sous forme de dictionnaire (sans le mot de passe)."""
+        return {col: getattr(self, col) for col in COLONNES_PROFIL}
+
+
+# ==========================================================
+# Projections : colonnes sélectionnées selon l'usage
+# ==========================================================
+
+# Profil affiché / mis en cache par les sessions
+COLONNES_PROFIL = Utilisateur._fields[:7]
+
+# Connexion : profil + hash du mot de passe
+COLONNES_CONNEXION = Utilisateur._fields[:8]
+
+# Fiche complète
+COLONNES_COMPLETES = Utilisateur._fields
+
+
+def colonnes_sql(colonnes):
+    """Liste de colonnes prête à être insérée dans une requête SELECT."""
+    return ", ".join(colonnes)
@@ -2,8 +2,14 @@
 # Importations des bibliothèques nécessaires
 # ==========================================================
 import hashlib, os, binascii, hmac  # Pour le hashage et la vérification sécurisée des mots de passe
+import re  # Pour valider le format des adresses email
 from datetime import datetime  # Pour ajouter la date d'inscription
-from database.pool import get_conn_cursor  # Pour exécuter des requêtes SQL sécurisées via le pool de connexions
+from psycopg2 import errors  # Pour reconnaître les violations de contrainte d'unicité
+from database.pool import get_conn_cursor, execute_prepare, marquer_ecriture, apres_commit, unite_courante  # Requêtes SQL via le pool (préparées côté serveur pour les plus fréquentes)
+from models.hash_executor import get_hash_executor  # Pool de workers dédié au calcul PBKDF2
+from models.session_model import get_session_manager  # Invalidation du profil en cache après modification
+from models.index_existence import get_index_existence  # Index mémoire des emails/numéros déjà utilisés
+from models.utilisateur import Utilisateur, COLONNES_CONNEXION, COLONNES_COMPLETES, colonnes_sql  # Enregistrement compact et projections
 
 # ==========================================================
 # Paramètres de sécurité pour le hashage des mots de passe
@@ -16,6 +22,60 @@ DKLEN = 32  # Taille du hash dérivé (en octets)
 # Définition des rôles autorisés dans le système
 ROLES = {"CLIENT", "MARCHAND", "ADMIN"}
 
+# Longueurs maximales des colonnes texte de la table utilisateur (varchar du schéma)
+LONGUEURS_MAX = {
+    "nom": 100,
+    "prenom": 100,
+    "email": 100,
+    "numero_telephone": 20,
+    "adresse": 100,
+}
+
+# Contraintes d'unicité de la table utilisateur → champ concerné
+CONTRAINTES_UNIQUES = {
+    "utilisateur_email_key": "email",
+    "utilisateur_numero_telephone_key": "numero_telephone",
+}
+
+
+# ==========================================================
+# Exception : UtilisateurExisteDeja
+# ----------------------------------------------------------
+# Levée par creer_utilisateur lorsqu'un email ou un numéro de
+# téléphone est déjà utilisé. 'champ' indique la clé en conflit.
+# ==========================================================
+class UtilisateurExisteDeja(ValueError):
+
+    def __init__(self, champ):
+        super().__init__(f"{champ} déjà utilisé")
+        self.champ = champ
+
+
+# ==========================================================
+# Fonction : valider_email
+# ==========================================================
+def valider_email(email):
+    """
+    Vérifie si l'email entré par l'utilisateur respecte un format valide.
+    Exemple : 'nom@domaine.com'
+    Retourne True si l'email est valide, sinon False.
+    """
+    return bool(re.match(r"[^@]+@[^@]+\.[^@]+", email))
+
+
+# ==========================================================
+# Fonction : champ_trop_long
+# ==========================================================
+def champ_trop_long(donnees):
+    """
+    Retourne le premier champ dont la valeur dépasse la taille de sa colonne
+    (LONGUEURS_MAX), ou None si toutes les valeurs tiennent.
+    """
+    for champ, longueur in LONGUEURS_MAX.items():
+        if len(donnees.get(champ) or "") > longueur:
+            return champ
+    return None
+
 
 # ==========================================================
 # Fonction : hash_password
@@ -71,6 +131,26 @@ def verify_password(stored: str, attempt: str) -> bool:
         return False
 
 
+# ==========================================================
+# Fonction : necessite_rehash
+# ==========================================================
+def necessite_rehash(stored: str) -> bool:
+    """
+    Indique si un hash stocké a été calculé avec un nombre d'itérations
+    différent de la valeur actuelle de ITERATIONS.
+
+    Args:
+        stored (str): le hash complet stocké (format "iterations$salt$hash")
+
+    Returns:
+        bool: True si le hash doit être recalculé avec les paramètres actuels
+    """
+    try:
+        return int(stored.split("$", 1)[0]) != ITERATIONS
+    except (ValueError, AttributeError):
+        return False
+
+
 # ==========================================================
 # Classe principale : UtilisateurModel
 # ----------------------------------------------------------
@@ -90,15 +170,24 @@ class UtilisateurModel:
         Crée un nouvel utilisateur dans la base de données.
         Les mots de passe sont toujours hachés avant d’être enregistrés.
 
+        L'insertion est atomique : les doublons sont détectés par les
+        contraintes d'unicité en une seule requête, sans SELECT préalable.
+
         Args:
             nom, prenom, email, mot_de_passe, numero, date_naissance, adresse, role
+
+        Returns:
+            l'identifiant du nouvel utilisateur
+
+        Raises:
+            UtilisateurExisteDeja: si l'email ou le numéro est déjà utilisé
         """
         # Si le rôle fourni n'est pas reconnu, on le remplace par "CLIENT"
         if role not in ROLES:
             role = "CLIENT"
 
-        # Hachage sécurisé du mot de passe avant insertion
-        mot_hash = hash_password(mot_de_passe)
+        # Hachage sécurisé du mot de passe avant insertion (calculé sur le pool de hachage)
+        mot_hash = get_hash_executor().executer(hash_password, mot_de_passe)
 
         # Ouverture d’une connexion sécurisée via le pool
         with get_conn_cursor() as (conn, cur):
@@ -110,17 +199,70 @@ class UtilisateurModel:
                     kyc_status, role, niveau_verification, date_inscription
                 )
                 VALUES (%s, %s, %s, %s, %s, %s, %s, 'EN_ATTENTE', %s, 0, %s)
+                RETURNING id
             """
 
+            # Dans une unité de travail, un doublon ne doit annuler que cette insertion
+            dans_unite = unite_courante() is not None
+            if dans_unite:
+                cur.execute("SAVEPOINT creer_utilisateur")
+
             # Exécution de la requête avec des valeurs paramétrées (protège contre l’injection SQL)
-            cur.execute(query, (
-                nom, prenom, email, mot_hash, numero, date_naissance,
-                adresse, role, datetime.now()
-            ))
+            try:
+                cur.execute(query, (
+                    nom, prenom, email, mot_hash, numero, date_naissance,
+                    adresse, role, datetime.now()
+                ))
+            except errors.UniqueViolation as e:
+                # La contrainte violée indique directement le champ en conflit
+                if dans_unite:
+                    cur.execute("ROLLBACK TO SAVEPOINT creer_utilisateur")
+                else:
+                    conn.rollback()
+                get_index_existence().ajouter(email, numero)
+                raise UtilisateurExisteDeja(CONTRAINTES_UNIQUES.get(e.diag.constraint_name, "email"))
+
+            utilisateur_id = cur.fetchone()[0]
 
             # Validation (commit) des changements dans la base
             conn.commit()
 
+        # Les lectures de ce compte restent sur le primaire le temps de la réplication
+        marquer_ecriture(email, numero, utilisateur_id)
+
+        # Les prochaines vérifications de doublons connaîtront ce compte
+        get_index_existence().ajouter(email, numero)
+        return utilisateur_id
+
+    # ------------------------------------------------------
+    # Méthodes : email_existe / telephone_existe
+    # ------------------------------------------------------
+    @staticmethod
+    def email_existe(email):
+        """
+        Indique si un email est déjà utilisé.
+        L'index mémoire répond sans requête SQL quand l'email est inconnu.
+        """
+        if not get_index_existence().email_peut_exister(email):
+            return False
+        with get_conn_cursor(readonly=True, cle=email) as (conn, cur):
+            execute_prepare(cur, "utilisateur_email_existe",
+                            "SELECT 1 FROM public.utilisateur WHERE email = $1", (email,))
+            return cur.fetchone() is not None
+
+    @staticmethod
+    def telephone_existe(numero):
+        """
+        Indique si un numéro de téléphone est déjà utilisé.
+        L'index mémoire répond sans requête SQL quand le numéro est inconnu.
+        """
+        if not get_index_existence().telephone_peut_exister(numero):
+            return False
+        with get_conn_cursor(readonly=True, cle=numero) as (conn, cur):
+            execute_prepare(cur, "utilisateur_telephone_existe",
+                            "SELECT 1 FROM public.utilisateur WHERE numero_telephone = $1", (numero,))
+            return cur.fetchone() is not None
+
     # ------------------------------------------------------
     # Méthode : trouver_par_email
     # ------------------------------------------------------
@@ -133,12 +275,37 @@ class UtilisateurModel:
             email (str): l'adresse email de l'utilisateur
 
         Returns:
-            dict | None: un dictionnaire contenant les infos de l'utilisateur,
-                         ou None si aucun utilisateur trouvé.
+            Utilisateur | None: la fiche complète de l'utilisateur,
+                                ou None si aucun utilisateur trouvé.
         """
-        with get_conn_cursor(dict_cursor=True) as (conn, cur):
-            cur.execute("SELECT * FROM public.utilisateur WHERE email = %s", (email,))
-            return cur.fetchone()
+        with get_conn_cursor(readonly=True, cle=email) as (conn, cur):
+            cur.execute(
+                f"SELECT {colonnes_sql(COLONNES_COMPLETES)} FROM public.utilisateur WHERE email = %s",
+                (email,)
+            )
+            ligne = cur.fetchone()
+        return Utilisateur(*ligne) if ligne is not None else None
+
+    # ------------------------------------------------------
+    # Méthode : trouver_pour_connexion
+    # ------------------------------------------------------
+    @staticmethod
+    def trouver_pour_connexion(email):
+        """
+        Lit uniquement les colonnes nécessaires à la connexion (profil + hash),
+        via une requête préparée : c'est la requête la plus fréquente.
+
+        Returns:
+            Utilisateur | None: enregistrement partiel (adresse, téléphone… valent None)
+        """
+        with get_conn_cursor(readonly=True, cle=email) as (conn, cur):
+            execute_prepare(
+                cur, "utilisateur_connexion",
+                f"SELECT {colonnes_sql(COLONNES_CONNEXION)} FROM public.utilisateur WHERE email = $1",
+                (email,)
+            )
+            ligne = cur.fetchone()
+        return Utilisateur(*ligne) if ligne is not None else None
 
     # ------------------------------------------------------
     # Méthode : verifier_connexion
@@ -153,18 +320,52 @@ class UtilisateurModel:
             mot_de_passe (str): mot de passe en clair entré par l'utilisateur
 
         Returns:
-            dict | None: renvoie les infos de l'utilisateur si succès, sinon None.
+            Utilisateur | None: renvoie les infos de l'utilisateur si succès, sinon None.
         """
-        # Recherche de l’utilisateur par email
-        user = UtilisateurModel.trouver_par_email(email)
+        # Recherche de l’utilisateur par email (colonnes utiles à la connexion seulement)
+        user = UtilisateurModel.trouver_pour_connexion(email)
 
         # Si l'utilisateur n'existe pas, on renvoie None
         if not user:
             return None
 
-        # Vérification du mot de passe haché
-        if verify_password(user["mot_de_passe"], mot_de_passe):
+        # Vérification du mot de passe haché (calculée sur le pool de hachage)
+        executor = get_hash_executor()
+        if executor.executer(verify_password, user.mot_de_passe, mot_de_passe):
+            # Si le hash utilise d'anciens paramètres, on le recalcule en arrière-plan
+            # sans rallonger le temps de réponse de la connexion
+            if necessite_rehash(user.mot_de_passe):
+                executor.arriere_plan(
+                    hash_password, mot_de_passe,
+                    callback=lambda nouveau: UtilisateurModel.mettre_a_jour_hash(user.id, user.mot_de_passe, nouveau)
+                )
             return user  # Connexion réussie
 
         # Sinon, échec de la vérification
         return None
+
+    # ------------------------------------------------------
+    # Méthode : mettre_a_jour_hash
+    # ------------------------------------------------------
+    @staticmethod
+    def mettre_a_jour_hash(utilisateur_id, ancien_hash, nouveau_hash):
+        """
+        Remplace le hash d'un utilisateur par un hash recalculé (rehachage).
+        La mise à jour n'a lieu que si le hash n'a pas changé entre-temps
+        (ex : changement de mot de passe concurrent).
+
+        Args:
+            utilisateur_id: identifiant de l'utilisateur
+            ancien_hash (str): hash lu lors de la connexion
+            nouveau_hash (str): hash calculé avec les paramètres actuels
+        """
+        with get_conn_cursor() as (conn, cur):
+            cur.execute(
+                "UPDATE public.utilisateur SET mot_de_passe = %s WHERE id = %s AND mot_de_passe = %s",
+                (nouveau_hash, utilisateur_id, ancien_hash)
+            )
+            conn.commit()
+        marquer_ecriture(utilisateur_id)
+
+        # La ligne a changé : le profil en cache des sessions est relu à la prochaine validation
+        apres_commit(lambda: get_session_manager().invalider_utilisateur(utilisateur_id))
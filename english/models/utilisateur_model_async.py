@@ -0,0 +1,165 @@
+# ==========================================================
+# Importations des bibliothèques nécessaires
+# ==========================================================
+import asyncio  # Pour planifier la mise à jour du hash depuis un thread du pool de hachage
+from datetime import datetime  # Pour ajouter la date d'inscription
+import asyncpg  # Pour reconnaître les violations de contrainte d'unicité
+from database.async_pool import get_async_conn  # Connexions issues du pool asyncio
+from database.pool import marquer_ecriture  # Lectures de ses propres écritures (comme la version synchrone)
+from models.hash_executor import get_hash_executor  # Pool de workers dédié au calcul PBKDF2
+from models.session_model import get_session_manager  # Invalidation du profil en cache après modification
+from models.index_existence import get_index_existence  # Index mémoire des emails/numéros déjà utilisés
+from models.utilisateur_model import (ROLES, CONTRAINTES_UNIQUES, UtilisateurExisteDeja,
+                                      hash_password, verify_password, necessite_rehash)
+from models.utilisateur import Utilisateur, COLONNES_CONNEXION, COLONNES_COMPLETES, colonnes_sql
+
+
+# ==========================================================
+# Classe : UtilisateurModelAsync
+# ----------------------------------------------------------
+# Version asyncio de UtilisateurModel : mêmes requêtes et mêmes
+# règles, mais sans bloquer la boucle d'événements.
+# - Les requêtes passent par le pool asyncpg (paramètres $1, $2…)
+# - Le hachage PBKDF2 est délégué au pool de hachage partagé
+# ==========================================================
+class UtilisateurModelAsync:
+
+    # ------------------------------------------------------
+    # Méthode : creer_utilisateur
+    # ------------------------------------------------------
+    @staticmethod
+    async def creer_utilisateur(nom, prenom, email, mot_de_passe, numero, date_naissance, adresse, role="CLIENT"):
+        """
+        Crée un nouvel utilisateur dans la base de données (version asynchrone).
+        Mêmes règles que UtilisateurModel.creer_utilisateur : insertion atomique,
+        doublons détectés par les contraintes d'unicité.
+
+        Args:
+            nom, prenom, email, mot_de_passe, numero, date_naissance, adresse, role
+
+        Returns:
+            l'identifiant du nouvel utilisateur
+
+        Raises:
+            UtilisateurExisteDeja: si l'email ou le numéro est déjà utilisé
+        """
+        if role not in ROLES:
+            role = "CLIENT"
+
+        # Hachage sur le pool de workers, sans bloquer la boucle d'événements
+        mot_hash = await get_hash_executor().executer_async(hash_password, mot_de_passe)
+
+        # asyncpg attend un objet date (et non une chaîne) pour une colonne DATE
+        if isinstance(date_naissance, str) and date_naissance:
+            date_naissance = datetime.strptime(date_naissance, "%Y-%m-%d").date()
+
+        try:
+            async with get_async_conn(transaction=True) as conn:
+                utilisateur_id = await conn.fetchval(
+                    """
+                    INSERT INTO public.utilisateur (
+                        nom, prenom, email, mot_de_passe,
+                        numero_telephone, date_naissance, adresse,
+                        kyc_status, role, niveau_verification, date_inscription
+                    )
+                    VALUES ($1, $2, $3, $4, $5, $6, $7, 'EN_ATTENTE', $8, 0, $9)
+                    RETURNING id
+                    """,
+                    nom, prenom, email, mot_hash, numero, date_naissance or None,
+                    adresse, role, datetime.now()
+                )
+        except asyncpg.UniqueViolationError as e:
+            # La contrainte violée indique directement le champ en conflit
+            get_index_existence().ajouter(email, numero)
+            raise UtilisateurExisteDeja(CONTRAINTES_UNIQUES.get(e.constraint_name, "email"))
+
+        # asyncpg renvoie un UUID : même type (texte) que la version synchrone
+        utilisateur_id = str(utilisateur_id)
+
+        # Les lectures de ce compte restent sur le primaire le temps de la réplication
+        marquer_ecriture(email, numero, utilisateur_id)
+
+        # Les prochaines vérifications de doublons connaîtront ce compte
+        get_index_existence().ajouter(email, numero)
+        return utilisateur_id
+
+    # ------------------------------------------------------
+    # Méthode : trouver_par_email
+    # ------------------------------------------------------
+    @staticmethod
+    async def trouver_par_email(email):
+        """
+        Recherche un utilisateur en base à partir de son adresse email.
+
+        Returns:
+            Utilisateur | None: la fiche complète, ou None si aucun utilisateur trouvé.
+        """
+        async with get_async_conn() as conn:
+            row = await conn.fetchrow(
+                f"SELECT {colonnes_sql(COLONNES_COMPLETES)} FROM public.utilisateur WHERE email = $1", email
+            )
+            return Utilisateur(*row) if row is not None else None
+
+    # ------------------------------------------------------
+    # Méthode : trouver_pour_connexion
+    # ------------------------------------------------------
+    @staticmethod
+    async def trouver_pour_connexion(email):
+        """
+        Lit uniquement les colonnes nécessaires à la connexion (profil + hash).
+        asyncpg prépare et met en cache automatiquement les requêtes côté serveur.
+        """
+        async with get_async_conn() as conn:
+            row = await conn.fetchrow(
+                f"SELECT {colonnes_sql(COLONNES_CONNEXION)} FROM public.utilisateur WHERE email = $1", email
+            )
+            return Utilisateur(*row) if row is not None else None
+
+    # ------------------------------------------------------
+    # Méthode : verifier_connexion
+    # ------------------------------------------------------
+    @staticmethod
+    async def verifier_connexion(email, mot_de_passe):
+        """
+        Vérifie les identifiants de connexion (email + mot de passe).
+
+        Returns:
+            Utilisateur | None: renvoie les infos de l'utilisateur si succès, sinon None.
+        """
+        user = await UtilisateurModelAsync.trouver_pour_connexion(email)
+
+        if not user:
+            return None
+
+        executor = get_hash_executor()
+        if not await executor.executer_async(verify_password, user.mot_de_passe, mot_de_passe):
+            return None
+
+        # Rehachage en arrière-plan : le résultat revient sur un thread du pool,
+        # la mise à jour est donc replanifiée dans la boucle d'événements
+        if necessite_rehash(user.mot_de_passe):
+            boucle = asyncio.get_running_loop()
+            executor.arriere_plan(
+                hash_password, mot_de_passe,
+                callback=lambda nouveau: asyncio.run_coroutine_threadsafe(
+                    UtilisateurModelAsync.mettre_a_jour_hash(user.id, user.mot_de_passe, nouveau), boucle
+                )
+            )
+        return user
+
+    # ------------------------------------------------------
+    # Méthode : mettre_a_jour_hash
+    # ------------------------------------------------------
+    @staticmethod
+    async def mettre_a_jour_hash(utilisateur_id, ancien_hash, nouveau_hash):
+        """
+        Remplace le hash d'un utilisateur si celui-ci n'a pas changé entre-temps.
+        """
+        async with get_async_conn() as conn:
+            await conn.execute(
+                "UPDATE public.utilisateur SET mot_de_passe = $1 WHERE id = $2 AND mot_de_passe = $3",
+                nouveau_hash, utilisateur_id, ancien_hash
+            )
+
+        # Comme la version synchrone : le profil en cache des sessions est relu
+        get_session_manager().invalider_utilisateur(utilisateur_id)
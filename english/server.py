@@ -0,0 +1,291 @@
+# ==========================================================
+# Importations nécessaires
+# ==========================================================
+
+# 'argparse' : options de la ligne de commande (hôte, port, workers)
+# 'json' : lecture des requêtes et écriture des réponses
+# 'signal' / 'threading' : arrêt propre sur SIGINT / SIGTERM, places de la file des connexions
+# 'time' : ancienneté des connexions en attente d'un worker
+import argparse
+import json
+import signal
+import threading
+import time
+
+# 'http.server' : serveur HTTP de la bibliothèque standard
+# 'ThreadPoolExecutor' : nombre de workers borné pour traiter les requêtes
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from concurrent.futures import ThreadPoolExecutor
+
+# Paramètres de l'application (.env)
+from config import Config
+
+# Pool de connexions PostgreSQL (initialisation, fermeture, métriques)
+from database.pool import init_pool, close_pool, metriques_prometheus, PoolTimeout
+
+# Logique d'inscription / connexion partagée avec le menu console
+from controllers.auth_controller import inscrire, connecter, message_doublon, ErreurValidation, ROLES_INSCRIPTION_PUBLIQUE
+from models.limiteur_connexion import ConnexionLimitee
+from models.utilisateur_model import UtilisateurExisteDeja
+
+# Pool de hachage (arrêt propre) et index des doublons (chargement au démarrage)
+from models.hash_executor import fermer_hash_executor, HachageIndisponible
+from models.index_existence import get_index_existence
+
+# File des transferts groupés (vidée avant la fermeture du pool PostgreSQL)
+from models.transfert_model import fermer_file_transferts
+
+# Répartiteur de notifications (branché sur les transferts, vidé à l'arrêt)
+from models.notification_model import brancher_transferts, fermer_notification_dispatcher
+
+# Alertes de solde faible (ensemble en mémoire, mis à jour à chaque transfert)
+from models.alerte_solde_model import demarrer_alertes_solde, arreter_alertes_solde
+
+
+# Taille maximale acceptée pour le corps d'une requête (octets)
+TAILLE_MAX_CORPS = 64 * 1024
+
+
+# Réponse envoyée directement sur le socket quand le serveur est saturé
+_CORPS_SURCHARGE = json.dumps({"erreur": "Service momentanément surchargé, réessayez."},
+                              ensure_ascii=False).encode()
+REPONSE_SURCHARGE = (
+    b"HTTP/1.1 503 Service Unavailable\r\n"
+    b"Content-Type: application/json; charset=utf-8\r\n"
+    b"Content-Length: " + str(len(_CORPS_SURCHARGE)).encode() + b"\r\n"
+    b"Retry-After: 1\r\n"
+    b"Connection: close\r\n\r\n" + _CORPS_SURCHARGE
+)
+
+
+# ==========================================================
+# Classe : ServeurPool
+# ----------------------------------------------------------
+# Serveur HTTP dont chaque connexion est traitée par un pool
+# de 'workers' threads (au lieu d'un thread par requête) :
+# la concurrence reste bornée et proportionnée au pool
+# PostgreSQL et au pool de hachage.
+#
+# La file d'attente des workers est bornée :
+# - au plus 'file_max' connexions attendent un worker ; au-delà,
+#   la connexion reçoit aussitôt un 503 (sans lire la requête)
+# - une connexion restée plus de 'delai_file' secondes dans la
+#   file reçoit un 503 au lieu d'être traitée trop tard
+# ==========================================================
+class ServeurPool(HTTPServer):
+
+    def __init__(self, adresse, handler, workers, file_max=None, delai_file=None):
+        super().__init__(adresse, handler)
+        self._workers = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="http")
+        file_max = file_max if file_max is not None else Config.SERVER_QUEUE_MAX
+        self.delai_file = delai_file if delai_file is not None else Config.SERVER_QUEUE_TIMEOUT
+        # Connexions acceptées simultanément (en cours + en attente)
+        self._places = threading.BoundedSemaphore(workers + file_max)
+
+    def process_request(self, request, client_address):
+        if not self._places.acquire(blocking=False):
+            self._refuser(request)
+            return
+        try:
+            self._workers.submit(self._traiter, request, client_address, time.monotonic())
+        except RuntimeError:
+            # Arrêt en cours : les workers n'acceptent plus de tâches
+            self._places.release()
+            self._refuser(request)
+
+    def _traiter(self, request, client_address, accepte_le):
+        try:
+            if time.monotonic() - accepte_le > self.delai_file:
+                self._refuser(request)
+                return
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._places.release()
+
+    def _refuser(self, request):
+        """Répond 503 sans lire la requête puis ferme la connexion."""
+        try:
+            request.settimeout(1)
+            request.sendall(REPONSE_SURCHARGE)
+        except OSError:
+            pass
+        self.shutdown_request(request)
+
+    def drainer(self):
+        """Attend la fin des requêtes déjà acceptées puis arrête les workers."""
+        self._workers.shutdown(wait=True)
+
+
+# ==========================================================
+# Classe : AuthHandler
+# ----------------------------------------------------------
+# Points d'accès JSON :
+#   POST /inscription  → 201 {"id": ...}  (rôles CLIENT / MARCHAND uniquement)
+#   POST /connexion    → 200 {"jeton": ..., "utilisateur": {...}}
+#                        (429 + Retry-After si trop de tentatives)
+#   GET  /sante        → 200 {"statut": "ok"}
+#   GET  /metriques    → métriques Prometheus (si PG_METRICS=1)
+# Corps invalide ou champ mal typé → 400 ; surcharge → 503
+# ==========================================================
+class AuthHandler(BaseHTTPRequestHandler):
+    # Délai maximal (secondes) de lecture/écriture sur le socket d'une requête
+    timeout = Config.SERVER_REQUEST_TIMEOUT
+
+    # ------------------------------------------------------
+    # Réponses
+    # ------------------------------------------------------
+    def _repondre(self, statut, corps, type_contenu="application/json", entetes=None):
+        if type_contenu == "application/json":
+            donnees = json.dumps(corps, ensure_ascii=False, default=str).encode()
+        else:
+            donnees = corps.encode()
+        self.send_response(statut)
+        self.send_header("Content-Type", f"{type_contenu}; charset=utf-8")
+        self.send_header("Content-Length", str(len(donnees)))
+        for nom, valeur in (entetes or {}).items():
+            self.send_header(nom, valeur)
+        self.end_headers()
+        self.wfile.write(donnees)
+
+    def _lire_json(self):
+        try:
+            longueur = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            return None
+        if longueur <= 0 or longueur > TAILLE_MAX_CORPS:
+            return None
+        try:
+            donnees = json.loads(self.rfile.read(longueur))
+        except (ValueError, UnicodeDecodeError):
+            return None
+        return donnees if isinstance(donnees, dict) else None
+
+    # ------------------------------------------------------
+    # Routage
+    # ------------------------------------------------------
+    def do_GET(self):
+        if self.path == "/sante":
+            self._repondre(200, {"statut": "ok"})
+        elif self.path == "/metriques":
+            self._repondre(200, metriques_prometheus(), "text/plain; version=0.0.4")
+        else:
+            self._repondre(404, {"erreur": "Ressource introuvable."})
+
+    def do_POST(self):
+        routes = {"/inscription": self._inscription, "/connexion": self._connexion}
+        action = routes.get(self.path)
+        if action is None:
+            self._repondre(404, {"erreur": "Ressource introuvable."})
+            return
+
+        donnees = self._lire_json()
+        if donnees is None:
+            self._repondre(400, {"erreur": "Corps JSON invalide."})
+            return
+
+        try:
+            action(donnees)
+        except (HachageIndisponible, PoolTimeout):
+            # Surcharge : le client peut réessayer plus tard
+            self._repondre(503, {"erreur": "Service momentanément surchargé, réessayez."})
+        except Exception as e:
+            self.log_error("Erreur interne : %r", e)
+            self._repondre(500, {"erreur": "Erreur interne."})
+
+    def _inscription(self, donnees):
+        try:
+            # Un compte ADMIN ne se crée pas depuis le point d'accès public
+            utilisateur_id = inscrire(donnees, ROLES_INSCRIPTION_PUBLIQUE)
+        except ErreurValidation as e:
+            self._repondre(400, {"erreur": str(e)})
+            return
+        except UtilisateurExisteDeja as e:
+            self._repondre(409, {"erreur": message_doublon(e.champ), "champ": e.champ})
+            return
+        self._repondre(201, {"id": utilisateur_id})
+
+    def _connexion(self, donnees):
+        email, mot_de_passe = donnees.get("email"), donnees.get("mot_de_passe")
+        if not isinstance(email, str) or not isinstance(mot_de_passe, str):
+            self._repondre(400, {"erreur": "Email et mot de passe attendus sous forme de texte."})
+            return
+        try:
+            resultat = connecter(email, mot_de_passe, self.client_address[0])
+        except ConnexionLimitee as e:
+            self._repondre(429, {"erreur": str(e)}, entetes={"Retry-After": str(int(e.reessayer_dans) + 1)})
+            return
+        if resultat is None:
+            self._repondre(401, {"erreur": "Identifiants invalides."})
+            return
+        user, jeton = resultat
+        self._repondre(200, {"jeton": jeton, "utilisateur": user.profil()})
+
+
+# ==========================================================
+# Fonction principale : main()
+# ----------------------------------------------------------
+# Lance le serveur HTTP. SIGINT / SIGTERM déclenchent un arrêt
+# propre : plus de nouvelles connexions, fin des requêtes en
+# cours, puis fermeture du pool de hachage et du pool PostgreSQL.
+#
+# Exemple :
+#   python server.py --port 8080 --workers 16
+# ==========================================================
+def main():
+    parser = argparse.ArgumentParser(description="Serveur HTTP/JSON d'authentification EBPay.")
+    parser.add_argument("--host", default=Config.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=Config.SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=Config.SERVER_WORKERS)
+    args = parser.parse_args()
+
+    try:
+        init_pool()
+    except Exception as e:
+        print(" Erreur de connexion à la base :", e)
+        return 1
+
+    if Config.INDEX_EXISTENCE:
+        try:
+            get_index_existence().charger()
+        except Exception as e:
+            print(" Index des utilisateurs indisponible :", e)
+
+    brancher_transferts()
+    try:
+        demarrer_alertes_solde()
+    except Exception as e:
+        print(" Alertes de solde indisponibles :", e)
+
+    serveur = ServeurPool((args.host, args.port), AuthHandler, args.workers)
+
+    # shutdown() doit être appelé depuis un autre thread que serve_forever()
+    def arreter(signum, frame):
+        threading.Thread(target=serveur.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGINT, arreter)
+    signal.signal(signal.SIGTERM, arreter)
+
+    print(f"✅ Serveur EBPay à l'écoute sur http://{args.host}:{args.port} ({args.workers} workers)")
+    try:
+        serveur.serve_forever()
+    finally:
+        print(" Arrêt en cours : fin des requêtes en cours…")
+        serveur.server_close()
+        serveur.drainer()
+        arreter_alertes_solde()
+        fermer_file_transferts()
+        fermer_notification_dispatcher()
+        fermer_hash_executor()
+        close_pool()
+        print("Au revoir.")
+    return 0
+
+
+# ==========================================================
+# Point d’entrée du script
+# ==========================================================
+if __name__ == "__main__":
+    raise SystemExit(main())